@@ -7,13 +7,12 @@ from typing import Any, Dict, List, Optional
 import azure.functions as func
 import httpx
 
+from ..shared.canva_data_cache import canva_data
+
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DEFAULT_DATA_FILE = PROJECT_ROOT / "canva_data_integrated_latest.json"
-PUBLIC_DATA_FILE = PROJECT_ROOT / "public" / "data" / "canva_data_integrated_latest.json"
 KNOWLEDGE_DIR = PROJECT_ROOT / "public" / "knowledge-base"
 DEFAULT_KNOWLEDGE_FILE = KNOWLEDGE_DIR / "default_knowledge.json"
 SITE_CONTEXT_FILE = KNOWLEDGE_DIR / "site_context.json"
-DATA_FILE_ENV = "CANVA_DATA_FILE"
 MODEL_ENV = "CHAT_IA_MODEL"
 TEMPERATURE_ENV = "CHAT_IA_TEMPERATURE"
 OPENAI_API_KEY_ENV = "OPENAI_API_KEY"
@@ -29,46 +28,19 @@ def _json_response(payload: Dict[str, Any], status_code: int) -> func.HttpRespon
   )
 
 
-def _resolve_data_file() -> Optional[Path]:
-  """Determina qual arquivo deve ser usado como fonte de dados do dashboard."""
-  env_path = os.environ.get(DATA_FILE_ENV)
-  candidates = []
-
-  if env_path:
-    candidates.append(Path(env_path).expanduser())
-
-  candidates.extend([DEFAULT_DATA_FILE, PUBLIC_DATA_FILE])
-
-  for candidate in candidates:
-    if candidate.exists():
-      logging.info(f"Dados do dashboard carregados de: {candidate}")
-      return candidate
-
-  logging.warning("Nenhum arquivo de dados integrado foi encontrado.")
-  return None
-
-
 def get_dashboard_data() -> Dict[str, Any]:
-  """Le o arquivo de dados integrado mais recente e remove informacoes sensiveis."""
-  data_file = _resolve_data_file()
-
-  if not data_file:
-    return {"error": "Dados nao disponiveis", "message": "Os dados do Canva ainda nao foram coletados."}
-
+  """Retorna o arquivo de dados integrado mais recente sem informacoes sensiveis."""
   try:
-    with open(data_file, "r", encoding="utf-8") as file_handle:
-      data = json.load(file_handle)
+    snapshot = canva_data.load()
   except (OSError, json.JSONDecodeError) as error:
     logging.error(f"Erro ao ler dados do dashboard: {error}")
     return {"error": "Erro ao ler dados", "message": str(error)}
 
-  if "schools_allocation" in data:
-    for school in data["schools_allocation"]:
-      school.pop("users", None)
-
-  data.pop("unallocated_users_list", None)
+  if snapshot is None:
+    logging.warning("Nenhum arquivo de dados integrado foi encontrado.")
+    return {"error": "Dados nao disponiveis", "message": "Os dados do Canva ainda nao foram coletados."}
 
-  return data
+  return snapshot.dashboard
 
 
 def _load_json_file(file_path: Path) -> Optional[Any]:
@@ -0,0 +1,48 @@
+"""add_schools_used_licenses
+
+Revision ID: 5b1e2f7c9a41
+Revises: 00f5dc789b4e
+Create Date: 2026-01-10 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e2f7c9a41'
+down_revision: Union[str, None] = '00f5dc789b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'schools',
+        sa.Column('used_licenses', sa.Integer(), nullable=False, server_default=sa.text('0')),
+    )
+    op.create_check_constraint(
+        op.f('ck_schools_used_licenses_nonnegative'), 'schools', 'used_licenses >= 0'
+    )
+
+    # Backfill from the current state of users
+    op.execute(
+        """
+        UPDATE schools s
+        SET used_licenses = u.used
+        FROM (
+            SELECT school_id, count(*) AS used
+            FROM users
+            WHERE has_canva IS TRUE
+            GROUP BY school_id
+        ) u
+        WHERE u.school_id = s.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(op.f('ck_schools_used_licenses_nonnegative'), 'schools', type_='check')
+    op.drop_column('schools', 'used_licenses')
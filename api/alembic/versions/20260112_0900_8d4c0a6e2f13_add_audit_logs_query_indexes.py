@@ -0,0 +1,40 @@
+"""add_audit_logs_query_indexes
+
+Revision ID: 8d4c0a6e2f13
+Revises: 5b1e2f7c9a41
+Create Date: 2026-01-12 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4c0a6e2f13'
+down_revision: Union[str, None] = '5b1e2f7c9a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination on (ts, id) and action filter
+    op.create_index('idx_audit_logs_ts_id', 'audit_logs', [sa.text('ts DESC'), sa.text('id DESC')])
+    op.create_index('idx_audit_logs_action_ts', 'audit_logs', ['action', sa.text('ts DESC')])
+
+    # Substring search on actor (ILIKE '%..%')
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'idx_audit_logs_actor_trgm',
+        'audit_logs',
+        ['actor'],
+        postgresql_using='gin',
+        postgresql_ops={'actor': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_audit_logs_actor_trgm', table_name='audit_logs')
+    op.drop_index('idx_audit_logs_action_ts', table_name='audit_logs')
+    op.drop_index('idx_audit_logs_ts_id', table_name='audit_logs')
@@ -1,116 +1,71 @@
 import azure.functions as func
-import json
-import csv
-from io import StringIO
-from ..shared.auth import verify_token, check_permission
-from ..shared.service import data_service
+from ..shared.audit_export import AuditExportTooLarge, build_audit_export
+from ..shared.request_pipeline import http_endpoint, json_response, error_response
+from ..shared.service import data_service, AUDIT_PAGE_DEFAULT
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
-    """Audit log endpoint - GET /api/audit"""
+# Only coordenadora can access audit logs
+@http_endpoint(methods=("GET",), role="coordenadora", forbidden_message="Apenas coordenadoras podem acessar logs de auditoria")
+def main(req: func.HttpRequest, user: dict) -> func.HttpResponse:
+    """Audit log endpoint - GET /api/audit
+
+    Query: start, end (YYYY-MM-DD ou ISO 8601), schoolId, action, actor,
+    limit (padrão 100, máx. 1000), cursor (nextCursor da página anterior),
+    export=csv (gzip=1 ou Accept-Encoding: gzip para comprimir).
+    """
     
-    if req.method != 'GET':
-        return func.HttpResponse(
-            json.dumps({"success": False, "message": "Method not allowed"}),
-            status_code=405,
-            headers={"Content-Type": "application/json; charset=utf-8"}
-        )
+    # Get query parameters
+    filters = {
+        'start': req.params.get('start'),
+        'end': req.params.get('end'),
+        'schoolId': req.params.get('schoolId'),
+        'action': req.params.get('action'),
+        'actor': req.params.get('actor')
+    }
     
-    try:
-        # Verify authentication
-        auth_header = req.headers.get('Authorization', '')
-        if not auth_header.startswith('Bearer '):
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Token de autorização necessário"}),
-                status_code=401,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
-        
-        token = auth_header[7:]  # Remove 'Bearer '
-        payload = verify_token(token)
-        if not payload:
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Token inválido ou expirado"}),
-                status_code=401,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
+    # Remove None values
+    filters = {k: v for k, v in filters.items() if v}
+    
+    # Check if CSV export is requested
+    export_format = req.params.get('export')
+    
+    if export_format == 'csv':
+        # Stream rows from a server-side cursor into CSV chunks (gzip optional)
+        compress = (
+            req.params.get('gzip', '').lower() in ('1', 'true')
+            or 'gzip' in req.headers.get('Accept-Encoding', '').lower()
+        )
+        try:
+            export = build_audit_export(data_service.iter_audit_logs(filters), compress=compress)
+        except ValueError as e:
+            return error_response(str(e), 400)
+        except AuditExportTooLarge as e:
+            return error_response(str(e), 413)
         
-        # Check permissions - only coordenadora can access audit logs
-        user_role = payload.get('role', '')
-        if not check_permission(user_role, 'coordenadora'):
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Apenas coordenadoras podem acessar logs de auditoria"}),
-                status_code=403,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
+        if export.download_url:
+            # Too large to return inline: staged to Blob Storage
+            return json_response({
+                "success": True,
+                "message": "Exportação grande demais para download direto; use o link",
+                "downloadUrl": export.download_url,
+            })
         
-        # Get query parameters
-        filters = {
-            'start': req.params.get('start'),
-            'end': req.params.get('end'),
-            'schoolId': req.params.get('schoolId'),
-            'action': req.params.get('action'),
-            'actor': req.params.get('actor')
+        headers = {
+            "Content-Type": "text/csv; charset=utf-8",
+            "Content-Disposition": "attachment; filename=auditoria.csv",
         }
+        if compress:
+            headers["Content-Encoding"] = "gzip"
         
-        # Remove None values
-        filters = {k: v for k, v in filters.items() if v}
-        
-        # Check if CSV export is requested
-        export_format = req.params.get('export')
-        
-        # Get audit logs
-        logs = data_service.get_audit_logs(filters)
-        
-        if export_format == 'csv':
-            # Return CSV format
-            output = StringIO()
-            if logs:
-                # Get headers from first log entry
-                headers = ['Data/Hora', 'Ação', 'Escola ID', 'Escola', 'Usuário', 'Detalhes']
-                writer = csv.writer(output)
-                writer.writerow(headers)
-                
-                for log in logs:
-                    row = [
-                        log.get('ts', ''),
-                        log.get('action', ''),
-                        log.get('school_id', ''),
-                        log.get('school_name', ''),
-                        log.get('actor', ''),
-                        json.dumps(log.get('payload', {}), ensure_ascii=False)
-                    ]
-                    writer.writerow(row)
-            
-            csv_content = output.getvalue()
-            output.close()
-            
-            return func.HttpResponse(
-                csv_content,
-                status_code=200,
-                headers={
-                    "Content-Type": "text/csv; charset=utf-8",
-                    "Content-Disposition": "attachment; filename=auditoria.csv",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type, Authorization"
-                }
-            )
-        else:
-            # Return JSON format
-            return func.HttpResponse(
-                json.dumps(logs, ensure_ascii=False),
-                status_code=200,
-                headers={
-                    "Content-Type": "application/json; charset=utf-8",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type, Authorization"
-                }
-            )
-        
-    except Exception as e:
-        return func.HttpResponse(
-            json.dumps({"success": False, "message": f"Erro interno: {str(e)}"}),
-            status_code=500,
-            headers={"Content-Type": "application/json; charset=utf-8"}
-        )
\ No newline at end of file
+        return func.HttpResponse(export.body, status_code=200, headers=headers)
+    
+    # Return JSON format, one page at a time: {"items": [...], "nextCursor": ...}
+    try:
+        page = data_service.get_audit_log_page(
+            filters,
+            limit=int(req.params.get('limit') or AUDIT_PAGE_DEFAULT),
+            cursor=req.params.get('cursor'),
+        )
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    return json_response(page)
@@ -0,0 +1,55 @@
+import azure.functions as func
+from ..shared.request_pipeline import http_endpoint, error_response, result_response
+from ..shared.service import data_service, BULK_MAX_ACTIONS, BULK_SUCCESS_MESSAGES
+from ..shared.model import LicenseAction
+
+@http_endpoint(methods=("POST",), role="agente")
+def main(req: func.HttpRequest, user: dict) -> func.HttpResponse:
+    """Bulk license endpoint - POST /api/licenses/bulk
+
+    Body: {"motivo": "...", "ticket": "...", "actions": [
+        {"type": "assign", "schoolId": "...", "userEmail": "..."},
+        {"type": "revoke", "schoolId": "...", "userEmail": "..."},
+        {"type": "transfer", "schoolId": "...", "fromEmail": "...", "toEmail": "..."}
+    ]}
+    motivo/ticket podem ser informados por item, sobrescrevendo os do lote.
+    """
+    
+    # Parse request body
+    try:
+        body = req.get_json()
+    except ValueError:
+        return error_response("Invalid JSON", 400)
+    
+    items = body.get('actions')
+    if not isinstance(items, list) or not items:
+        return error_response("Lista de ações é obrigatória", 400)
+    if len(items) > BULK_MAX_ACTIONS:
+        return error_response(f"Máximo de {BULK_MAX_ACTIONS} ações por lote", 400)
+    
+    default_motivo = str(body.get('motivo', '')).strip()
+    default_ticket = str(body.get('ticket', '')).strip()
+    
+    # Validate required fields and build action objects
+    actions = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            item = {}
+        kind = str(item.get('type', '')).strip().lower()
+        action = LicenseAction(
+            school_id=str(item.get('schoolId', '')).strip(),
+            user_email=str(item.get('userEmail', '')).strip() or None,
+            from_email=str(item.get('fromEmail', '')).strip() or None,
+            to_email=str(item.get('toEmail', '')).strip() or None,
+            motivo=str(item.get('motivo', '')).strip() or default_motivo,
+            ticket=str(item.get('ticket', '')).strip() or default_ticket,
+        )
+        if kind not in BULK_SUCCESS_MESSAGES:
+            return error_response(f"Ação {index}: tipo inválido (use assign, revoke ou transfer)", 400)
+        emails = [action.from_email, action.to_email] if kind == 'transfer' else [action.user_email]
+        if not all([action.school_id, action.motivo, action.ticket, *emails]):
+            return error_response(f"Ação {index}: todos os campos são obrigatórios", 400)
+        actions.append((kind, action))
+    
+    # Perform actions
+    return result_response(data_service.bulk_license_actions(actions, user.get('sub', '')))
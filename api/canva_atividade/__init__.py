@@ -0,0 +1,29 @@
+import azure.functions as func
+from ..shared.request_pipeline import http_endpoint, json_response, error_response
+from ..shared.canva_activity_service import ACTIVITY_INACTIVE_DEFAULT, query_activity
+
+@http_endpoint(methods=("GET",), role="agente")
+def main(req: func.HttpRequest, user: dict) -> func.HttpResponse:
+    """Member activity endpoint - GET /api/canva/atividade
+
+    Parâmetros: periodo (``<inicio>_<fim>``, padrão: exportação mais recente),
+    agrupar (escola | funcao), escola (ID da escola), limite (inativos listados).
+    """
+    try:
+        limit = int(req.params.get('limite') or ACTIVITY_INACTIVE_DEFAULT)
+    except ValueError:
+        return error_response("limite deve ser um número inteiro", 400)
+
+    try:
+        result = query_activity(
+            period_key=req.params.get('periodo') or None,
+            group_by=req.params.get('agrupar') or "escola",
+            school_id=req.params.get('escola') or None,
+            inactive_limit=limit,
+        )
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except LookupError as e:
+        return error_response(str(e), 404)
+
+    return json_response({"success": True, **result})
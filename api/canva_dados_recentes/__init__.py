@@ -6,23 +6,19 @@ Retorna os dados mais recentes coletados do Canva a partir do arquivo integrado.
 
 import logging
 import json
-from pathlib import Path
 import azure.functions as func
 
+from ..shared.canva_data_cache import canva_data, etag_matches
+
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """Retorna o JSON mais recente integrado do Canva."""
     logging.info("Requisição recebida para obter dados recentes do Canva")
 
     try:
-        # Caminho para o arquivo de dados integrados
-        data_file = Path(__file__).parent.parent.parent / "canva_data_integrated_latest.json"
-
-        if not data_file.exists():
-            # Tenta caminho alternativo (public/data)
-            data_file = Path(__file__).parent.parent.parent / "public" / "data" / "canva_data_integrated_latest.json"
+        snapshot = canva_data.load()
 
-        if not data_file.exists():
+        if snapshot is None:
             logging.warning("Arquivo de dados integrados não encontrado")
             return func.HttpResponse(
                 json.dumps(
@@ -39,20 +35,24 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json; charset=utf-8",
             )
 
-        with open(data_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        etag = snapshot.etag()
+        headers = {
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Cache-Control": "no-cache",
+            "ETag": etag,
+        }
+        if etag_matches(req.headers.get("If-None-Match"), etag):
+            return func.HttpResponse(status_code=304, headers=headers)
 
-        logging.info(f'Dados retornados com sucesso. Período: {data.get("periodo_filtro", "N/A")}')
+        logging.info(f'Dados retornados com sucesso. Período: {snapshot.data.get("periodo_filtro", "N/A")}')
 
         return func.HttpResponse(
-            json.dumps(data, ensure_ascii=False, indent=2),
+            snapshot.body(),
             status_code=200,
             mimetype="application/json; charset=utf-8",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type",
-            },
+            headers=headers,
         )
 
     except json.JSONDecodeError as e:
@@ -0,0 +1,30 @@
+import azure.functions as func
+from ..shared.request_pipeline import http_endpoint, json_response, error_response
+from ..shared.canva_template_service import TEMPLATE_TOP_DEFAULT, query_templates
+
+@http_endpoint(methods=("GET",), role="agente")
+def main(req: func.HttpRequest, user: dict) -> func.HttpResponse:
+    """Template usage endpoint - GET /api/canva/modelos
+
+    Parâmetros: periodo (``<inicio>_<fim>``, padrão: exportação mais recente),
+    ordenar (usadas | publicado | compartilhados | crescimento), limite,
+    id (série de um modelo em todas as exportações).
+    """
+    try:
+        limit = int(req.params.get('limite') or TEMPLATE_TOP_DEFAULT)
+    except ValueError:
+        return error_response("limite deve ser um número inteiro", 400)
+
+    try:
+        result = query_templates(
+            period_key=req.params.get('periodo') or None,
+            sort=req.params.get('ordenar') or "usadas",
+            limit=limit,
+            template_id=req.params.get('id') or None,
+        )
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except LookupError as e:
+        return error_response(str(e), 404)
+
+    return json_response({"success": True, **result})
@@ -4,10 +4,11 @@ import azure.functions as func
 
 try:
     # Preferir o servi�o dedicado para reuso e testes
-    from ..shared.canva_overview_service import compute_overview, build_school_breakdown
+    from ..shared.canva_overview_service import compute_overview, build_school_breakdown, load_overview_dataset
 except Exception:  # pragma: no cover - fallback em ambiente sem pacotes resolvidos
     compute_overview = None
     build_school_breakdown = None
+    load_overview_dataset = None
 
 
 def _error(message: str, status: int = 500) -> func.HttpResponse:
@@ -44,8 +45,10 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         license_limit_param = req.params.get("licenseLimit")
         license_limit = int(license_limit_param) if license_limit_param else None
 
-        overview = compute_overview(license_limit=license_limit)
-        breakdown = build_school_breakdown(license_limit=license_limit)
+        # Um unico parse dos CSVs por versao dos arquivos, compartilhado pelas duas visoes
+        dataset = load_overview_dataset()
+        overview = compute_overview(license_limit=license_limit, dataset=dataset)
+        breakdown = build_school_breakdown(license_limit=license_limit, dataset=dataset)
 
         payload = {
             "success": True,
@@ -0,0 +1,36 @@
+import azure.functions as func
+from ..shared.request_pipeline import http_endpoint, json_response, error_response
+from ..shared.canva_overview_service import (
+    OVERVIEW_PAGE_DEFAULT,
+    load_overview_dataset,
+    parse_overview_filters,
+    query_overview,
+)
+
+@http_endpoint(methods=("GET",), role="agente")
+def main(req: func.HttpRequest, user: dict) -> func.HttpResponse:
+    """Faceted overview endpoint - GET /api/canva/overview/facets
+
+    Filtros (valores separados por vírgula): carteiraSaf, cluster, state, region, status.
+    Paginação: page, pageSize. Limite por escola: licenseLimit.
+    """
+    try:
+        license_limit = int(req.params.get('licenseLimit') or 0) or None
+        page = int(req.params.get('page') or 1)
+        page_size = int(req.params.get('pageSize') or OVERVIEW_PAGE_DEFAULT)
+    except ValueError:
+        return error_response("licenseLimit, page e pageSize devem ser números inteiros", 400)
+
+    try:
+        dataset = load_overview_dataset()
+    except FileNotFoundError as e:
+        return error_response(str(e), 404)
+
+    result = query_overview(
+        parse_overview_filters(req.params),
+        license_limit=license_limit,
+        page=page,
+        page_size=page_size,
+        dataset=dataset,
+    )
+    return json_response({"success": True, **result})
@@ -1,104 +1,36 @@
 import azure.functions as func
-import json
-from ..shared.auth import verify_token, check_permission
+from ..shared.request_pipeline import http_endpoint, error_response, result_response
 from ..shared.service import data_service
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+# Only coordenadora can change limits
+@http_endpoint(methods=("POST",), role="coordenadora", forbidden_message="Apenas coordenadoras podem alterar limites")
+def main(req: func.HttpRequest, user: dict) -> func.HttpResponse:
     """Change school limit endpoint - POST /api/schools/{id}/limit"""
     
-    if req.method != 'POST':
-        return func.HttpResponse(
-            json.dumps({"success": False, "message": "Method not allowed"}),
-            status_code=405,
-            headers={"Content-Type": "application/json; charset=utf-8"}
-        )
+    # Get school ID from route params
+    school_id = req.route_params.get('id')
+    if not school_id:
+        return error_response("ID da escola é obrigatório", 400)
     
+    # Parse request body
     try:
-        # Verify authentication
-        auth_header = req.headers.get('Authorization', '')
-        if not auth_header.startswith('Bearer '):
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Token de autorização necessário"}),
-                status_code=401,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
-        
-        token = auth_header[7:]  # Remove 'Bearer '
-        payload = verify_token(token)
-        if not payload:
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Token inválido ou expirado"}),
-                status_code=401,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
-        
-        # Check permissions - only coordenadora can change limits
-        user_role = payload.get('role', '')
-        if not check_permission(user_role, 'coordenadora'):
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Apenas coordenadoras podem alterar limites"}),
-                status_code=403,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
-        
-        # Get school ID from route params
-        school_id = req.route_params.get('id')
-        if not school_id:
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "ID da escola é obrigatório"}),
-                status_code=400,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
-        
-        # Parse request body
-        try:
-            body = req.get_json()
-        except ValueError:
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Invalid JSON"}),
-                status_code=400,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
-        
-        # Validate required fields
-        new_limit = body.get('newLimit')
-        motivo = body.get('motivo', '').strip()
-        
-        if new_limit is None or not motivo:
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Novo limite e motivo são obrigatórios"}),
-                status_code=400,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
-        
-        try:
-            new_limit = int(new_limit)
-        except (ValueError, TypeError):
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Novo limite deve ser um número inteiro"}),
-                status_code=400,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
-        
-        # Perform action
-        result = data_service.change_school_limit(school_id, new_limit, motivo, payload.get('sub', ''))
-        
-        status_code = 200 if result.get('success') else 400
-        
-        return func.HttpResponse(
-            json.dumps(result, ensure_ascii=False),
-            status_code=status_code,
-            headers={
-                "Content-Type": "application/json; charset=utf-8",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type, Authorization"
-            }
-        )
-        
-    except Exception as e:
-        return func.HttpResponse(
-            json.dumps({"success": False, "message": f"Erro interno: {str(e)}"}),
-            status_code=500,
-            headers={"Content-Type": "application/json; charset=utf-8"}
-        )
\ No newline at end of file
+        body = req.get_json()
+    except ValueError:
+        return error_response("Invalid JSON", 400)
+    
+    # Validate required fields
+    new_limit = body.get('newLimit')
+    motivo = body.get('motivo', '').strip()
+    
+    if new_limit is None or not motivo:
+        return error_response("Novo limite e motivo são obrigatórios", 400)
+    
+    try:
+        new_limit = int(new_limit)
+    except (ValueError, TypeError):
+        return error_response("Novo limite deve ser um número inteiro", 400)
+    
+    # Perform action
+    return result_response(
+        data_service.change_school_limit(school_id, new_limit, motivo, user.get('sub', ''))
+    )
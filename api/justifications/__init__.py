@@ -1,94 +1,42 @@
 import azure.functions as func
-import json
 import logging
-from datetime import datetime
 from typing import Optional
-from ..shared.auth import verify_token, check_permission
+from sqlalchemy import text
+from ..shared.request_pipeline import http_endpoint, authenticate, json_response, error_response
 from ..shared.db import get_session
 from ..shared.db_models import Justification, School
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+# role=None: o health check responde sem token; a autenticação é feita abaixo
+@http_endpoint(methods=("GET", "POST"), role=None)
+def main(req: func.HttpRequest, user: Optional[dict]) -> func.HttpResponse:
     """Justifications endpoint - GET/POST /api/justifications"""
     
     # Health check endpoint
     if req.params.get('health') == 'true':
         try:
             with get_session() as session:
-                session.execute("SELECT 1")
-            return func.HttpResponse(
-                json.dumps({"status": "healthy", "database": "connected"}),
-                status_code=200,
-                headers={"Content-Type": "application/json"}
-            )
+                session.execute(text("SELECT 1"))
+            return json_response({"status": "healthy", "database": "connected"})
         except Exception as e:
             logger.error(f"Health check failed: {str(e)}")
-            return func.HttpResponse(
-                json.dumps({"status": "unhealthy", "error": str(e)}),
-                status_code=500,
-                headers={"Content-Type": "application/json"}
-            )
-    
-    # Handle CORS preflight
-    if req.method == 'OPTIONS':
-        return func.HttpResponse(
-            "",
-            status_code=200,
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type, Authorization"
-            }
-        )
+            return json_response({"status": "unhealthy", "error": str(e)}, status_code=500)
     
     try:
-        # Verify authentication
-        auth_header = req.headers.get('Authorization', '')
-        if not auth_header.startswith('Bearer '):
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Token de autorização necessário"}),
-                status_code=401,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
-        
-        token = auth_header[7:]  # Remove 'Bearer '
-        payload = verify_token(token)
-        if not payload:
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Token inválido ou expirado"}),
-                status_code=401,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
-        
-        # Check permissions
-        user_role = payload.get('role', '')
-        if not check_permission(user_role, 'agente'):
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Permissão insuficiente"}),
-                status_code=403,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
+        # Verify authentication and permissions
+        payload, failure = authenticate(req, 'agente')
+        if failure:
+            return failure
         
         if req.method == 'GET':
             return handle_get(req)
-        elif req.method == 'POST':
-            return handle_post(req, payload)
-        else:
-            return func.HttpResponse(
-                json.dumps({"success": False, "message": "Method not allowed"}),
-                status_code=405,
-                headers={"Content-Type": "application/json; charset=utf-8"}
-            )
+        return handle_post(req, payload)
             
     except Exception as e:
         logger.error(f"Erro no endpoint de justificativas: {str(e)}", exc_info=True)
-        return func.HttpResponse(
-            json.dumps({"success": False, "message": f"Erro interno: {str(e)}"}),
-            status_code=500,
-            headers={"Content-Type": "application/json; charset=utf-8"}
-        )
+        return error_response(f"Erro interno: {str(e)}", 500)
 
 
 def handle_get(req: func.HttpRequest) -> func.HttpResponse:
@@ -130,26 +78,13 @@ def handle_get(req: func.HttpRequest) -> func.HttpResponse:
                 for j in justifications
             ]
             
-            return func.HttpResponse(
-                json.dumps({
-                    "success": True,
-                    "data": justifications_data
-                }, ensure_ascii=False),
-                status_code=200,
-                headers={
-                    "Content-Type": "application/json; charset=utf-8",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type, Authorization"
-                }
-            )
+            return json_response({
+                "success": True,
+                "data": justifications_data
+            })
             
     except Exception as e:
-        return func.HttpResponse(
-            json.dumps({"success": False, "message": f"Erro ao buscar justificativas: {str(e)}"}),
-            status_code=500,
-            headers={"Content-Type": "application/json; charset=utf-8"}
-        )
+        return error_response(f"Erro ao buscar justificativas: {str(e)}", 500)
 
 
 def handle_post(req: func.HttpRequest, payload: dict) -> func.HttpResponse:
@@ -164,11 +99,7 @@ def handle_post(req: func.HttpRequest, payload: dict) -> func.HttpResponse:
         
         for field in required_fields:
             if field not in body:
-                return func.HttpResponse(
-                    json.dumps({"success": False, "message": f"Campo obrigatório ausente: {field}"}),
-                    status_code=400,
-                    headers={"Content-Type": "application/json; charset=utf-8"}
-                )
+                return error_response(f"Campo obrigatório ausente: {field}", 400)
         
         # Validate user objects
         old_user = body['oldUser']
@@ -177,21 +108,13 @@ def handle_post(req: func.HttpRequest, payload: dict) -> func.HttpResponse:
         for user_type, user_data in [('oldUser', old_user), ('newUser', new_user)]:
             for field in ['name', 'email', 'role']:
                 if field not in user_data:
-                    return func.HttpResponse(
-                        json.dumps({"success": False, "message": f"Campo obrigatório ausente em {user_type}: {field}"}),
-                        status_code=400,
-                        headers={"Content-Type": "application/json; charset=utf-8"}
-                    )
+                    return error_response(f"Campo obrigatório ausente em {user_type}: {field}", 400)
         
         with get_session() as session:
             # Verify school exists
             school = session.query(School).filter(School.id == body['schoolId']).first()
             if not school:
-                return func.HttpResponse(
-                    json.dumps({"success": False, "message": f"Escola não encontrada: {body['schoolId']}"}),
-                    status_code=404,
-                    headers={"Content-Type": "application/json; charset=utf-8"}
-                )
+                return error_response(f"Escola não encontrada: {body['schoolId']}", 404)
             
             # Create new justification
             justification = Justification(
@@ -231,29 +154,12 @@ def handle_post(req: func.HttpRequest, payload: dict) -> func.HttpResponse:
                 "timestamp": justification.timestamp.isoformat()
             }
             
-            return func.HttpResponse(
-                json.dumps({
-                    "success": True,
-                    "data": result
-                }, ensure_ascii=False),
-                status_code=201,
-                headers={
-                    "Content-Type": "application/json; charset=utf-8",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type, Authorization"
-                }
-            )
+            return json_response({
+                "success": True,
+                "data": result
+            }, status_code=201)
             
     except ValueError as e:
-        return func.HttpResponse(
-            json.dumps({"success": False, "message": "JSON inválido no corpo da requisição"}),
-            status_code=400,
-            headers={"Content-Type": "application/json; charset=utf-8"}
-        )
+        return error_response("JSON inválido no corpo da requisição", 400)
     except Exception as e:
-        return func.HttpResponse(
-            json.dumps({"success": False, "message": f"Erro ao criar justificativa: {str(e)}"}),
-            status_code=500,
-            headers={"Content-Type": "application/json; charset=utf-8"}
-        )
+        return error_response(f"Erro ao criar justificativa: {str(e)}", 500)
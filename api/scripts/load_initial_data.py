@@ -1,4 +1,5 @@
 import os
+import sys
 import unicodedata
 from datetime import datetime
 from pathlib import Path
@@ -15,6 +16,12 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from api.shared.email_compliance import is_email_compliant  # noqa: E402
+from api.shared.workbook_cache import read_workbook  # noqa: E402
+
 # --------------------------------------------------------------------
 # CONFIGURAÇÃO DE BANCO
 # --------------------------------------------------------------------
@@ -83,7 +90,7 @@ def load_schools():
 
     path = "local_data/Franchising_oficial.xlsx"
 
-    df = pd.read_excel(path)
+    df = read_workbook(path, normalize=False)
 
     ID_COL = "ID da Escola"
     NAME_COL = "Nome da Escola"
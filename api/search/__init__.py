@@ -0,0 +1,27 @@
+import azure.functions as func
+from ..shared.request_pipeline import http_endpoint, json_response, error_response
+from ..shared.service import data_service
+from ..shared.search_index import SEARCH_LIMIT_DEFAULT
+
+@http_endpoint(methods=("GET",), role="agente")
+def main(req: func.HttpRequest, user: dict) -> func.HttpResponse:
+    """Search endpoint - GET /api/search?q=...
+
+    Busca por prefixo, sem acentos, em nomes/cidades de escolas e e-mails/nomes
+    de usuários. Parâmetros: q, tipo (todos | escolas | usuarios), limite.
+    """
+    query = (req.params.get('q') or '').strip()
+    if not query:
+        return error_response("Parâmetro q é obrigatório", 400)
+
+    try:
+        limit = int(req.params.get('limite') or SEARCH_LIMIT_DEFAULT)
+    except ValueError:
+        return error_response("limite deve ser um número inteiro", 400)
+
+    try:
+        result = data_service.search(query, req.params.get('tipo') or "todos", limit)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    return json_response({"success": True, **result})
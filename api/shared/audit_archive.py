@@ -0,0 +1,201 @@
+"""Formato colunar compactado dos meses de auditoria já fechados (``audit-YYYY-MM.colz``).
+
+Layout: ``MAGIC`` seguido de um bloco zlib com
+
+* ``uint32`` (little-endian) com o tamanho do cabeçalho JSON;
+* o cabeçalho: mês, número de linhas, ETag do JSONL absorvido, dicionários de
+  ``action``, ``actor`` e ``school_id`` e a lista de seções;
+* as seções, uma após a outra: os códigos de cada coluna de dicionário
+  (``0`` = campo ausente, ``n`` = ``dicionario[n - 1]``), o ``ts`` em
+  microssegundos como deltas ``int64`` e os demais campos de cada linha como
+  JSON, um por linha.
+
+As linhas ficam em ordem de ``ts``, então um intervalo de dias é achado por
+``bisect`` e só essas linhas são montadas. ``ts`` que não voltam idênticos via
+``isoformat`` (fuso, formato diferente) ou que nem são texto (``null``,
+números) são guardados como estão em ``ts_raw``; linhas sem o campo ficam em
+``ts_missing``. Sem ``ts`` legível a linha vai para o começo e nunca casa com
+um intervalo de datas, como na leitura do JSONL.
+"""
+import bisect
+import json
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b'SAFAUDC1'
+ARCHIVE_VERSION = 2
+DICTIONARY_FIELDS = ('action', 'actor', 'school_id')
+
+_EPOCH = datetime(1970, 1, 1)
+# Linhas sem ts legível ficam antes de qualquer data real
+_NO_TS = -(2 ** 62)
+
+
+def _ts_micros(value) -> Tuple[int, Optional[str]]:
+    """(microssegundos desde a epoch, texto original quando ``isoformat`` não o reproduz)."""
+    if not isinstance(value, str):
+        return _NO_TS, value
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return _NO_TS, value
+    micros = (parsed.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+    return micros, (None if parsed.tzinfo is None and parsed.isoformat() == value else value)
+
+
+def _ts_text(micros: int) -> str:
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+def _to_bytes(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def encode_archive(entries: List[Dict], month: str, source_etag: Optional[str] = None, level: int = 9) -> bytes:
+    """Serializa as entradas de um mês (em qualquer ordem) no formato ``.colz``."""
+    keyed = []
+    for entry in entries:
+        micros, raw = _ts_micros(entry.get('ts'))
+        keyed.append((micros, raw, entry))
+    keyed.sort(key=lambda item: item[0])
+
+    dictionaries: Dict[str, List] = {field: [] for field in DICTIONARY_FIELDS}
+    codes_by_value: Dict[str, Dict[str, int]] = {field: {} for field in DICTIONARY_FIELDS}
+    codes: Dict[str, List[int]] = {field: [] for field in DICTIONARY_FIELDS}
+    ts_deltas = array('q')
+    ts_raw: Dict[str, object] = {}
+    ts_missing: List[int] = []
+    rest_lines: List[str] = []
+
+    previous = 0
+    for row, (micros, raw, entry) in enumerate(keyed):
+        rest = {}
+        for key, value in entry.items():
+            if key in codes:
+                # Valores de tipos diferentes (1 e "1") não podem dividir o mesmo código
+                token = json.dumps(value, sort_keys=True)
+                code = codes_by_value[key].get(token)
+                if code is None:
+                    dictionaries[key].append(value)
+                    code = codes_by_value[key][token] = len(dictionaries[key])
+                codes[key].append(code)
+            elif key != 'ts':
+                rest[key] = value
+        for field in DICTIONARY_FIELDS:
+            if field not in entry:
+                codes[field].append(0)
+        if 'ts' not in entry:
+            ts_missing.append(row)
+        elif raw is not None or not isinstance(entry['ts'], str):
+            ts_raw[str(row)] = raw
+        ts_deltas.append(micros - previous)
+        previous = micros
+        rest_lines.append(json.dumps(rest, ensure_ascii=False, separators=(',', ':')))
+
+    sections = []
+    payloads = []
+    for field in DICTIONARY_FIELDS:
+        typecode = 'H' if len(dictionaries[field]) < 0xFFFF else 'I'
+        payloads.append(_to_bytes(array(typecode, codes[field])))
+        sections.append([field, typecode, len(payloads[-1])])
+    payloads.append(_to_bytes(ts_deltas))
+    sections.append(['ts', 'q', len(payloads[-1])])
+    payloads.append('\n'.join(rest_lines).encode('utf-8'))
+    sections.append(['rest', 'json', len(payloads[-1])])
+
+    header = json.dumps(
+        {
+            'version': ARCHIVE_VERSION,
+            'month': month,
+            'count': len(keyed),
+            'source_etag': source_etag,
+            'dictionaries': dictionaries,
+            'ts_raw': ts_raw,
+            'ts_missing': ts_missing,
+            'sections': sections,
+        },
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode('utf-8')
+    body = struct.pack('<I', len(header)) + header + b''.join(payloads)
+    return MAGIC + zlib.compress(body, level)
+
+
+def is_archive(data: bytes) -> bool:
+    return data[:len(MAGIC)] == MAGIC
+
+
+class AuditArchive:
+    """Mês arquivado já descompactado; as linhas são montadas sob demanda."""
+
+    def __init__(self, data: bytes):
+        if not is_archive(data):
+            raise ValueError("Arquivo de auditoria em formato desconhecido")
+        body = zlib.decompress(data[len(MAGIC):])
+        (header_size,) = struct.unpack_from('<I', body)
+        header = json.loads(body[4:4 + header_size])
+        if header.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Versão de arquivo de auditoria não suportada: {header.get('version')}")
+
+        self.month: str = header['month']
+        self.count: int = header['count']
+        self.source_etag: Optional[str] = header.get('source_etag')
+        self.dictionaries: Dict[str, List] = header['dictionaries']
+        self._ts_raw: Dict[str, object] = header['ts_raw']
+        self._ts_missing = set(header['ts_missing'])
+
+        sections: Dict[str, object] = {}
+        position = 4 + header_size
+        for name, typecode, size in header['sections']:
+            chunk = body[position:position + size]
+            position += size
+            sections[name] = chunk if typecode == 'json' else _from_bytes(typecode, chunk)
+        self._codes = {field: sections[field] for field in DICTIONARY_FIELDS}
+        self._micros = list(accumulate(sections['ts']))
+        self._rest = sections['rest'].decode('utf-8').split('\n') if self.count else []
+
+    def __len__(self) -> int:
+        return self.count
+
+    def entry(self, row: int) -> Dict:
+        entry = json.loads(self._rest[row])
+        for field in DICTIONARY_FIELDS:
+            code = self._codes[field][row]
+            if code:
+                entry[field] = self.dictionaries[field][code - 1]
+        key = str(row)
+        if key in self._ts_raw:
+            entry['ts'] = self._ts_raw[key]
+        elif row not in self._ts_missing:
+            entry['ts'] = _ts_text(self._micros[row])
+        return entry
+
+    def rows_between(self, first_day: str, last_day: str) -> range:
+        """Linhas cujo ``ts`` cai entre os dias ``first_day`` e ``last_day`` (inclusive)."""
+        try:
+            start = (datetime.strptime(first_day, '%Y-%m-%d') - _EPOCH) // timedelta(microseconds=1)
+            end = (datetime.strptime(last_day, '%Y-%m-%d') + timedelta(days=1) - _EPOCH) // timedelta(microseconds=1)
+        except ValueError:
+            return range(0)
+        return range(bisect.bisect_left(self._micros, start), bisect.bisect_left(self._micros, end))
+
+    def entries(self, first_day: Optional[str] = None, last_day: Optional[str] = None) -> List[Dict]:
+        """Entradas do intervalo de dias (ou todas), da mais antiga para a mais recente."""
+        rows = range(self.count) if first_day is None else self.rows_between(first_day, last_day)
+        return [self.entry(row) for row in rows]
@@ -0,0 +1,128 @@
+"""Exportação CSV da auditoria em streaming (gerador de chunks + gzip opcional)."""
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, Iterator, Optional
+
+CSV_HEADERS = ['Data/Hora', 'Ação', 'Escola ID', 'Escola', 'Usuário', 'Detalhes']
+
+# Tamanho alvo de cada chunk emitido pelo gerador CSV
+CHUNK_SIZE = 64 * 1024
+
+# Acima disso a exportação vai para o Blob Storage e a resposta traz um link
+INLINE_LIMIT_BYTES = int(os.environ.get('AUDIT_EXPORT_INLINE_LIMIT_BYTES', str(8 * 1024 * 1024)))
+
+
+class AuditExportTooLarge(Exception):
+    """Exportação acima do limite inline sem Blob Storage para recebê-la."""
+
+
+@dataclass
+class AuditExport:
+    """Resultado da exportação: corpo inline ou link para o blob gerado."""
+    body: Optional[bytes] = None
+    download_url: Optional[str] = None
+    blob_name: Optional[str] = None
+
+
+def iter_audit_csv(logs: Iterable[Dict], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Converte logs em CSV (UTF-8) emitindo blocos de ~chunk_size bytes."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    wrote_header = False
+
+    for log in logs:
+        if not wrote_header:
+            writer.writerow(CSV_HEADERS)
+            wrote_header = True
+        writer.writerow([
+            log.get('ts', ''),
+            log.get('action', ''),
+            log.get('school_id', ''),
+            log.get('school_name', ''),
+            log.get('actor', ''),
+            json.dumps(log.get('payload', {}), ensure_ascii=False),
+        ])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Comprime um fluxo de chunks em formato gzip sem juntar o conteúdo."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def build_audit_export(
+    logs: Iterable[Dict],
+    compress: bool = False,
+    inline_limit: int = INLINE_LIMIT_BYTES,
+) -> AuditExport:
+    """Gera a exportação mantendo no máximo ``inline_limit`` bytes em memória.
+
+    Enquanto couber no limite, o corpo é devolvido inline; ao ultrapassá-lo, os
+    chunks já gerados e os restantes são enviados em blocos para o Blob Storage.
+    Sem Blob Storage levanta ``AuditExportTooLarge`` em vez de montar o arquivo
+    inteiro em memória (a resposta HTTP das Functions não é transmitida em partes).
+    """
+    chunks = iter_audit_csv(logs)
+    if compress:
+        chunks = gzip_chunks(chunks)
+
+    buffered = []
+    size = 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        size += len(chunk)
+        if size > inline_limit:
+            staged = _stage_to_blob(chain(buffered, chunks), compress)
+            if staged:
+                return staged
+            for source in (chunks, logs):
+                close = getattr(source, 'close', None)
+                if close:
+                    close()  # encerra os geradores e libera o cursor do banco
+            logging.warning('Blob Storage indisponível; exportação de auditoria acima do limite inline recusada')
+            raise AuditExportTooLarge(
+                f"Exportação maior que {inline_limit // (1024 * 1024) or 1} MB e o Blob Storage não está "
+                "configurado; reduza o período ou use filtros"
+            )
+
+    return AuditExport(body=b''.join(buffered))
+
+
+def _stage_to_blob(chunks: Iterator[bytes], compress: bool) -> Optional[AuditExport]:
+    # Import tardio: blob.py depende de pandas/azure-storage, que só são
+    # necessários quando a exportação passa do limite inline.
+    try:
+        from .blob import blob_service
+    except ImportError:
+        return None
+    if not blob_service.blob_service_client:
+        return None
+
+    suffix = '.csv.gz' if compress else '.csv'
+    blob_name = f"exports/auditoria-{datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')}{suffix}"
+    blob_service.upload_chunks(
+        blob_name,
+        chunks,
+        content_type='text/csv; charset=utf-8',
+        content_encoding='gzip' if compress else None,
+        content_disposition='attachment; filename=auditoria.csv',
+    )
+    return AuditExport(download_url=blob_service.get_download_url(blob_name), blob_name=blob_name)
@@ -0,0 +1,526 @@
+"""Gravação da auditoria mensal (``audits/audit-YYYY-MM.jsonl``) em append blobs.
+
+Cada entrada vira uma linha JSON acumulada em memória; o lote é enviado com
+``append_block`` quando chega a ``AUDIT_BATCH_SIZE`` entradas ou quando se
+passam ``AUDIT_FLUSH_INTERVAL_MS`` desde a primeira entrada pendente. O custo
+de uma gravação não depende mais do tamanho do mês e, como cada bloco é
+acrescentado de forma atômica pelo serviço, escritores concorrentes (threads
+ou workers) não perdem linhas.
+
+Um mês ainda no formato antigo (block blob) é convertido na primeira gravação
+sem que o conteúdo exista só na memória do processo: os bytes são copiados
+antes para ``audits/audit-YYYY-MM.legacy-<etag>``; só então o JSONL é
+recriado como append blob vazio, condicionado ao ETag copiado, com os
+metadados apontando para a cópia. A troca é essa única operação: leitores e
+a compactação leem a cópia antes do JSONL, então o mês nunca aparece vazio e
+as linhas novas ficam depois do conteúdo antigo.
+
+Na leitura, cada mês tem um índice lateral ``audits/audit-YYYY-MM.idx.json``
+com o intervalo de bytes e a contagem de linhas de cada dia. Como o append
+blob só cresce, o índice é estendido baixando apenas os bytes novos, e uma
+consulta por dias baixa só os trechos desses dias. A ordem de gravação não é
+a de ``ts`` (lotes de workers diferentes se intercalam e lotes que falharam
+voltam depois), então cada mês é ordenado por ``ts``; os meses são lidos em
+paralelo e intercalados com ``heapq.merge``.
+
+Meses fechados são compactados por ``compact_audit_month`` no formato
+colunar de ``audit_archive`` (``audits/audit-YYYY-MM.colz``); a leitura junta
+o arquivo compactado e o JSONL que eventualmente ainda exista para o mês.
+"""
+import hashlib
+import heapq
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+
+from .audit_archive import AuditArchive, encode_archive
+
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '20'))
+AUDIT_FLUSH_INTERVAL_MS = int(os.environ.get('AUDIT_FLUSH_INTERVAL_MS', '1000'))
+# Limite de linhas retidas em memória quando o Blob está indisponível
+AUDIT_MAX_PENDING = int(os.environ.get('AUDIT_MAX_PENDING', '5000'))
+
+AUDIT_READ_WORKERS = int(os.environ.get('AUDIT_READ_WORKERS', '8'))
+
+# Tamanho máximo de um append_block aceito por todas as versões da API
+APPEND_BLOCK_SIZE = 4 * 1024 * 1024
+# Trechos separados por menos que isso são baixados num único GET
+RANGE_MERGE_GAP = 64 * 1024
+
+AUDIT_INDEX_VERSION = 1
+
+# Metadado do append blob convertido com o nome da cópia do conteúdo antigo
+LEGACY_METADATA_KEY = 'legacyblob'
+
+# Um mês só é compactado depois deste tempo do início do mês seguinte
+# (lotes atrasados de outros workers ainda podem estar chegando)
+COMPACTION_GRACE = timedelta(hours=1)
+
+
+def audit_blob_name(ts: datetime) -> str:
+    return f"audits/audit-{ts.strftime('%Y-%m')}.jsonl"
+
+
+def audit_index_name(blob_name: str) -> str:
+    return blob_name[:-len('.jsonl')] + '.idx.json'
+
+
+def audit_archive_name(blob_name: str) -> str:
+    return blob_name[:-len('.jsonl')] + '.colz'
+
+
+def audit_legacy_name(blob_name: str, etag: str) -> str:
+    """Cópia do block blob antigo; o ETag no nome faz cada versão ter a sua."""
+    return blob_name[:-len('.jsonl')] + f".legacy-{hashlib.sha1(etag.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _legacy_blob(properties) -> Optional[str]:
+    """Cópia do formato antigo que precede o append blob, segundo os metadados."""
+    return (getattr(properties, 'metadata', None) or {}).get(LEGACY_METADATA_KEY)
+
+
+def _next_month(blob_name: str) -> datetime:
+    month = datetime.strptime(blob_name[-len('YYYY-MM.jsonl'):-len('.jsonl')], '%Y-%m')
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def month_blob_names(start_date: str, end_date: str) -> List[str]:
+    """Blobs mensais de ``start_date`` a ``end_date`` (datas ``YYYY-MM-DD``)."""
+    current = datetime.strptime(start_date[:7], '%Y-%m')
+    last = datetime.strptime(end_date[:7], '%Y-%m')
+    names = []
+    while current <= last:
+        names.append(audit_blob_name(current))
+        if current.month == 12:
+            current = current.replace(year=current.year + 1, month=1)
+        else:
+            current = current.replace(month=current.month + 1)
+    return names
+
+
+def _blocks(lines: Iterable[bytes], block_size: int = APPEND_BLOCK_SIZE) -> Iterable[bytes]:
+    """Agrupa linhas em blocos de até ``block_size`` bytes sem cortar nenhuma linha."""
+    block = bytearray()
+    for line in lines:
+        if block and len(block) + len(line) > block_size:
+            yield bytes(block)
+            block.clear()
+        block.extend(line)
+    if block:
+        yield bytes(block)
+
+
+def append_lines(get_blob_client, blob_name: str, lines: List[bytes]) -> None:
+    """Acrescenta linhas ao append blob, criando-o (ou convertendo o block blob legado) se preciso."""
+    blob_client = get_blob_client(blob_name)
+    for block in _blocks(lines):
+        for attempt in range(3):
+            try:
+                blob_client.append_block(block)
+                break
+            except ResourceNotFoundError:
+                try:
+                    # IfMissing: quem chegar depois não zera o blob criado por outro escritor
+                    blob_client.create_append_blob(match_condition=MatchConditions.IfMissing)
+                except (ResourceExistsError, ResourceModifiedError):
+                    pass
+            except ResourceExistsError as exc:
+                if getattr(exc, 'error_code', None) != 'InvalidBlobType':
+                    raise
+                _convert_to_append_blob(get_blob_client, blob_name)
+        else:
+            raise RuntimeError(f"Não foi possível gravar em {blob_name}")
+
+
+def _convert_to_append_blob(get_blob_client, blob_name: str) -> None:
+    """Troca o block blob do formato antigo por um append blob que referencia uma cópia dele.
+
+    A cópia é gravada antes; a recriação é condicionada ao ETag copiado, então
+    se outro escritor converteu antes (ou o blob mudou) ela falha, a cópia que
+    ficou sem referência é apagada e a gravação segue no blob que existir.
+    """
+    blob_client = get_blob_client(blob_name)
+    download = blob_client.download_blob()
+    if download.properties.blob_type != 'BlockBlob':
+        return
+    etag = download.properties.etag
+    legacy_name = audit_legacy_name(blob_name, etag)
+    legacy_client = get_blob_client(legacy_name)
+    legacy_client.upload_blob(download.readall(), overwrite=True)
+    try:
+        blob_client.create_append_blob(
+            metadata={LEGACY_METADATA_KEY: legacy_name}, etag=etag, match_condition=MatchConditions.IfNotModified
+        )
+    except (ResourceModifiedError, ResourceNotFoundError):
+        try:
+            referenced = _legacy_blob(blob_client.get_blob_properties())
+        except ResourceNotFoundError:
+            referenced = None
+        if referenced != legacy_name:
+            try:
+                legacy_client.delete_blob()
+            except ResourceNotFoundError:
+                pass
+        return
+    logging.info(f"Auditoria {blob_name} convertida para append blob (conteúdo anterior em {legacy_name})")
+
+
+class AuditLogWriter:
+    """Fila em memória de linhas de auditoria, gravada em lotes por mês."""
+
+    def __init__(
+        self,
+        get_blob_client: Callable[[str], object],
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval_ms: int = AUDIT_FLUSH_INTERVAL_MS,
+        max_pending: int = AUDIT_MAX_PENDING,
+    ):
+        self._get_blob_client = get_blob_client
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0, flush_interval_ms) / 1000
+        self.max_pending = max(self.batch_size, max_pending)
+        self._pending: List[Tuple[str, bytes]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def append(self, log_entry: Dict) -> None:
+        """Carimba ``ts`` e enfileira a entrada; grava na hora se o lote encheu."""
+        now = datetime.utcnow()
+        log_entry['ts'] = now.isoformat()
+        line = (json.dumps(log_entry, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            self._pending.append((audit_blob_name(now), line))
+            full = len(self._pending) >= self.batch_size or not self.flush_interval
+            if not full:
+                self._schedule()
+        if full:
+            self.flush()
+
+    def _schedule(self) -> None:
+        # Chamado com self._lock: um único timer por lote pendente
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Grava tudo o que está pendente; devolve o número de entradas gravadas."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not batch:
+                return 0
+
+            by_blob: Dict[str, List[bytes]] = {}
+            for blob_name, line in batch:
+                by_blob.setdefault(blob_name, []).append(line)
+
+            written = 0
+            failed: List[Tuple[str, bytes]] = []
+            for blob_name, lines in by_blob.items():
+                try:
+                    append_lines(self._get_blob_client, blob_name, lines)
+                    written += len(lines)
+                except Exception as e:
+                    logging.error(f"Erro ao gravar auditoria em {blob_name}: {str(e)}")
+                    failed.extend((blob_name, line) for line in lines)
+
+            if failed:
+                self._requeue(failed)
+            return written
+
+    def _requeue(self, failed: List[Tuple[str, bytes]]) -> None:
+        """Devolve as linhas que falharam à frente da fila e agenda nova tentativa."""
+        with self._lock:
+            self._pending[:0] = failed
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                logging.error(f"Fila de auditoria cheia; {overflow} entradas mais antigas descartadas")
+                del self._pending[:overflow]
+            if self.flush_interval:
+                self._schedule()
+
+
+def _line_day(line: bytes) -> str:
+    try:
+        return str(json.loads(line).get('ts', ''))[:10]
+    except (ValueError, AttributeError):
+        return ''
+
+
+class AuditMonthIndex:
+    """Para cada dia: [primeiro byte, fim do último byte, linhas] no blob mensal.
+
+    Linhas de um mesmo dia podem se intercalar com as do dia vizinho (lotes de
+    workers diferentes perto da meia-noite); os intervalos então se sobrepõem,
+    e quem lê ainda filtra cada linha pelo ``ts``.
+    """
+
+    def __init__(self, blob_type: str, size: int = 0, days: Optional[Dict[str, List[int]]] = None):
+        self.blob_type = blob_type
+        self.size = size
+        self.days: Dict[str, List[int]] = days or {}
+
+    @classmethod
+    def from_json(cls, data: bytes) -> Optional['AuditMonthIndex']:
+        try:
+            raw = json.loads(data)
+        except ValueError:
+            return None
+        if raw.get('version') != AUDIT_INDEX_VERSION:
+            return None
+        return cls(raw['blob_type'], raw['size'], raw['days'])
+
+    def to_json(self) -> bytes:
+        return json.dumps(
+            {'version': AUDIT_INDEX_VERSION, 'blob_type': self.blob_type, 'size': self.size, 'days': self.days},
+            sort_keys=True,
+        ).encode('utf-8')
+
+    def extend(self, data: bytes) -> None:
+        """Indexa as linhas completas de ``data``, que começa no byte ``self.size`` do blob."""
+        offset = self.size
+        end = data.rfind(b'\n') + 1
+        position = 0
+        while position < end:
+            line_end = data.index(b'\n', position) + 1
+            line = data[position:line_end]
+            if line.strip():
+                day = _line_day(line)
+                entry = self.days.get(day)
+                if entry is None:
+                    self.days[day] = [offset + position, offset + line_end, 1]
+                else:
+                    entry[1] = offset + line_end
+                    entry[2] += 1
+            position = line_end
+        self.size = offset + end
+
+    def ranges(self, first_day: str, last_day: str) -> List[Tuple[int, int]]:
+        """Intervalos de bytes (já unidos) que cobrem as linhas de ``first_day`` a ``last_day``."""
+        spans = sorted((start, end) for day, (start, end, _) in self.days.items() if first_day <= day <= last_day)
+        merged: List[List[int]] = []
+        for start, end in spans:
+            if merged and start <= merged[-1][1] + RANGE_MERGE_GAP:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return [(start, end) for start, end in merged]
+
+    def count(self, first_day: str, last_day: str) -> int:
+        return sum(entry[2] for day, entry in self.days.items() if first_day <= day <= last_day)
+
+
+def _load_index(get_blob_client, blob_name: str, blob_type: str, size: int) -> AuditMonthIndex:
+    try:
+        index = AuditMonthIndex.from_json(get_blob_client(audit_index_name(blob_name)).download_blob().readall())
+    except ResourceNotFoundError:
+        index = None
+    # Índice de outra encarnação do blob (conversão do formato antigo, recriação): refaz
+    if index is None or index.blob_type != blob_type or index.size > size:
+        index = AuditMonthIndex(blob_type)
+    return index
+
+
+def _read_jsonl_month(
+    get_blob_client, blob_name: str, first_day: str, last_day: str, absorbed_etag: Optional[str] = None
+) -> List[Dict]:
+    """Entradas do JSONL mensal, baixando só os bytes não indexados e os trechos dos dias pedidos.
+
+    O índice atualizado é regravado (melhor esforço). Um JSONL cujo ETag é o
+    ``absorbed_etag`` do arquivo compactado já está todo nele e é ignorado.
+    Um mês convertido do formato antigo começa pelas linhas da cópia legada.
+    """
+    blob_client = get_blob_client(blob_name)
+    try:
+        properties = blob_client.get_blob_properties()
+    except ResourceNotFoundError:
+        return []
+    if absorbed_etag is not None and properties.etag == absorbed_etag:
+        return []
+
+    entries = []
+    legacy_name = _legacy_blob(properties)
+    if legacy_name:
+        legacy = get_blob_client(legacy_name).download_blob().readall()
+        entries.extend(_entries_between(legacy, first_day, last_day))
+
+    index = _load_index(get_blob_client, blob_name, properties.blob_type, properties.size)
+    tail_start = index.size
+    tail = b''
+    if tail_start < properties.size:
+        tail = blob_client.download_blob(offset=tail_start, length=properties.size - tail_start).readall()
+        index.extend(tail)
+        try:
+            get_blob_client(audit_index_name(blob_name)).upload_blob(index.to_json(), overwrite=True)
+        except Exception as e:
+            logging.warning(f"Não foi possível gravar o índice de {blob_name}: {str(e)}")
+
+    for start, end in index.ranges(first_day, last_day):
+        # O que já veio no download do final do blob não é baixado de novo
+        chunk = tail[max(start, tail_start) - tail_start:end - tail_start] if end > tail_start else b''
+        if start < tail_start:
+            head_end = min(end, tail_start)
+            chunk = blob_client.download_blob(offset=start, length=head_end - start).readall() + chunk
+        entries.extend(_entries_between(chunk, first_day, last_day))
+    return entries
+
+
+def _entries_between(data: bytes, first_day: str, last_day: str) -> Iterator[Dict]:
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if first_day <= entry.get('ts', '')[:10] <= last_day:
+            yield entry
+
+
+def _read_archive(get_blob_client, blob_name: str) -> Optional[AuditArchive]:
+    try:
+        return AuditArchive(get_blob_client(audit_archive_name(blob_name)).download_blob().readall())
+    except ResourceNotFoundError:
+        return None
+
+
+def read_audit_month(
+    get_blob_client, blob_name: str, first_day: str, last_day: str, now: Optional[datetime] = None
+) -> List[Dict]:
+    """Entradas de ``first_day`` a ``last_day`` de um mês, da mais recente para a mais antiga.
+
+    Meses anteriores ao atual podem estar compactados; o JSONL do mês é lido
+    também, já que lotes atrasados podem recriá-lo depois da compactação.
+    Empates de ``ts`` mantêm a ordem dos arquivos, que o ``.colz`` preserva,
+    então o resultado é o mesmo antes e depois da compactação.
+    """
+    now = now or datetime.utcnow()
+    archive = _read_archive(get_blob_client, blob_name) if _next_month(blob_name) <= now else None
+    entries = archive.entries(first_day, last_day) if archive is not None else []
+    entries.extend(
+        _read_jsonl_month(
+            get_blob_client, blob_name, first_day, last_day, archive.source_etag if archive is not None else None
+        )
+    )
+    entries.sort(key=_entry_ts, reverse=True)
+    return entries
+
+
+def _entry_ts(entry: Dict) -> str:
+    ts = entry.get('ts')
+    return ts if isinstance(ts, str) else ''
+
+
+def read_audit_range(
+    get_blob_client,
+    start_date: str,
+    end_date: str,
+    workers: int = AUDIT_READ_WORKERS,
+) -> Iterator[Dict]:
+    """Entradas de ``start_date`` a ``end_date`` (inclusive), da mais recente para a mais antiga.
+
+    Os meses são baixados em paralelo; um mês que falha é registrado e ignorado.
+    """
+    first_day, last_day = start_date[:10], end_date[:10]
+    blob_names = month_blob_names(start_date, end_date)
+
+    now = datetime.utcnow()
+
+    def read(blob_name: str) -> List[Dict]:
+        try:
+            return read_audit_month(get_blob_client, blob_name, first_day, last_day, now)
+        except Exception as e:
+            logging.error(f"Erro ao ler auditoria {blob_name}: {str(e)}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(blob_names)))) as pool:
+        months = list(pool.map(read, blob_names))
+    return heapq.merge(*months, key=_entry_ts, reverse=True)
+
+
+def compact_audit_month(get_blob_client, blob_name: str) -> int:
+    """Move o JSONL de um mês fechado para o arquivo ``.colz``; devolve as entradas arquivadas.
+
+    Um arquivo anterior do mesmo mês é mesclado ao novo. O JSONL só é apagado
+    se não mudou desde o download (ETag); se mudou, o arquivo anterior é
+    restaurado e nada se perde — a compactação fica para a próxima execução.
+    """
+    source = get_blob_client(blob_name)
+    try:
+        download = source.download_blob()
+    except ResourceNotFoundError:
+        return 0
+    content = download.readall()
+    etag = download.properties.etag
+    legacy_name = _legacy_blob(download.properties)
+
+    archive_client = get_blob_client(audit_archive_name(blob_name))
+    try:
+        previous = archive_client.download_blob().readall()
+    except ResourceNotFoundError:
+        previous = None
+    archived = AuditArchive(previous) if previous is not None else None
+
+    if archived is not None and archived.source_etag == etag:
+        # Execução anterior interrompida entre gravar o arquivo e apagar o JSONL
+        entries_count = len(archived)
+    else:
+        entries = archived.entries() if archived is not None else []
+        if legacy_name:
+            content = get_blob_client(legacy_name).download_blob().readall() + content
+        entries.extend(json.loads(line) for line in content.splitlines() if line.strip())
+        month = blob_name[-len('YYYY-MM.jsonl'):-len('.jsonl')]
+        archive_client.upload_blob(encode_archive(entries, month, source_etag=etag), overwrite=True)
+        entries_count = len(entries)
+
+    try:
+        source.delete_blob(etag=etag, match_condition=MatchConditions.IfNotModified)
+    except ResourceModifiedError:
+        if previous is not None:
+            archive_client.upload_blob(previous, overwrite=True)
+        else:
+            archive_client.delete_blob()
+        logging.warning(f"Auditoria {blob_name} mudou durante a compactação; mantida em JSONL")
+        return 0
+    # Sem o JSONL ninguém mais referencia a cópia legada nem o índice
+    for leftover in filter(None, (legacy_name, audit_index_name(blob_name))):
+        try:
+            get_blob_client(leftover).delete_blob()
+        except ResourceNotFoundError:
+            pass
+    logging.info(f"Auditoria {blob_name}: {entries_count} entradas compactadas")
+    return entries_count
+
+
+def compact_closed_months(list_blobs, get_blob_client, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Compacta todos os JSONL de meses fechados há mais de ``COMPACTION_GRACE``."""
+    now = now or datetime.utcnow()
+    results = {}
+    for blob in list_blobs(name_starts_with='audits/audit-'):
+        name = blob.name
+        if not name.endswith('.jsonl'):
+            continue
+        try:
+            closed = _next_month(name) + COMPACTION_GRACE <= now
+        except ValueError:
+            continue
+        if closed:
+            results[name] = compact_audit_month(get_blob_client, name)
+    return results
@@ -1,54 +1,103 @@
 # Blob Storage utilities for CSV/JSON data persistence
 import os
 import json
+import atexit
+import uuid
+import base64
+import threading
 import pandas as pd
-from io import StringIO, BytesIO
-from datetime import datetime
-from typing import Dict, List, Optional, Any
-from azure.storage.blob import BlobServiceClient, BlobClient
+from collections import OrderedDict
+from io import StringIO
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Any
+from azure.storage.blob import (
+    BlobBlock,
+    BlobClient,
+    BlobSasPermissions,
+    BlobServiceClient,
+    ContentSettings,
+    generate_blob_sas,
+)
+
+from .audit_log import AuditLogWriter, compact_closed_months, read_audit_range
+from .blob_cache import BlobReadCache
+from .local_blob import LocalBlobContainer
+from .workbook_cache import read_workbook
 
 # Environment variables
 BLOB_CONNECTION_STRING = os.environ.get('BLOB_CONNECTION_STRING', '')
+# Sem connection string, uma pasta local faz o papel do Blob (desenvolvimento/testes);
+# para o Azurite use BLOB_CONNECTION_STRING=UseDevelopmentStorage=true
+BLOB_LOCAL_DIR = os.environ.get('BLOB_LOCAL_DIR', '')
 CONTAINER_NAME = 'data'
 
+# Blocos enviados por upload_chunks (o Blob aceita até 50.000 blocos por blob)
+UPLOAD_BLOCK_SIZE = 4 * 1024 * 1024
+DOWNLOAD_URL_EXPIRY_HOURS = 1
+# BlobClients reaproveitados (todos compartilham o pipeline HTTP do serviço)
+BLOB_CLIENT_POOL_SIZE = 64
+
+
+def _parse_excel(data: bytes) -> pd.DataFrame:
+    return read_workbook(data, normalize=False)
+
+
+def _csv_parser(encoding: str, delimiter: str):
+    def parse(data: bytes) -> pd.DataFrame:
+        return pd.read_csv(StringIO(data.decode(encoding)), delimiter=delimiter)
+    return parse
+
+
+def _raw(data: bytes) -> bytes:
+    return data
+
 class BlobStorageService:
-    def __init__(self):
-        self.blob_service_client = BlobServiceClient.from_connection_string(BLOB_CONNECTION_STRING) if BLOB_CONNECTION_STRING else None
+    def __init__(self, connection_string: str = BLOB_CONNECTION_STRING, local_dir: str = BLOB_LOCAL_DIR):
+        self.blob_service_client = BlobServiceClient.from_connection_string(connection_string) if connection_string else None
+        if self.blob_service_client:
+            self.container_client = self.blob_service_client.get_container_client(CONTAINER_NAME)
+        elif local_dir:
+            self.container_client = LocalBlobContainer(os.path.join(local_dir, CONTAINER_NAME))
+        else:
+            self.container_client = None
+        self.audit_writer = AuditLogWriter(self._get_blob_client)
+        self.read_cache = BlobReadCache()
+        self._blob_clients: 'OrderedDict[str, BlobClient]' = OrderedDict()
+        self._clients_lock = threading.Lock()
     
     def _get_blob_client(self, blob_name: str) -> BlobClient:
-        """Get blob client for a specific blob"""
-        if not self.blob_service_client:
+        """Get blob client for a specific blob (pooled)"""
+        if not self.container_client:
             raise Exception("Blob connection not configured")
-        return self.blob_service_client.get_blob_client(container=CONTAINER_NAME, blob=blob_name)
+        with self._clients_lock:
+            client = self._blob_clients.get(blob_name)
+            if client is None:
+                client = self._blob_clients[blob_name] = self.container_client.get_blob_client(blob_name)
+                if len(self._blob_clients) > BLOB_CLIENT_POOL_SIZE:
+                    self._blob_clients.popitem(last=False)
+            else:
+                self._blob_clients.move_to_end(blob_name)
+            return client
     
     def read_excel_file(self, blob_name: str) -> pd.DataFrame:
-        """Read Excel file from blob storage"""
+        """Read Excel file from blob storage (parsed once per ETag)"""
         try:
             blob_client = self._get_blob_client(blob_name)
-            blob_data = blob_client.download_blob().readall()
-            
-            # Read Excel file from bytes
-            excel_file = BytesIO(blob_data)
-            df = pd.read_excel(excel_file, engine='openpyxl')
-            return df
+            return self.read_cache.read(blob_client, _parse_excel, kind='excel').copy()
             
         except Exception as e:
             # Fallback to local file for development
             local_path = f"local_data/{blob_name.replace('.xlsx', '_oficial.xlsx')}"
             if os.path.exists(local_path):
-                return pd.read_excel(local_path)
+                return read_workbook(local_path, normalize=False)
             raise Exception(f"Erro ao ler arquivo {blob_name}: {str(e)}")
     
     def read_csv_file(self, blob_name: str, encoding='latin-1', delimiter=';') -> pd.DataFrame:
-        """Read CSV file from blob storage"""
+        """Read CSV file from blob storage (parsed once per ETag)"""
         try:
             blob_client = self._get_blob_client(blob_name)
-            blob_data = blob_client.download_blob().readall()
-            
-            # Read CSV from bytes
-            csv_content = blob_data.decode(encoding)
-            df = pd.read_csv(StringIO(csv_content), delimiter=delimiter)
-            return df
+            parse = _csv_parser(encoding, delimiter)
+            return self.read_cache.read(blob_client, parse, kind=('csv', encoding, delimiter)).copy()
             
         except Exception as e:
             # Fallback to local file for development
@@ -58,10 +107,10 @@ class BlobStorageService:
             raise Exception(f"Erro ao ler arquivo {blob_name}: {str(e)}")
     
     def read_json_file(self, blob_name: str) -> Dict:
-        """Read JSON file from blob storage"""
+        """Read JSON file from blob storage (downloaded only when the ETag changes)"""
         try:
             blob_client = self._get_blob_client(blob_name)
-            blob_data = blob_client.download_blob().readall()
+            blob_data = self.read_cache.read(blob_client, _raw)
             return json.loads(blob_data.decode('utf-8'))
             
         except Exception as e:
@@ -76,43 +125,79 @@ class BlobStorageService:
             blob_client = self._get_blob_client(blob_name)
             json_data = json.dumps(data, ensure_ascii=False, indent=2)
             blob_client.upload_blob(json_data.encode('utf-8'), overwrite=True)
+            self.read_cache.discard(blob_name)
             
         except Exception as e:
             raise Exception(f"Erro ao escrever JSON {blob_name}: {str(e)}")
     
+    def upload_chunks(
+        self,
+        blob_name: str,
+        chunks: Iterable[bytes],
+        content_type: str = 'application/octet-stream',
+        content_encoding: Optional[str] = None,
+        content_disposition: Optional[str] = None,
+    ) -> int:
+        """Upload a stream of chunks as staged blocks, holding one block in memory"""
+        blob_client = self._get_blob_client(blob_name)
+        block_ids = []
+        pending = bytearray()
+        total = 0
+
+        def stage(data: bytes):
+            block_id = base64.b64encode(uuid.uuid4().hex.encode('ascii')).decode('ascii')
+            blob_client.stage_block(block_id=block_id, data=data)
+            block_ids.append(BlobBlock(block_id=block_id))
+
+        for chunk in chunks:
+            pending.extend(chunk)
+            total += len(chunk)
+            if len(pending) >= UPLOAD_BLOCK_SIZE:
+                stage(bytes(pending))
+                pending.clear()
+        if pending or not block_ids:
+            stage(bytes(pending))
+
+        blob_client.commit_block_list(
+            block_ids,
+            content_settings=ContentSettings(
+                content_type=content_type,
+                content_encoding=content_encoding,
+                content_disposition=content_disposition,
+            ),
+        )
+        return total
+
+    def get_download_url(self, blob_name: str, expiry_hours: int = DOWNLOAD_URL_EXPIRY_HOURS) -> str:
+        """Read-only SAS URL for a blob"""
+        blob_client = self._get_blob_client(blob_name)
+        sas = generate_blob_sas(
+            account_name=blob_client.account_name,
+            container_name=CONTAINER_NAME,
+            blob_name=blob_name,
+            account_key=self.blob_service_client.credential.account_key,
+            permission=BlobSasPermissions(read=True),
+            expiry=datetime.utcnow() + timedelta(hours=expiry_hours),
+        )
+        return f"{blob_client.url}?{sas}"
+
     def append_audit_log(self, log_entry: Dict):
-        """Append audit log entry to monthly JSONL file"""
+        """Queue audit log entry for the monthly append blob (audits/audit-YYYY-MM.jsonl)"""
         try:
-            # Format: audits/audit-YYYY-MM.jsonl
-            now = datetime.utcnow()
-            blob_name = f"audits/audit-{now.strftime('%Y-%m')}.jsonl"
-            
-            # Prepare log entry
-            log_entry['ts'] = now.isoformat()
-            log_line = json.dumps(log_entry, ensure_ascii=False) + '\n'
-            
-            # Try to get existing content
-            existing_content = ""
-            try:
-                blob_client = self._get_blob_client(blob_name)
-                existing_content = blob_client.download_blob().readall().decode('utf-8')
-            except:
-                pass  # File doesn't exist yet
-            
-            # Append new line
-            new_content = existing_content + log_line
-            
-            # Upload updated content
-            blob_client = self._get_blob_client(blob_name)
-            blob_client.upload_blob(new_content.encode('utf-8'), overwrite=True)
-            
+            if not self.container_client:
+                raise Exception("Blob connection not configured")
+            self.audit_writer.append(log_entry)
         except Exception as e:
             print(f"Erro ao gravar auditoria: {str(e)}")  # Log but don't fail
+
+    def flush_audit_log(self) -> int:
+        """Write pending audit entries now"""
+        return self.audit_writer.flush()
     
     def read_audit_logs(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
-        """Read audit logs from JSONL files"""
+        """Read audit logs from the monthly JSONL blobs, newest first"""
         try:
-            logs = []
+            self.flush_audit_log()  # Entradas ainda na fila também aparecem
             
             # If no date range specified, get current month
             if not start_date:
@@ -120,44 +205,19 @@ class BlobStorageService:
             if not end_date:
                 end_date = datetime.utcnow().strftime('%Y-%m-31')
             
-            # Parse dates to determine which files to read
-            start_dt = datetime.strptime(start_date[:7], '%Y-%m')
-            end_dt = datetime.strptime(end_date[:7], '%Y-%m')
-            
-            # Read all relevant monthly files
-            current_dt = start_dt
-            while current_dt <= end_dt:
-                blob_name = f"audits/audit-{current_dt.strftime('%Y-%m')}.jsonl"
-                
-                try:
-                    blob_client = self._get_blob_client(blob_name)
-                    content = blob_client.download_blob().readall().decode('utf-8')
-                    
-                    # Parse each line as JSON
-                    for line in content.strip().split('\n'):
-                        if line:
-                            log_entry = json.loads(line)
-                            # Filter by date range if specified
-                            entry_date = log_entry.get('ts', '')[:10]
-                            if start_date[:10] <= entry_date <= end_date[:10]:
-                                logs.append(log_entry)
-                                
-                except Exception:
-                    pass  # File might not exist for this month
-                
-                # Move to next month
-                if current_dt.month == 12:
-                    current_dt = current_dt.replace(year=current_dt.year + 1, month=1)
-                else:
-                    current_dt = current_dt.replace(month=current_dt.month + 1)
-            
-            # Sort by timestamp descending
-            logs.sort(key=lambda x: x.get('ts', ''), reverse=True)
-            return logs
+            return list(read_audit_range(self._get_blob_client, start_date, end_date))
             
         except Exception as e:
             print(f"Erro ao ler logs de auditoria: {str(e)}")
             return []
 
+    def compact_audit_logs(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Rewrite closed audit months in the compact columnar format (entries per month)"""
+        if not self.container_client:
+            raise Exception("Blob connection not configured")
+        self.flush_audit_log()
+        return compact_closed_months(self.container_client.list_blobs, self._get_blob_client, now)
+
 # Global instance
-blob_service = BlobStorageService()
\ No newline at end of file
+blob_service = BlobStorageService()
+atexit.register(blob_service.flush_audit_log)
\ No newline at end of file
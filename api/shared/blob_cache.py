@@ -0,0 +1,173 @@
+"""Cache de leitura de blobs validado por ETag.
+
+Cada leitura é um GET condicional (``If-None-Match`` com o ETag da cópia em
+cache): enquanto o blob não muda, o serviço responde 304, sem corpo, e o valor
+já interpretado (DataFrame, bytes do JSON...) é reaproveitado sem baixar nem
+parsear de novo. Os valores ficam num LRU limitado por ``BLOB_CACHE_MAX_MB``;
+com ``BLOB_CACHE_DIR`` o conteúdo bruto também vai para o disco, de modo que
+um worker novo só baixa o que mudou (ainda precisa interpretar o conteúdo).
+"""
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceModifiedError, ResourceNotModifiedError
+
+BLOB_CACHE_MAX_BYTES = int(float(os.environ.get('BLOB_CACHE_MAX_MB', '256')) * 1024 * 1024)
+BLOB_CACHE_DIR = os.environ.get('BLOB_CACHE_DIR', '')
+
+
+def value_size(value: Any) -> int:
+    """Memória aproximada de um valor em cache (DataFrames pelo ``memory_usage`` profundo)."""
+    memory_usage = getattr(value, 'memory_usage', None)
+    if memory_usage is not None:
+        try:
+            return int(memory_usage(deep=True).sum())
+        except TypeError:
+            pass
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class BlobReadCache:
+    """LRU ``(blob, forma de leitura) -> (ETag, valor)`` com limite de memória."""
+
+    def __init__(self, max_bytes: int = BLOB_CACHE_MAX_BYTES, disk_dir: str = BLOB_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries: 'OrderedDict[Tuple[str, Hashable], Tuple[str, Any, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    # -- memória ------------------------------------------------------------
+
+    def _lookup(self, key) -> Optional[Tuple[str, Any, int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, etag: str, value: Any) -> None:
+        size = value_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (etag, value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def discard(self, blob_name: str) -> None:
+        """Esquece todas as formas de leitura de um blob (após gravá-lo, por exemplo)."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == blob_name]:
+                self._bytes -= self._entries.pop(key)[2]
+        if self.disk_dir:
+            for path in self._disk_paths(blob_name):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    # -- disco --------------------------------------------------------------
+
+    def _disk_paths(self, blob_name: str) -> Tuple[str, str]:
+        base = os.path.join(self.disk_dir, hashlib.sha1(blob_name.encode('utf-8')).hexdigest())
+        return base + '.bin', base + '.etag'
+
+    def _disk_etag(self, blob_name: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_paths(blob_name)[1], 'r', encoding='utf-8') as handle:
+                return handle.read() or None
+        except FileNotFoundError:
+            return None
+
+    def _disk_read(self, blob_name: str, etag: str) -> Optional[bytes]:
+        data_path, _ = self._disk_paths(blob_name)
+        try:
+            with open(data_path, 'rb') as handle:
+                data = handle.read()
+        except FileNotFoundError:
+            return None
+        # Outro processo pode ter trocado a cópia entre as duas leituras
+        return data if self._disk_etag(blob_name) == etag else None
+
+    def _disk_write(self, blob_name: str, etag: str, data: bytes) -> None:
+        if not self.disk_dir:
+            return
+        data_path, etag_path = self._disk_paths(blob_name)
+        try:
+            for path, content in ((data_path, data), (etag_path, etag.encode('utf-8'))):
+                fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as handle:
+                    handle.write(content)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Não foi possível gravar o cache em disco de {blob_name}: {str(e)}")
+
+    # -- leitura ------------------------------------------------------------
+
+    def read(self, blob_client, parse: Callable[[bytes], Any], kind: Hashable = 'raw') -> Any:
+        """Valor de ``parse(conteúdo do blob)``, reaproveitado enquanto o ETag não mudar.
+
+        ``kind`` distingue formas diferentes de interpretar o mesmo blob (CSV
+        com outro separador, por exemplo). O valor devolvido é compartilhado:
+        quem for alterá-lo deve copiar antes.
+        """
+        blob_name = blob_client.blob_name
+        key = (blob_name, kind)
+        entry = self._lookup(key)
+        etag = entry[0] if entry is not None else self._disk_etag(blob_name)
+
+        download = None
+        if etag:
+            try:
+                download = blob_client.download_blob(etag=etag, match_condition=MatchConditions.IfModified)
+            except (ResourceModifiedError, ResourceNotModifiedError) as e:
+                # O SDK 12.x sobe o 304 (ConditionNotMet) como ResourceModifiedError;
+                # só o status distingue "não mudou" de uma condição realmente violada
+                if getattr(e, 'status_code', None) != 304:
+                    raise
+                if entry is not None:
+                    self.stats['hits'] += 1
+                    return entry[1]
+                data = self._disk_read(blob_name, etag)
+                if data is not None:
+                    self.stats['disk_hits'] += 1
+                    value = parse(data)
+                    self._store(key, etag, value)
+                    return value
+        if download is None:
+            download = blob_client.download_blob()
+
+        self.stats['misses'] += 1
+        data = download.readall()
+        etag = download.properties.etag
+        value = parse(data)
+        self._store(key, etag, value)
+        self._disk_write(blob_name, etag, data)
+        return value
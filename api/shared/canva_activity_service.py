@@ -0,0 +1,334 @@
+"""
+Análise de atividade dos membros do Canva a partir das exportações
+``member-activity_<time>_<inicio>_<fim>_pt-BR.csv`` de public/data.
+
+Todas as exportações são lidas uma única vez (por versão dos arquivos) para um
+``ActivityStore``: um registro de membros (e-mail, nome, escola atribuída pelo
+domínio) e, para cada período (chave ``<inicio>_<fim>`` em epoch), vetores de
+contadores alinhados a esse registro. Agregados por escola/função, crescimento
+entre períodos e licenças sem atividade são operações sobre esses vetores.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .canva_data_processor import (
+    UNALLOCATED_SCHOOL_ID,
+    UNALLOCATED_SCHOOL_NAME,
+    DomainSuffixIndex,
+    email_domain,
+    load_schools_data,
+)
+from .canva_integration import (
+    DATA_DIR,
+    MEMBER_COUNTERS,
+    ROLE_METRICS,
+    export_period,
+    iter_member_rows,
+    period_from_filename,
+)
+from .columnar import CategoricalColumn, Rows, bool_array, int_array, true_rows
+from .file_snapshot import SnapshotCache, file_stamp
+
+try:  # Aceleração opcional (mesmo backend de columnar.py)
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+ACTIVITY_GLOB = "member-activity_*.csv"
+ACTIVITY_COUNTERS = tuple(MEMBER_COUNTERS)
+ACTIVITY_GROUPS = ("escola", "funcao")
+ACTIVITY_INACTIVE_DEFAULT = 100
+ACTIVITY_INACTIVE_MAX = 1000
+
+# Contador da exportação -> campo ``*_crescimento`` de canva_metrics
+GROWTH_FIELDS = {
+    "designs_criados": "designs_criados_crescimento",
+    "designs_publicados": "total_publicado_crescimento",
+    "links_compartilhados": "total_compartilhado_crescimento",
+}
+# Métrica de função (ROLE_METRICS) -> campo ``*_crescimento`` de membros ativos
+ROLE_GROWTH_FIELDS = {
+    "alunos": "alunos_crescimento",
+    "professores": "professores_crescimento",
+}
+
+_SECONDS_PER_DAY = 86400
+
+
+def period_days(start: int, end: int) -> int:
+    return max(1, round((end - start + 1) / _SECONDS_PER_DAY))
+
+
+def export_files(pattern: str, data_dir: Path = DATA_DIR) -> List[Path]:
+    """Exportações com intervalo em epoch no nome (``*_inicio_fim_*``)."""
+    return sorted(path for path in data_dir.glob(pattern) if export_period(path))
+
+
+def activity_files(data_dir: Path = DATA_DIR) -> List[Path]:
+    return export_files(ACTIVITY_GLOB, data_dir)
+
+
+def previous_export(periods: Sequence, period):
+    """Exportação anterior comparável: a que termina mais tarde antes do início de ``period``."""
+    candidates = [other for other in periods if other.end < period.start]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda other: (other.end, -abs(other.days - period.days)))
+
+
+def growth_percent(current: float, previous: float) -> Optional[float]:
+    if not previous:
+        return None
+    return round((current / previous - 1) * 100, 1)
+
+
+def _member_key(row: Dict) -> str:
+    return row["email"].lower() or f"sem-email:{row['nome']}"
+
+
+def _total(values, rows: Rows = None) -> int:
+    if np is not None:
+        return int(values.sum() if rows is None else values[rows].sum())
+    return sum(values) if rows is None else sum(values[row] for row in rows)
+
+
+class ActivityPeriod:
+    """Uma exportação: contadores por membro alinhados ao registro do ActivityStore."""
+
+    def __init__(self, start: int, end: int, path: Path, size: int, rows: Dict[int, Dict]):
+        self.start = start
+        self.end = end
+        self.key = f"{start}_{end}"
+        self.label = period_from_filename(path)
+        self.source = path.name
+        self.days = period_days(start, end)
+
+        blank = {"funcao": "", "ultima_atividade": ""}
+        self.present = bool_array(index in rows for index in range(size))
+        self.rows = true_rows(self.present)
+        self.counters = {
+            counter: int_array(rows[index][counter] if index in rows else 0 for index in range(size))
+            for counter in ACTIVITY_COUNTERS
+        }
+        self.role = CategoricalColumn(rows.get(index, blank)["funcao"] for index in range(size))
+        self.last_activity = CategoricalColumn(rows.get(index, blank)["ultima_atividade"] for index in range(size))
+
+        activity = [0] * size
+        for values in self.counters.values():
+            for index in self.rows:
+                activity[index] += values[index]
+        self.active = bool_array(self.present[index] and activity[index] > 0 for index in range(size))
+        self.active_rows = true_rows(self.active)
+        self.inactive_rows = true_rows(
+            bool_array(self.present[index] and not activity[index] for index in range(size))
+        )
+
+    def meta(self) -> Dict:
+        return {
+            "periodo": self.key,
+            "inicio": self.start,
+            "fim": self.end,
+            "dias": self.days,
+            "rotulo": self.label,
+            "arquivo": self.source,
+            "membros": len(self.rows),
+        }
+
+    def totals(self, rows: Rows = None) -> Dict:
+        """Somas dos contadores na seleção (padrão: membros presentes na exportação)."""
+        rows = self.rows if rows is None else rows
+        return {counter: _total(self.counters[counter], rows) for counter in ACTIVITY_COUNTERS}
+
+    def active_by_role_metric(self) -> Dict[str, int]:
+        """Membros ativos por métrica de função (alunos, professores, administradores)."""
+        result = {"alunos": 0, "professores": 0, "administradores": 0}
+        for role, count in self.role.value_counts(self.active_rows).items():
+            metric = ROLE_METRICS.get(role.lower())
+            if metric:
+                result[metric] += count
+        return result
+
+
+class ActivityStore:
+    """Registro de membros e séries de atividade de todas as exportações."""
+
+    def __init__(self, exports: List[Tuple[Path, List[Dict]]], schools_df=None, domain_map_df=None):
+        keys: Dict[str, int] = {}
+        self.emails: List[str] = []
+        self.names: List[str] = []
+        parsed = []
+        for path, members in exports:
+            period_key = export_period(path)
+            if period_key is None:
+                continue
+            rows: Dict[int, Dict] = {}
+            for member in members:
+                key = _member_key(member)
+                index = keys.get(key)
+                if index is None:
+                    index = keys[key] = len(self.emails)
+                    self.emails.append(member["email"])
+                    self.names.append(member["nome"])
+                existing = rows.get(index)
+                if existing is None:
+                    rows[index] = dict(member)
+                else:  # Mesmo e-mail repetido na exportação: soma os contadores
+                    for counter in ACTIVITY_COUNTERS:
+                        existing[counter] += member[counter]
+                    existing["funcao"] = existing["funcao"] or member["funcao"]
+            parsed.append((period_key, path, rows))
+
+        size = len(self.emails)
+        self.periods: List[ActivityPeriod] = sorted(
+            (ActivityPeriod(start, end, path, size, rows) for (start, end), path, rows in parsed),
+            key=lambda period: (period.start, -period.end),
+        )
+        self._by_key = {period.key: period for period in self.periods}
+
+        self.school_names: Dict[str, str] = {str(UNALLOCATED_SCHOOL_ID): UNALLOCATED_SCHOOL_NAME}
+        school_ids = [UNALLOCATED_SCHOOL_ID] * size
+        if schools_df is not None and domain_map_df is not None:
+            self.school_names.update(
+                (str(school_id), name)
+                for school_id, name in zip(schools_df["school_id"].astype(int), schools_df["school_name"])
+            )
+            index = DomainSuffixIndex.from_domain_map(domain_map_df)
+            school_ids = [index.lookup(email_domain(email)) or UNALLOCATED_SCHOOL_ID for email in self.emails]
+        self.school = CategoricalColumn(str(school_id) for school_id in school_ids)
+
+    def __len__(self) -> int:
+        return len(self.emails)
+
+    def period(self, key: Optional[str] = None) -> ActivityPeriod:
+        """Período pela chave ``<inicio>_<fim>``; sem chave, a janela mais recente."""
+        if not self.periods:
+            raise LookupError("Nenhuma exportação member-activity encontrada")
+        if key is None:
+            return self.periods[-1]
+        try:
+            return self._by_key[key]
+        except KeyError:
+            raise LookupError(f"Período desconhecido: {key}") from None
+
+    def previous_period(self, period: ActivityPeriod) -> Optional[ActivityPeriod]:
+        return previous_export(self.periods, period)
+
+    def growth(self, period: ActivityPeriod) -> Dict:
+        """Crescimento (%) em relação ao período anterior.
+
+        Contadores são normalizados por dia, então janelas de tamanhos
+        diferentes se comparam. Membros ativos por função não crescem em
+        proporção aos dias: ``alunos_crescimento``/``professores_crescimento``
+        só comparam com a exportação anterior de mesmo número de dias
+        (``funcoes_comparado_com``) e ficam None se ela não existir.
+        """
+        previous = self.previous_period(period)
+        same_length = previous_export([other for other in self.periods if other.days == period.days], period)
+        result = {field: None for field in (*GROWTH_FIELDS.values(), *ROLE_GROWTH_FIELDS.values())}
+        result["comparado_com"] = previous.key if previous else None
+        result["funcoes_comparado_com"] = same_length.key if same_length else None
+
+        if previous is not None:
+            current_totals, previous_totals = period.totals(), previous.totals()
+            for counter, field in GROWTH_FIELDS.items():
+                result[field] = growth_percent(current_totals[counter] / period.days, previous_totals[counter] / previous.days)
+        if same_length is not None:
+            current_roles, previous_roles = period.active_by_role_metric(), same_length.active_by_role_metric()
+            for metric, field in ROLE_GROWTH_FIELDS.items():
+                result[field] = growth_percent(current_roles[metric], previous_roles[metric])
+        return result
+
+    def rollup(self, period: ActivityPeriod, group_by: str = "escola", rows: Rows = None) -> List[Dict]:
+        """Membros, ativos e contadores por escola ou por função, ordenados por designs criados."""
+        column = self.school if group_by == "escola" else period.role
+        rows = period.rows if rows is None else rows
+        active_rows = [row for row in rows if period.active[row]] if np is None else rows[period.active[rows]]
+        members = column.counts(rows)
+        active = column.counts(active_rows)
+        sums = {counter: column.sums(period.counters[counter], rows) for counter in ACTIVITY_COUNTERS}
+
+        items = []
+        for code, value in enumerate(column.categories):
+            if not members[code]:
+                continue
+            if group_by == "escola":
+                item = {"escola_id": int(value), "escola_nome": self.school_names.get(value, "")}
+            else:
+                item = {"funcao": value or "Sem função"}
+            item.update(membros=members[code], ativos=active[code], inativos=members[code] - active[code])
+            item.update((counter, sums[counter][code]) for counter in ACTIVITY_COUNTERS)
+            items.append(item)
+        items.sort(key=lambda item: (item["designs_criados"], item["membros"]), reverse=True)
+        return items
+
+    def school_rows(self, period: ActivityPeriod, school_id: str, rows: Rows = None) -> Rows:
+        return self.school.select([school_id], period.rows if rows is None else rows)
+
+    def member(self, period: ActivityPeriod, index: int) -> Dict:
+        school_id = self.school[index]
+        member = {
+            "nome": self.names[index],
+            "email": self.emails[index],
+            "funcao": period.role[index],
+            "ultima_atividade": period.last_activity[index],
+            "escola_id": int(school_id),
+            "escola_nome": self.school_names.get(school_id, ""),
+        }
+        member.update((counter, int(period.counters[counter][index])) for counter in ACTIVITY_COUNTERS)
+        return member
+
+
+_stores = SnapshotCache()
+
+
+def load_activity_store(data_dir: Path = DATA_DIR) -> ActivityStore:
+    """ActivityStore das exportações, montado uma vez por versão dos arquivos (caminho, mtime e tamanho)."""
+    paths = activity_files(data_dir)
+    schools_path = data_dir / "Franchising.csv"
+    key = (tuple(file_stamp(path) for path in paths), file_stamp(schools_path) if schools_path.exists() else None)
+
+    def build() -> ActivityStore:
+        schools_df = domain_map_df = None
+        if schools_path.exists():
+            schools_df, domain_map_df = load_schools_data(schools_path.read_text(encoding="utf-8-sig", errors="replace"))
+        return ActivityStore([(path, list(iter_member_rows(path))) for path in paths], schools_df, domain_map_df)
+
+    return _stores.get(key, build)
+
+
+def query_activity(
+    period_key: Optional[str] = None,
+    group_by: str = "escola",
+    school_id: Optional[str] = None,
+    inactive_limit: int = ACTIVITY_INACTIVE_DEFAULT,
+    store: Optional[ActivityStore] = None,
+) -> Dict:
+    """
+    Resumo de atividade de um período: totais, crescimento (campos
+    ``*_crescimento``), agregado por escola ou função e licenças sem atividade.
+    ``school_id`` restringe agregados e inativos a uma escola. Levanta
+    LookupError para período desconhecido e ValueError para agrupamento inválido.
+    """
+    if group_by not in ACTIVITY_GROUPS:
+        raise ValueError(f"agrupar deve ser um de: {', '.join(ACTIVITY_GROUPS)}")
+    if store is None:
+        store = load_activity_store()
+    period = store.period(period_key)
+    inactive_limit = max(0, min(inactive_limit, ACTIVITY_INACTIVE_MAX))
+
+    rows = period.rows if school_id is None else store.school_rows(period, school_id)
+    inactive_rows = period.inactive_rows if school_id is None else store.school_rows(period, school_id, period.inactive_rows)
+    inactive = [store.member(period, index) for index in inactive_rows]
+    inactive.sort(key=lambda member: (member["escola_nome"], member["nome"].lower()))
+
+    members = len(rows)
+    active = members - len(inactive)
+    return {
+        "periodo": period.meta(),
+        "periodos": [other.meta() for other in store.periods],
+        "totais": {"membros": members, "ativos": active, "inativos": len(inactive), **period.totals(rows)},
+        "crescimento": store.growth(period),
+        "agrupamento": group_by,
+        "grupos": store.rollup(period, group_by, rows),
+        "inativos": {"total": len(inactive), "items": inactive[:inactive_limit]},
+    }
@@ -0,0 +1,214 @@
+"""Leitura em cache do ``canva_data_integrated_latest.json``.
+
+O documento é lido e parseado uma única vez por worker e reaproveitado enquanto
+o arquivo em disco não mudar (mesmo caminho, ``mtime`` e tamanho). Junto com o
+documento ficam as projeções usadas por ``canva/metricas/{tipo}``, a versão
+sem dados pessoais usada pelo ChatIA e os corpos JSON já serializados, com um
+ETag por resposta para que o navegador receba 304.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .model import pretty_json_serializer
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DATA_FILENAME = "canva_data_integrated_latest.json"
+DATA_FILE_ENV = "CANVA_DATA_FILE"
+
+# Intervalo mínimo entre dois ``stat`` do arquivo; dentro dele o snapshot atual
+# é servido sem nenhum acesso a disco.
+CHECK_INTERVAL_SECONDS = float(os.environ.get("CANVA_DATA_CHECK_INTERVAL", "2"))
+
+METRIC_TYPES = ("pessoas", "designs", "membros", "kits", "escolas")
+
+
+def data_file_candidates() -> List[Path]:
+    """Ordem de busca: CANVA_DATA_FILE, raiz do projeto e public/data."""
+    candidates = []
+    env_path = os.environ.get(DATA_FILE_ENV)
+    if env_path:
+        candidates.append(Path(env_path).expanduser())
+    candidates.extend([PROJECT_ROOT / DATA_FILENAME, PROJECT_ROOT / "public" / "data" / DATA_FILENAME])
+    return candidates
+
+
+def _with_period(data: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
+    metrics["periodo_filtro"] = data.get("periodo_filtro", "N/A")
+    metrics["data_atualizacao"] = data.get("data_atualizacao", "N/A")
+    return metrics
+
+
+def build_metric_projections(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Monta, de uma vez, as respostas de cada tipo de ``canva/metricas``."""
+    canva_metrics = data.get("canva_metrics", {})
+    schools = data.get("schools_allocation", [])
+
+    def pick(*keys: str) -> Dict[str, Any]:
+        return {key: canva_metrics.get(key, 0) for key in keys}
+
+    membros = [
+        {
+            "nome": user.get("nome", "N/A"),
+            "email": user.get("email", "N/A"),
+            "funcao": user.get("funcao", "N/A"),
+            "escola": school.get("school_name", "N/A"),
+            "escola_id": school.get("school_id", "N/A"),
+        }
+        for school in schools
+        for user in school.get("users", [])
+    ]
+    escolas = [
+        {
+            "escola_id": school.get("school_id"),
+            "escola_nome": school.get("school_name"),
+            "total_usuarios": school.get("total_users", 0),
+            "total_licencas": school.get("total_licenses", 0),
+        }
+        for school in schools
+        if school.get("school_id", 0) != 0  # Ignora "Usuários Sem Escola"
+    ]
+
+    return {
+        "pessoas": _with_period(
+            data,
+            pick(
+                "total_pessoas",
+                "alunos",
+                "alunos_crescimento",
+                "professores",
+                "professores_crescimento",
+                "administradores",
+            ),
+        ),
+        "designs": _with_period(
+            data,
+            pick(
+                "designs_criados",
+                "designs_criados_crescimento",
+                "total_publicado",
+                "total_publicado_crescimento",
+                "total_compartilhado",
+                "total_compartilhado_crescimento",
+            ),
+        ),
+        "membros": _with_period(data, {"total_membros": len(membros), "membros": membros}),
+        "kits": _with_period(
+            data,
+            {"total_kits": canva_metrics.get("total_kits", 0), "kits": canva_metrics.get("kits", [])},
+        ),
+        "escolas": _with_period(
+            data,
+            {
+                "total_escolas": len(escolas),
+                "escolas": escolas,
+                "usuarios_nao_alocados": data.get("unallocated_users_count", 0),
+            },
+        ),
+    }
+
+
+def build_dashboard_view(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia do documento sem a lista de usuários (não altera o original)."""
+    view = {key: value for key, value in data.items() if key != "unallocated_users_list"}
+    if "schools_allocation" in data:
+        view["schools_allocation"] = [
+            {key: value for key, value in school.items() if key != "users"}
+            for school in data["schools_allocation"]
+        ]
+    return view
+
+
+class CanvaDataSnapshot:
+    """Documento parseado de uma versão do arquivo, com projeções e corpos prontos."""
+
+    def __init__(self, path: Path, stamp: Tuple[int, int], raw: bytes):
+        self.path = path
+        self.stamp = stamp
+        self.data: Dict[str, Any] = json.loads(raw)
+        self.version = hashlib.sha1(raw).hexdigest()[:16]
+        self.metrics = build_metric_projections(self.data)
+        self.dashboard = build_dashboard_view(self.data)
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def etag(self, key: str = "dados") -> str:
+        return f'"{self.version}-{key}"'
+
+    def body(self, key: str = "dados") -> bytes:
+        """JSON serializado do documento (``dados``) ou de um tipo de métrica."""
+        body = self._bodies.get(key)
+        if body is None:
+            payload = self.data if key == "dados" else self.metrics[key]
+            body = pretty_json_serializer.dumps(payload)
+            with self._lock:
+                self._bodies.setdefault(key, body)
+        return body
+
+
+class CanvaDataLoader:
+    """Mantém o snapshot atual por worker, recarregando quando o arquivo muda."""
+
+    def __init__(self, check_interval: float = CHECK_INTERVAL_SECONDS):
+        self.check_interval = check_interval
+        self._snapshot: Optional[CanvaDataSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _locate() -> Tuple[Optional[Path], Optional[os.stat_result]]:
+        for candidate in data_file_candidates():
+            try:
+                return candidate, candidate.stat()
+            except OSError:
+                continue
+        return None, None
+
+    def load(self) -> Optional[CanvaDataSnapshot]:
+        """Snapshot atual ou ``None`` se não houver arquivo.
+
+        Propaga ``json.JSONDecodeError`` quando o arquivo está corrompido; nesse
+        caso nada é cacheado e a próxima chamada tenta de novo.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            path, stat = self._locate()
+            self._checked_at = time.monotonic()
+            if path is None:
+                if self._snapshot is not None:
+                    logging.warning("Arquivo de dados integrados removido")
+                self._snapshot = None
+                return None
+
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.path == path and snapshot.stamp == stamp:
+                return snapshot
+
+            logging.info(f"Carregando dados integrados do Canva de: {path}")
+            self._snapshot = CanvaDataSnapshot(path, stamp, path.read_bytes())
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara o cabeçalho If-None-Match com o ETag atual (aceita lista e ``*``)."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+canva_data = CanvaDataLoader()
@@ -0,0 +1,274 @@
+"""
+Processamento dos dados do Canva: alocação de usuários às escolas pelo domínio do e-mail.
+
+A base de escolas (Franchising.csv, coluna "E-mail da Escola") gera um índice de
+sufixos de domínio. Cada usuário é atribuído consultando o domínio do seu e-mail
+e os sufixos dele (``a.santamaria.maplebear.com.br`` -> ``santamaria.maplebear.com.br``
+-> ``maplebear.com.br``), sempre por lookup em dicionário.
+"""
+import logging
+import os
+import re
+from datetime import datetime
+from io import StringIO
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+UNALLOCATED_SCHOOL_ID = 0
+UNALLOCATED_SCHOOL_NAME = "Usuários Sem Escola"
+
+SCHOOL_ID_COLUMN = "ID da Escola"
+SCHOOL_NAME_COLUMN = "Nome da Escola"
+SCHOOL_EMAIL_COLUMN = "E-mail da Escola"
+REQUIRED_COLUMNS = (SCHOOL_ID_COLUMN, SCHOOL_NAME_COLUMN, SCHOOL_EMAIL_COLUMN)
+
+# Domínios compartilhados pela rede: o local part do e-mail da escola identifica a
+# unidade (goiania@maplebear.com.br -> goiania.maplebear.com.br, como nos e-mails
+# dos usuários, ex.: administrativo@araruama.maplebear.com.br).
+SHARED_SCHOOL_DOMAINS = {"maplebear.com.br", "co.maplebear.com.br"}
+
+# Provedores públicos nunca identificam uma escola
+GENERIC_DOMAINS = {
+    "gmail.com",
+    "googlemail.com",
+    "hotmail.com",
+    "hotmail.com.br",
+    "outlook.com",
+    "outlook.com.br",
+    "live.com",
+    "yahoo.com",
+    "yahoo.com.br",
+    "icloud.com",
+    "uol.com.br",
+    "bol.com.br",
+    "terra.com.br",
+}
+
+# Base simulada usada quando o CSV de escolas está vazio ou sem as colunas obrigatórias
+FALLBACK_SCHOOLS = [
+    {"school_id": 1, "school_name": "Maple Bear Santa Maria", "school_domain": "santamaria.maplebear.com.br"},
+    {"school_id": 2, "school_name": "Maple Bear Arcoverde", "school_domain": "arcoverde.maplebear.com.br"},
+    {"school_id": 3, "school_name": "Maple Bear Alphaville", "school_domain": "alphaville.maplebear.com.br"},
+]
+
+_LABEL_RE = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+
+
+def school_domain_from_email(value: str) -> Optional[str]:
+    """Domínio que identifica a escola a partir do "E-mail da Escola" (ou de um domínio puro)."""
+    value = (value or "").strip().lower()
+    if not value:
+        return None
+
+    if "@" in value:
+        local_part, _, domain = value.rpartition("@")
+        if domain in SHARED_SCHOOL_DOMAINS:
+            return f"{local_part}.{domain}" if _LABEL_RE.match(local_part) else None
+    else:
+        domain = value
+
+    if "." not in domain or domain in GENERIC_DOMAINS:
+        return None
+    return domain
+
+
+def email_domain(email: str) -> str:
+    email = (email or "").strip().lower()
+    return email.rpartition("@")[2] if "@" in email else ""
+
+
+class DomainSuffixIndex:
+    """Índice domínio -> ID da escola, consultado pelo domínio e por seus sufixos."""
+
+    def __init__(self, domains: Dict[str, int]):
+        self._domains = domains
+        self._memo: Dict[str, Optional[int]] = {}
+
+    @classmethod
+    def from_domain_map(cls, domain_map_df: pd.DataFrame) -> "DomainSuffixIndex":
+        return cls(dict(zip(domain_map_df["school_domain"], domain_map_df["school_id"].astype(int))))
+
+    def __len__(self) -> int:
+        return len(self._domains)
+
+    def lookup(self, domain: str) -> Optional[int]:
+        if not domain:
+            return None
+        if domain in self._memo:
+            return self._memo[domain]
+
+        school_id = None
+        suffix = domain
+        while "." in suffix:
+            school_id = self._domains.get(suffix)
+            if school_id is not None:
+                break
+            suffix = suffix.partition(".")[2]
+
+        self._memo[domain] = school_id
+        return school_id
+
+
+def _fallback_schools() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    domain_map_df = pd.DataFrame(FALLBACK_SCHOOLS)
+    schools_df = domain_map_df[["school_id", "school_name"]].copy()
+    return schools_df, domain_map_df
+
+
+def load_schools_data(csv_content: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Lê a base de escolas (CSV separado por ';') e monta o mapa de domínios.
+
+    Retorna ``(schools_df, domain_map_df)``:
+    - schools_df: school_id (int), school_name — uma linha por ID;
+    - domain_map_df: school_id, school_name, school_domain — só domínios que
+      apontam para uma única escola (domínios ambíguos são descartados).
+
+    Usa a base simulada (FALLBACK_SCHOOLS) se o CSV estiver vazio ou sem as
+    colunas obrigatórias.
+    """
+    if not (csv_content or "").strip():
+        logging.warning("CSV de escolas vazio; usando base simulada")
+        return _fallback_schools()
+
+    raw = pd.read_csv(StringIO(csv_content.lstrip("﻿")), sep=";", dtype=str, keep_default_na=False)
+    raw.columns = [column.strip().lstrip("﻿") for column in raw.columns]
+    missing = [column for column in REQUIRED_COLUMNS if column not in raw.columns]
+    if missing:
+        logging.warning(f"CSV de escolas sem as colunas {missing}; usando base simulada")
+        return _fallback_schools()
+
+    schools_df = pd.DataFrame(
+        {
+            "school_id": raw[SCHOOL_ID_COLUMN].str.strip(),
+            "school_name": raw[SCHOOL_NAME_COLUMN].str.strip(),
+            "school_domain": raw[SCHOOL_EMAIL_COLUMN].map(school_domain_from_email),
+        }
+    )
+    schools_df = schools_df[schools_df["school_id"].str.fullmatch(r"\d+")]
+    schools_df = schools_df.assign(school_id=schools_df["school_id"].astype(int))
+    schools_df = schools_df.drop_duplicates("school_id").reset_index(drop=True)
+
+    domain_map_df = schools_df.dropna(subset=["school_domain"])
+    domain_map_df = domain_map_df[~domain_map_df["school_domain"].duplicated(keep=False)].reset_index(drop=True)
+
+    return schools_df[["school_id", "school_name"]], domain_map_df
+
+
+def default_license_limit() -> int:
+    return int(os.environ.get("MAX_LICENSES_PER_SCHOOL") or 2)
+
+
+def process_canva_users(
+    users: Iterable[Dict],
+    schools_df: pd.DataFrame,
+    domain_map_df: pd.DataFrame,
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Aloca os usuários do Canva às escolas pelo domínio do e-mail.
+
+    Retorna ``(schools_allocation, unallocated_users)``. ``schools_allocation`` tem
+    uma entrada por escola (inclusive sem usuários) e, por último, a entrada
+    UNALLOCATED_SCHOOL_ID com os usuários sem escola identificada.
+    """
+    index = DomainSuffixIndex.from_domain_map(domain_map_df)
+    limit = default_license_limit()
+
+    allocation: Dict[int, Dict] = {
+        school_id: allocation_entry(school_id, school_name, [], limit)
+        for school_id, school_name in zip(schools_df["school_id"].astype(int), schools_df["school_name"])
+    }
+
+    unallocated: List[Dict] = []
+    for user in users:
+        school = allocation.get(index.lookup(email_domain(user.get("email", ""))))
+        if school is None:
+            unallocated.append(user)
+        else:
+            school["users"].append(user)
+
+    schools_allocation = list(allocation.values())
+    for school in schools_allocation:
+        school["total_users"] = len(school["users"])
+
+    schools_allocation.append(allocation_entry(UNALLOCATED_SCHOOL_ID, UNALLOCATED_SCHOOL_NAME, unallocated, 0))
+    return schools_allocation, unallocated
+
+
+def allocation_entry(school_id: int, school_name: str, users: List[Dict], total_licenses: int) -> Dict:
+    return {
+        "school_id": school_id,
+        "school_name": school_name,
+        "total_users": len(users),
+        "total_licenses": total_licenses,
+        "users": users,
+    }
+
+
+def integrate_canva_data(
+    canva_metrics: Dict,
+    schools_df: pd.DataFrame,
+    domain_map_df: pd.DataFrame,
+) -> Dict:
+    """
+    Monta o documento integrado (formato do canva_data_integrated_latest.json).
+
+    ``canva_metrics`` traz os indicadores coletados, a lista ``usuarios``
+    (nome, email, funcao, ...) e opcionalmente ``modelos``.
+    """
+    users = canva_metrics.get("usuarios", [])
+    schools_allocation, unallocated = process_canva_users(users, schools_df, domain_map_df)
+    metrics = {key: value for key, value in canva_metrics.items() if key not in ("usuarios", "modelos")}
+
+    return {
+        "periodo_filtro": canva_metrics.get("periodo_filtro", "N/A"),
+        "data_atualizacao": canva_metrics.get("data_atualizacao", "N/A"),
+        "canva_metrics": metrics,
+        "modelos": canva_metrics.get("modelos", []),
+        "schools_allocation": schools_allocation,
+        "unallocated_users_count": len(unallocated),
+        "unallocated_users_list": unallocated,
+        "licencas_utilizadas": len(users),
+    }
+
+
+def generate_markdown_report(integrated_data: Dict) -> str:
+    """Relatório Markdown do documento integrado (métricas, alocação e usuários sem escola)."""
+    metrics = integrated_data.get("canva_metrics", {})
+    allocation = integrated_data.get("schools_allocation", [])
+    unallocated = integrated_data.get("unallocated_users_list", [])
+
+    lines = [
+        "# Relatório de Uso do Canva Integrado",
+        "",
+        f"- Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+        f"- Período: {integrated_data.get('periodo_filtro', 'N/A')}",
+        f"- Atualização dos dados: {integrated_data.get('data_atualizacao', 'N/A')}",
+        "",
+        "## Métricas Gerais",
+        "",
+        f"- Total de pessoas: {metrics.get('total_pessoas', 0)}",
+        f"- Designs criados: {metrics.get('designs_criados', 0)}",
+        f"- Licenças utilizadas: {integrated_data.get('licencas_utilizadas', 0)}",
+        "",
+        "## Alocação de Usuários por Escola",
+        "",
+        "| ID | Escola | Usuários | Licenças |",
+        "|---:|--------|---------:|---------:|",
+    ]
+    for school in sorted(
+        (school for school in allocation if school.get("school_id") != UNALLOCATED_SCHOOL_ID and school.get("total_users")),
+        key=lambda school: school.get("total_users", 0),
+        reverse=True,
+    ):
+        lines.append(
+            f"| {school.get('school_id')} | {school.get('school_name')} "
+            f"| {school.get('total_users', 0)} | {school.get('total_licenses', 0)} |"
+        )
+
+    lines.extend(["", f"## Usuários Sem Escola Definida ({len(unallocated)})", ""])
+    for user in unallocated:
+        lines.append(f"- {user.get('nome') or 'N/A'} ({user.get('email') or 'sem e-mail'}) - {user.get('funcao') or 'N/A'}")
+
+    return "\n".join(lines) + "\n"
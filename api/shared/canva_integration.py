@@ -0,0 +1,378 @@
+"""
+Pipeline incremental que gera o canva_data_integrated_latest.json.
+
+Entradas (por padrão as exportações mais recentes em public/data):
+- member-*.csv: membros do time Canva e sua atividade;
+- template-*.csv: uso dos modelos;
+- Franchising.csv: base de escolas (mapa de domínios).
+
+"Mais recente" é decidido pelo período no nome da exportação
+(``*_inicio_fim_*``, pela data final), nunca pelo mtime, que num checkout novo
+é só a hora do clone; o uso de modelos precisa ser do mesmo período dos
+membros. Por padrão o documento vai para api/local_data: o publicado em
+public/data só é substituído quando pedido explicitamente (``PUBLISHED_OUTPUT``).
+
+Cada execução calcula o hash SHA-256 de cada entrada e compara com o estado da
+execução anterior. Sem mudanças, nada é reescrito. Se só os membros mudaram,
+apenas as escolas com membros novos, removidos ou alterados são remontadas; as
+demais entradas de ``schools_allocation`` são reaproveitadas do documento
+anterior. Mudança na base de escolas (ou estado ausente) força a reconstrução
+completa. O documento e o estado são gravados de forma atômica (arquivo
+temporário + rename).
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .canva_data_processor import (
+    UNALLOCATED_SCHOOL_ID,
+    UNALLOCATED_SCHOOL_NAME,
+    DomainSuffixIndex,
+    allocation_entry,
+    default_license_limit,
+    email_domain,
+    integrate_canva_data,
+    load_schools_data,
+)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR = PROJECT_ROOT / "public" / "data"
+PUBLISHED_OUTPUT = DATA_DIR / "canva_data_integrated_latest.json"
+DEFAULT_OUTPUT = PROJECT_ROOT / "api" / "local_data" / "canva_data_integrated_latest.json"
+DEFAULT_STATE = PROJECT_ROOT / "api" / "local_data" / "canva_integration_state.json"
+STATE_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+TOP_KITS = 20
+
+MEMBER_COLUMNS = {
+    "nome": "Membro",
+    "email": "E-mail",
+    "funcao": "Função",
+    "ultima_atividade": "Última atividade",
+}
+MEMBER_COUNTERS = {
+    "designs_criados": "Designs criados",
+    "designs_publicados": "Designs publicados",
+    "links_compartilhados": "Links compartilhados",
+    "designs_visualizados": "Designs visualizados",
+}
+TEMPLATE_COLUMNS = {
+    "nome": "Modelo",
+    "id": "ID do modelo",
+    "tipo": "Tipo de documento",
+    "titular": "Titular",
+}
+TEMPLATE_COUNTERS = {
+    "usadas": "Usadas",
+    "publicado": "Publicado",
+    "compartilhados": "Compartilhados",
+}
+ROLE_METRICS = {
+    "estudante": "alunos",
+    "professor": "professores",
+    "administrador": "administradores",
+    "admin da equipe escolar": "administradores",
+    "titular da equipe": "administradores",
+}
+
+_PERIOD_RE = re.compile(r"_(\d{9,11})_(\d{9,11})_")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def export_period(path: Path) -> Optional[Tuple[int, int]]:
+    """Intervalo ``(inicio, fim)`` em epoch de exportações ``*_inicio_fim_*``, ou None."""
+    match = _PERIOD_RE.search(path.name)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def latest_export(
+    prefix: str, data_dir: Path = DATA_DIR, period: Optional[Tuple[int, int]] = None
+) -> Optional[Path]:
+    """Exportação com o período mais recente (data final, depois inicial) com o prefixo dado.
+
+    Com ``period`` só vale a exportação exatamente desse intervalo. Arquivos sem
+    período no nome (``member-novembro2025.csv``) não são escolhidos sozinhos:
+    passe o caminho explicitamente.
+    """
+    candidates = []
+    for path in data_dir.glob(f"{prefix}-*.csv"):
+        path_period = export_period(path)
+        if path_period and (period is None or path_period == period):
+            candidates.append((path_period[1], path_period[0], path.name, path))
+    return max(candidates)[-1] if candidates else None
+
+
+def period_from_filename(path: Path) -> str:
+    """Período da exportação: datas do nome ``*_inicio_fim_*`` ou o sufixo do arquivo."""
+    match = _PERIOD_RE.search(path.name)
+    if match:
+        start, end = (
+            datetime.fromtimestamp(int(value), tz=timezone.utc).strftime("%d/%m/%Y") for value in match.groups()
+        )
+        return f"{start} a {end}"
+    return path.stem.split("-", 1)[-1]
+
+
+def _to_int(value: str) -> int:
+    digits = (value or "").strip().replace(".", "").replace(",", "")
+    return int(digits) if digits.isdigit() else 0
+
+
+def _iter_rows(path: Path, columns: Dict[str, str], counters: Dict[str, str]) -> Iterator[Dict]:
+    """Lê o CSV exportado pelo Canva linha a linha (sem carregar o arquivo inteiro)."""
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as handle:
+        for raw in csv.DictReader(handle):
+            row = {key: (raw.get(column) or "").strip() for key, column in columns.items()}
+            for key, column in counters.items():
+                row[key] = _to_int(raw.get(column))
+            yield row
+
+
+def iter_member_rows(path: Path) -> Iterator[Dict]:
+    return _iter_rows(path, MEMBER_COLUMNS, MEMBER_COUNTERS)
+
+
+def iter_template_rows(path: Path) -> Iterator[Dict]:
+    return _iter_rows(path, TEMPLATE_COLUMNS, TEMPLATE_COUNTERS)
+
+
+def member_metrics(members: List[Dict]) -> Dict:
+    metrics = {
+        "total_pessoas": len(members),
+        "alunos": 0,
+        "alunos_crescimento": 0,
+        "professores": 0,
+        "professores_crescimento": 0,
+        "administradores": 0,
+        "designs_criados": 0,
+        "designs_criados_crescimento": 0,
+        "total_publicado": 0,
+        "total_publicado_crescimento": 0,
+        "total_compartilhado": 0,
+        "total_compartilhado_crescimento": 0,
+    }
+    for member in members:
+        role_metric = ROLE_METRICS.get(member.get("funcao", "").lower())
+        if role_metric:
+            metrics[role_metric] += 1
+        metrics["designs_criados"] += member.get("designs_criados", 0)
+        metrics["total_publicado"] += member.get("designs_publicados", 0)
+        metrics["total_compartilhado"] += member.get("links_compartilhados", 0)
+    return metrics
+
+
+def template_metrics(templates: List[Dict]) -> Tuple[Dict, List[Dict]]:
+    """(métricas de kits, lista completa de modelos ordenada por uso)."""
+    modelos = sorted(templates, key=lambda template: template.get("usadas", 0), reverse=True)
+    return {"total_kits": len(modelos), "kits": modelos[:TOP_KITS]}, modelos
+
+
+def write_json_atomic(path: Path, payload) -> None:
+    """Grava o JSON em um temporário no mesmo diretório e troca com os.replace."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.chmod(tmp_name, 0o644)  # mkstemp cria com 0600; o documento é servido como arquivo estático
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _read_json(path: Path) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _row_hash(row: Dict) -> str:
+    return hashlib.sha1(json.dumps(row, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _member_keys(members: List[Dict]) -> Iterator[Tuple[str, Dict]]:
+    """Chave estável por membro (e-mail; duplicatas recebem um sufixo de ocorrência)."""
+    seen: Dict[str, int] = defaultdict(int)
+    for member in members:
+        base = member.get("email", "").lower() or f"sem-email:{member.get('nome', '')}"
+        seen[base] += 1
+        yield (base if seen[base] == 1 else f"{base}#{seen[base]}"), member
+
+
+class CanvaIntegrationPipeline:
+    """Gera o documento integrado a partir das exportações, reaproveitando a execução anterior."""
+
+    def __init__(
+        self,
+        members_path: Optional[Path] = None,
+        templates_path: Optional[Path] = None,
+        schools_path: Path = DATA_DIR / "Franchising.csv",
+        output_path: Path = DEFAULT_OUTPUT,
+        state_path: Path = DEFAULT_STATE,
+    ):
+        self.members_path = Path(members_path) if members_path else latest_export("member")
+        if self.members_path is None:
+            raise FileNotFoundError(f"Nenhuma exportação member-*.csv com período no nome em {DATA_DIR}")
+        members_period = export_period(self.members_path)
+        if templates_path:
+            self.templates_path = Path(templates_path)
+        elif members_period:
+            self.templates_path = latest_export("template", period=members_period)
+        else:
+            self.templates_path = None
+        if self.templates_path is None:
+            raise FileNotFoundError(
+                f"Nenhuma exportação template-*.csv do período de {self.members_path.name} em {DATA_DIR}"
+            )
+        templates_period = export_period(self.templates_path)
+        if members_period and templates_period and members_period != templates_period:
+            raise ValueError(
+                f"Períodos diferentes: membros {period_from_filename(self.members_path)}, "
+                f"modelos {period_from_filename(self.templates_path)}"
+            )
+        self.schools_path = Path(schools_path)
+        self.output_path = Path(output_path)
+        self.state_path = Path(state_path)
+
+    def _input_hashes(self) -> Dict[str, Optional[str]]:
+        inputs = {"members": self.members_path, "templates": self.templates_path, "schools": self.schools_path}
+        return {name: file_sha256(path) if path and path.exists() else None for name, path in inputs.items()}
+
+    def run(self, force: bool = False) -> Dict:
+        """Executa a integração e retorna um resumo (modo, escolas remontadas, saída)."""
+        hashes = self._input_hashes()
+        state = _read_json(self.state_path) or {}
+        previous = _read_json(self.output_path)
+        previous_hashes = state.get("inputs", {})
+
+        # O documento anterior só é reaproveitado se for exatamente o que esta pipeline gravou
+        output_hash = file_sha256(self.output_path) if previous is not None else None
+        full = (
+            force
+            or previous is None
+            or state.get("version") != STATE_VERSION
+            or state.get("output") != output_hash
+            or previous_hashes.get("schools") != hashes["schools"]
+        )
+        if not full and previous_hashes == hashes:
+            logging.info("Exportações do Canva sem alterações; documento integrado mantido")
+            return {"mode": "unchanged", "changed_schools": 0, "output": str(self.output_path)}
+
+        schools_text = self.schools_path.read_text(encoding="utf-8", errors="ignore") if hashes["schools"] else ""
+        schools_df, domain_map_df = load_schools_data(schools_text)
+
+        members = list(iter_member_rows(self.members_path))
+        templates = list(iter_template_rows(self.templates_path)) if hashes["templates"] else []
+        kits, modelos = template_metrics(templates)
+        metrics = {
+            **member_metrics(members),
+            **kits,
+            "periodo_filtro": period_from_filename(self.members_path),
+            "data_atualizacao": datetime.now().strftime("%d/%m/%Y"),
+        }
+
+        if full:
+            document = integrate_canva_data({**metrics, "usuarios": members, "modelos": modelos}, schools_df, domain_map_df)
+            member_state = self._member_state(members, DomainSuffixIndex.from_domain_map(domain_map_df), schools_df, {})
+            changed = len(document["schools_allocation"])
+        else:
+            document, member_state, changed = self._incremental(
+                previous, state.get("members", {}), members, metrics, modelos, schools_df, domain_map_df
+            )
+
+        write_json_atomic(self.output_path, document)
+        write_json_atomic(
+            self.state_path,
+            {
+                "version": STATE_VERSION,
+                "inputs": hashes,
+                "output": file_sha256(self.output_path),
+                "members": member_state,
+            },
+        )
+        mode = "full" if full else "incremental"
+        logging.info(f"Documento integrado gravado ({mode}, {changed} escolas remontadas): {self.output_path}")
+        return {"mode": mode, "changed_schools": changed, "output": str(self.output_path)}
+
+    @staticmethod
+    def _member_state(members, index, schools_df, previous_state) -> Dict[str, List]:
+        """Hash e escola de cada membro; membros inalterados reaproveitam a escola anterior."""
+        known_ids = set(schools_df["school_id"].astype(int))
+        member_state = {}
+        for key, member in _member_keys(members):
+            row_hash = _row_hash(member)
+            cached = previous_state.get(key)
+            if cached and cached[0] == row_hash:
+                school_id = cached[1]
+            else:
+                school_id = index.lookup(email_domain(member.get("email", "")))
+                school_id = school_id if school_id in known_ids else UNALLOCATED_SCHOOL_ID
+            member_state[key] = [row_hash, school_id]
+        return member_state
+
+    def _incremental(self, previous, previous_state, members, metrics, modelos, schools_df, domain_map_df):
+        index = DomainSuffixIndex.from_domain_map(domain_map_df)
+        member_state = self._member_state(members, index, schools_df, previous_state)
+
+        affected = set()
+        for key in previous_state.keys() | member_state.keys():
+            old, new = previous_state.get(key), member_state.get(key)
+            if old is None or new is None or old[0] != new[0] or old[1] != new[1]:
+                affected.update(entry[1] for entry in (old, new) if entry)
+
+        users_by_school: Dict[int, List[Dict]] = defaultdict(list)
+        for key, member in _member_keys(members):
+            school_id = member_state[key][1]
+            if school_id in affected:
+                users_by_school[school_id].append(member)
+
+        limit = default_license_limit()
+        schools_allocation = []
+        for entry in previous.get("schools_allocation", []):
+            school_id = entry.get("school_id")
+            if school_id not in affected:
+                schools_allocation.append(entry)
+            elif school_id == UNALLOCATED_SCHOOL_ID:
+                schools_allocation.append(
+                    allocation_entry(UNALLOCATED_SCHOOL_ID, UNALLOCATED_SCHOOL_NAME, users_by_school[school_id], 0)
+                )
+            else:
+                schools_allocation.append(
+                    allocation_entry(school_id, entry.get("school_name"), users_by_school[school_id], limit)
+                )
+
+        unallocated = next(
+            (entry["users"] for entry in schools_allocation if entry.get("school_id") == UNALLOCATED_SCHOOL_ID), []
+        )
+        document = {
+            "periodo_filtro": metrics["periodo_filtro"],
+            "data_atualizacao": metrics["data_atualizacao"],
+            "canva_metrics": metrics,
+            "modelos": modelos,
+            "schools_allocation": schools_allocation,
+            "unallocated_users_count": len(unallocated),
+            "unallocated_users_list": unallocated,
+            "licencas_utilizadas": len(members),
+        }
+        return document, member_state, len(affected)
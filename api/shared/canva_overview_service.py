@@ -1,15 +1,24 @@
 import os
-import unicodedata
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
+from .columnar import CategoricalColumn, Rows, bool_array, int_array, select_in, take, true_rows
+from .email_compliance import classify_many, is_email_compliant  # noqa: F401 - reexportado
+from .file_snapshot import SnapshotCache, column_indexes, file_stamp, normalize
 
-def _normalize(text: str) -> str:
-    """Remove acentos e normaliza para comparacoes simples."""
-    if not text:
-        return ""
-    nfkd = unicodedata.normalize("NFKD", text)
-    return "".join(c for c in nfkd if not unicodedata.combining(c)).lower().strip()
+DEFAULT_USERS_FILES = ("usuarios_public.csv", "licencas_canva.csv")
+
+# Facetas do overview (colunas do Franchising.csv) e o parametro HTTP de cada uma
+OVERVIEW_FACETS = ("carteira_saf", "cluster", "state", "region", "status")
+OVERVIEW_FACET_PARAMS = {
+    "carteiraSaf": "carteira_saf",
+    "cluster": "cluster",
+    "state": "state",
+    "region": "region",
+    "status": "status",
+}
+OVERVIEW_PAGE_DEFAULT = 50
+OVERVIEW_PAGE_MAX = 500
 
 
 def _find_data_file(filename: str) -> Path:
@@ -25,8 +34,7 @@ def _find_data_file(filename: str) -> Path:
     raise FileNotFoundError(f"Arquivo nao encontrado: {filename}")
 
 
-def _load_csv_lines(filename: str) -> List[str]:
-    path = _find_data_file(filename)
+def _read_csv_lines(path: Path) -> List[str]:
     try:
         text = path.read_text(encoding="utf-8", errors="ignore")
     except UnicodeDecodeError:
@@ -35,66 +43,63 @@ def _load_csv_lines(filename: str) -> List[str]:
     return lines
 
 
-def load_franchising_schools() -> List[Dict]:
-    """Carrega escolas do CSV de franchising, ignorando linhas sem ID."""
-    lines = _load_csv_lines("Franchising.csv")
+def _load_csv_lines(filename: str) -> List[str]:
+    return _read_csv_lines(_find_data_file(filename))
+
+
+# Campo de saida -> rotulos aceitos no cabecalho do Franchising.csv
+FRANCHISING_COLUMNS = {
+    "id": ("id da escola", "id"),
+    "name": ("nome da escola", "nome"),
+    "status": ("status da escola", "status"),
+    "cluster": ("cluster",),
+    "city": ("cidade da escola", "cidade"),
+    "state": ("estado da escola", "estado"),
+    "region": ("regiao da escola", "regiao"),
+    "carteira_saf": ("carteira saf",),
+}
+
+
+def parse_franchising_schools(lines: List[str]) -> List[Dict]:
+    """Converte as linhas do Franchising.csv, resolvendo as colunas uma unica vez."""
     if not lines:
         return []
 
-    header = lines[0].split(";")
-    normalized_header = [_normalize(col) for col in header]
+    normalized_header = [normalize(col) for col in lines[0].split(";")]
+    columns = {
+        field: column_indexes(normalized_header, *labels) for field, labels in FRANCHISING_COLUMNS.items()
+    }
 
-    def _get(row: List[str], label: str) -> str:
-        norm = _normalize(label)
-        if norm in normalized_header:
-            idx = normalized_header.index(norm)
-            return row[idx].strip() if idx < len(row) else ""
+    def _get(row: List[str], indexes: List[int]) -> str:
+        for idx in indexes:
+            value = row[idx].strip() if idx < len(row) else ""
+            if value:
+                return value
         return ""
 
+    id_columns = columns.pop("id")
     schools: List[Dict] = []
     seen_ids = set()
 
     for raw in lines[1:]:
         cells = raw.split(";")
-        school_id = _get(cells, "id da escola") or _get(cells, "id")
-        if not school_id or not school_id.strip().isdigit():
+        school_id = _get(cells, id_columns)
+        if not school_id or not school_id.isdigit():
             continue
         if school_id in seen_ids:
             continue
         seen_ids.add(school_id)
 
-        name = _get(cells, "nome da escola") or _get(cells, "nome")
-        status = _get(cells, "status da escola") or _get(cells, "status")
-        cluster = _get(cells, "cluster")
-        city = _get(cells, "cidade da escola") or _get(cells, "cidade")
-        state = _get(cells, "estado da escola") or _get(cells, "estado")
-
-        schools.append(
-            {
-                "id": school_id,
-                "name": name,
-                "status": status,
-                "cluster": cluster,
-                "city": city,
-                "state": state,
-            }
-        )
+        school = {"id": school_id}
+        for field, indexes in columns.items():
+            school[field] = _get(cells, indexes)
+        schools.append(school)
 
     return schools
 
 
-def load_license_users() -> List[Dict]:
-    """Le o arquivo de licencas (preferindo usuarios_public.csv) replicando a logica do front."""
-    lines: List[str] = []
-    source = None
-    for filename in ("usuarios_public.csv", "licencas_canva.csv"):
-        try:
-            lines = _load_csv_lines(filename)
-            source = filename
-            break
-        except FileNotFoundError:
-            continue
-
+def parse_license_users(lines: List[str], source: str = "") -> List[Dict]:
+    """Converte as linhas do arquivo de licencas replicando a logica do front."""
     if len(lines) <= 1:
         return []
 
@@ -124,125 +129,343 @@ def load_license_users() -> List[Dict]:
     return users
 
 
-def is_email_compliant(email: str) -> bool:
-    """Regras iguais as usadas no front (safDataService)."""
-    normalized = (email or "").strip().lower()
-    if "@" not in normalized:
-        return False
-    local_part, _, domain = normalized.partition("@")
+class SchoolTable:
+    """Escolas do Franchising.csv em colunas (uma linha por ID de escola)."""
 
-    domain_keywords = ["maplebear", "mbcentral", "sebsa", "seb"]
-    if any(kw in domain for kw in domain_keywords):
-        return True
+    CATEGORICAL = ("status", "cluster", "city", "state", "region", "carteira_saf")
 
-    if domain.startswith("mb") and len(domain) > 2:
-        return True
+    def __init__(self, schools: List[Dict]):
+        self.ids: List[str] = [school["id"] for school in schools]
+        self.names: List[str] = [school.get("name", "") for school in schools]
+        self.columns: Dict[str, CategoricalColumn] = {
+            field: CategoricalColumn(school.get(field, "") for school in schools) for field in self.CATEGORICAL
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row(self, index: int) -> Dict:
+        row = {"id": self.ids[index], "name": self.names[index]}
+        for field in FRANCHISING_COLUMNS:
+            if field in self.columns:
+                row[field] = self.columns[field][index]
+        return row
 
-    if local_part.startswith("mb") and len(local_part) > 2:
-        return True
+    def rows(self) -> List[Dict]:
+        return [self.row(index) for index in range(len(self))]
 
-    return False
 
+class UserTable:
+    """Usuarios do arquivo de licencas em colunas, com dominio e conformidade."""
 
-def compute_overview(license_limit: int = None) -> Dict:
+    CATEGORICAL = ("role", "school_name", "school_id", "status")
+
+    def __init__(self, users: List[Dict], source: str = ""):
+        self.source = source
+        self.names: List[str] = [user.get("name", "") for user in users]
+        self.emails: List[str] = [user.get("email", "") for user in users]
+        self.columns: Dict[str, CategoricalColumn] = {
+            field: CategoricalColumn(user.get(field, "") for user in users) for field in self.CATEGORICAL
+        }
+        # Chave de agrupamento por escola: ID, nome normalizado ou "sem-escola"
+        self.school_key = CategoricalColumn(
+            user.get("school_id") or normalize(user.get("school_name", "")) or "sem-escola" for user in users
+        )
+        self.domain = CategoricalColumn(
+            email.split("@")[1].lower() if "@" in email else "" for email in self.emails
+        )
+        self.non_compliant = bool_array(not compliant for compliant in classify_many(self.emails))
+
+    def __len__(self) -> int:
+        return len(self.emails)
+
+    def row(self, index: int) -> Dict:
+        return {
+            "name": self.names[index],
+            "email": self.emails[index],
+            "role": self.columns["role"][index],
+            "school_name": self.columns["school_name"][index],
+            "school_id": self.columns["school_id"][index],
+            "status": self.columns["status"][index],
+            "source": self.source,
+        }
+
+    def rows(self) -> List[Dict]:
+        return [self.row(index) for index in range(len(self))]
+
+
+def _school_key_rows(schools: SchoolTable, keys: List[str]) -> List[int]:
     """
-    Calcula os indicadores de licencas a partir dos CSVs locais.
-    - total de escolas
-    - licencas utilizadas/total
-    - escolas em excesso
-    - usuarios nao conformes e dominios externos
+    Linha do Franchising.csv de cada chave de usuario (-1 sem correspondencia):
+    o ID da escola ou, quando o arquivo de licencas nao traz o ID, o nome
+    normalizado. Unidades ("Maple Bear Cidade - Bairro I") ausentes do
+    Franchising.csv caem na escola com o nome antes do " - ".
+    """
+    rows_by_key: Dict[str, int] = {}
+    for index, (school_id, name) in enumerate(zip(schools.ids, schools.names)):
+        rows_by_key.setdefault(school_id, index)
+        rows_by_key.setdefault(normalize(name), index)
+
+    rows = []
+    for key in keys:
+        row = rows_by_key.get(key)
+        if row is None and " - " in key:
+            row = rows_by_key.get(key.split(" - ", 1)[0])
+        rows.append(-1 if row is None else row)
+    return rows
+
+
+class OverviewDataset:
+    """
+    Escolas e usuarios de uma versao dos CSVs em formato colunar, com os
+    agregados que nao dependem do limite de licencas (uso por escola, dominios
+    nao conformes). Compartilhado por compute_overview e build_school_breakdown.
     """
-    schools_raw = load_franchising_schools()
-    users = load_license_users()
 
-    schools_map: Dict[str, Dict] = {}
-    for school in schools_raw:
-        key = school.get("id") or _normalize(school.get("name", ""))
-        if not key:
+    def __init__(self, schools_raw: List[Dict], users: List[Dict], users_source: str = ""):
+        self.schools = SchoolTable(schools_raw)
+        self.users = UserTable(users, users_source)
+        self.users_source = users_source
+
+        self.non_compliant_rows = true_rows(self.users.non_compliant)
+        self.non_compliant_count = len(self.non_compliant_rows)
+
+        # Linha da escola de cada usuario (-1 quando a escola nao esta no Franchising.csv)
+        key_rows = _school_key_rows(self.schools, self.users.school_key.categories)
+        self.user_school_row = int_array(key_rows[code] for code in self.users.school_key.codes)
+
+        # Uso alinhado as linhas de self.schools
+        usage = [0] * len(self.schools)
+        for code, count in enumerate(self.users.school_key.counts()):
+            if key_rows[code] >= 0:
+                usage[key_rows[code]] += count
+        self.school_usage = int_array(usage)
+
+        # Contadores de cada faceta sem filtros, servidos direto na consulta padrao
+        self.facet_totals = {facet: self.facet_counts(facet) for facet in OVERVIEW_FACETS}
+
+    def facet_counts(self, facet: str, rows: Rows = None) -> List[Dict]:
+        """Escolas e licencas usadas por valor da faceta, na selecao de escolas ``rows``."""
+        column = self.schools.columns[facet]
+        counts = column.counts(rows)
+        used = column.sums(self.school_usage, rows)
+        items = [
+            {"value": value, "schools": count, "usedLicenses": used[code]}
+            for code, (value, count) in enumerate(zip(column.categories, counts))
+            if count
+        ]
+        items.sort(key=lambda item: item["schools"], reverse=True)
+        return items
+
+
+_datasets = SnapshotCache()
+
+
+def _locate_users_file() -> Tuple[Optional[Path], str]:
+    for filename in DEFAULT_USERS_FILES:
+        try:
+            return _find_data_file(filename), filename
+        except FileNotFoundError:
             continue
-        schools_map[key] = school
-    schools = list(schools_map.values())
+    return None, ""
 
-    limit = int(license_limit or os.environ.get("MAX_LICENSES_PER_SCHOOL") or 2)
-    total_schools = len(schools)
-    total_licenses = total_schools * limit
-    licencas_utilizadas = len(users)
 
-    usage_by_school: Dict[str, int] = {}
-    for user in users:
-        key = user.get("school_id") or _normalize(user.get("school_name", "")) or "sem-escola"
-        usage_by_school[key] = usage_by_school.get(key, 0) + 1
+def load_overview_dataset() -> OverviewDataset:
+    """
+    Dataset dos CSVs, parseado uma vez por versao dos arquivos (caminho, mtime e
+    tamanho). Levanta FileNotFoundError se o Franchising.csv nao existir.
+    """
+    franchising_path = _find_data_file("Franchising.csv")
+    users_path, users_source = _locate_users_file()
+    key = (file_stamp(franchising_path), file_stamp(users_path) if users_path else None)
+
+    return _datasets.get(
+        key,
+        lambda: OverviewDataset(
+            parse_franchising_schools(_read_csv_lines(franchising_path)),
+            parse_license_users(_read_csv_lines(users_path), users_source) if users_path else [],
+            users_source,
+        ),
+    )
+
+
+def load_franchising_schools() -> List[Dict]:
+    """Carrega escolas do CSV de franchising, ignorando linhas sem ID."""
+    return load_overview_dataset().schools.rows()
+
+
+def load_license_users() -> List[Dict]:
+    """Le o arquivo de licencas (preferindo usuarios_public.csv) replicando a logica do front."""
+    try:
+        return load_overview_dataset().users.rows()
+    except FileNotFoundError:
+        users_path, users_source = _locate_users_file()
+        if users_path is None:
+            return []
+        return parse_license_users(_read_csv_lines(users_path), users_source)
+
 
-    escolas_com_licenca = sum(1 for k, v in usage_by_school.items() if k != "sem-escola" and v > 0)
-    escolas_excesso = sum(1 for k, v in usage_by_school.items() if k != "sem-escola" and v > limit)
+def _overview_kpis(dataset: OverviewDataset, rows: Rows, limit: int) -> Dict:
+    """
+    Indicadores das escolas ``rows`` (None = todas), sempre a partir do uso por
+    linha do Franchising.csv. Sem selecao, licencas usadas e nao conformes contam
+    todos os usuarios do arquivo, inclusive os sem escola reconhecida.
+    """
+    usage = take(dataset.school_usage, rows)
+    total_schools = len(usage)
+    total_licenses = total_schools * limit
 
-    non_compliant = [u for u in users if not is_email_compliant(u.get("email", ""))]
-    dominio_contagem: Dict[str, int] = {}
-    for user in non_compliant:
-        domain = (user.get("email", "").split("@")[1] if "@" in user.get("email", "") else "").lower()
-        if domain:
-            dominio_contagem[domain] = dominio_contagem.get(domain, 0) + 1
+    if rows is None:
+        licencas_utilizadas = len(dataset.users)
+        user_rows = dataset.non_compliant_rows
+    else:
+        licencas_utilizadas = sum(usage)
+        # Usuarios nao conformes das escolas selecionadas
+        user_rows = select_in(dataset.user_school_row, rows, dataset.non_compliant_rows)
 
+    dominio_contagem = dataset.users.domain.value_counts(user_rows)
+    dominio_contagem.pop("", None)
     top_dominios = sorted(
         [{"domain": d, "count": c} for d, c in dominio_contagem.items()],
         key=lambda item: item["count"],
         reverse=True,
     )
 
-    ocupacao = 0.0
-    if total_licenses > 0:
-        ocupacao = (licencas_utilizadas / total_licenses) * 100
-
-    source_file = users[0].get("source", "") if users else ""
-
+    ocupacao = (licencas_utilizadas / total_licenses) * 100 if total_licenses > 0 else 0.0
     return {
         "totalEscolas": total_schools,
-        "escolasComLicenca": escolas_com_licenca,
+        "escolasComLicenca": sum(1 for used in usage if used > 0),
         "licencasUtilizadas": licencas_utilizadas,
         "licencasTotais": total_licenses,
         "ocupacaoPercentual": round(ocupacao, 1),
-        "escolasEmExcesso": escolas_excesso,
-        "usuariosNaoConformes": len(non_compliant),
+        "escolasEmExcesso": sum(1 for used in usage if used > limit),
+        "usuariosNaoConformes": len(user_rows),
         "dominiosNaoMapleBear": sum(dominio_contagem.values()),
         "dominiosNaoMapleBearTop": top_dominios[:10],
-        "fonte": f"public/data/Franchising.csv e public/data/{source_file or 'usuarios_public.csv'}",
     }
 
 
-def build_school_breakdown(license_limit: int = None) -> List[Dict]:
-    """Retorna uso por escola para dashboards (opcional)."""
+def compute_overview(license_limit: int = None, dataset: Optional[OverviewDataset] = None) -> Dict:
+    """
+    Calcula os indicadores de licencas a partir dos CSVs locais.
+    - total de escolas
+    - licencas utilizadas/total
+    - escolas em excesso
+    - usuarios nao conformes e dominios externos
+    """
+    dataset = dataset or load_overview_dataset()
     limit = int(license_limit or os.environ.get("MAX_LICENSES_PER_SCHOOL") or 2)
-    schools_raw = load_franchising_schools()
-    users = load_license_users()
 
-    usage_by_school: Dict[str, Dict] = {}
-    for school in schools_raw:
-        key = school.get("id") or _normalize(school.get("name", ""))
-        if not key:
-            continue
-        usage_by_school[key] = {
-            "schoolId": school.get("id") or key,
-            "name": school.get("name"),
-            "usedLicenses": 0,
-            "limit": limit,
-        }
+    overview = _overview_kpis(dataset, None, limit)
+    source_file = dataset.users_source if len(dataset.users) else ""
+    overview["fonte"] = f"public/data/Franchising.csv e public/data/{source_file or 'usuarios_public.csv'}"
+    return overview
 
-    for user in users:
-        key = user.get("school_id") or _normalize(user.get("school_name", ""))
-        if key in usage_by_school:
-            usage_by_school[key]["usedLicenses"] += 1
 
-    breakdown = []
-    for data in usage_by_school.values():
-        status = "available"
-        if data["usedLicenses"] > data["limit"]:
-            status = "excess"
-        elif data["usedLicenses"] == data["limit"]:
-            status = "full"
-        elif data["usedLicenses"] >= data["limit"] * 0.8:
-            status = "warning"
+def _usage_status(used: int, limit: int) -> str:
+    if used > limit:
+        return "excess"
+    if used == limit:
+        return "full"
+    if used >= limit * 0.8:
+        return "warning"
+    return "available"
+
 
-        breakdown.append({**data, "status": status})
+def build_school_breakdown(license_limit: int = None, dataset: Optional[OverviewDataset] = None) -> List[Dict]:
+    """Retorna uso por escola para dashboards (opcional)."""
+    dataset = dataset or load_overview_dataset()
+    limit = int(license_limit or os.environ.get("MAX_LICENSES_PER_SCHOOL") or 2)
+
+    schools = dataset.schools
+    breakdown = []
+    for index, used in enumerate(dataset.school_usage.tolist()):
+        breakdown.append(
+            {
+                "schoolId": schools.ids[index],
+                "name": schools.names[index],
+                "usedLicenses": used,
+                "limit": limit,
+                "status": _usage_status(used, limit),
+            }
+        )
 
     breakdown.sort(key=lambda item: item["usedLicenses"], reverse=True)
     return breakdown
+
+
+def parse_overview_filters(params) -> Dict[str, List[str]]:
+    """Filtros de faceta a partir dos parametros HTTP (valores separados por virgula)."""
+    filters: Dict[str, List[str]] = {}
+    for param, facet in OVERVIEW_FACET_PARAMS.items():
+        raw = params.get(param)
+        if not raw:
+            continue
+        values = [value.strip() for value in raw.split(",") if value.strip()]
+        if values:
+            filters[facet] = values
+    return filters
+
+
+def _select_schools(dataset: OverviewDataset, filters: Dict[str, List[str]], skip: str = None) -> Rows:
+    rows = None
+    for facet, values in filters.items():
+        if facet != skip and values:
+            rows = dataset.schools.columns[facet].select(values, rows)
+    return rows
+
+
+def query_overview(
+    filters: Optional[Dict[str, List[str]]] = None,
+    license_limit: int = None,
+    page: int = 1,
+    page_size: int = OVERVIEW_PAGE_DEFAULT,
+    dataset: Optional[OverviewDataset] = None,
+) -> Dict:
+    """
+    Overview filtrado por facetas (chaves de OVERVIEW_FACETS, ex.: {"cluster": ["Implantacao"]}).
+    Retorna os indicadores da selecao, a contagem de cada faceta (aplicando os
+    demais filtros) e uma pagina do uso por escola ordenado por licencas usadas.
+    Sem filtros, os indicadores sao os mesmos de compute_overview.
+    """
+    dataset = dataset or load_overview_dataset()
+    filters = {facet: values for facet, values in (filters or {}).items() if facet in OVERVIEW_FACETS and values}
+    limit = int(license_limit or os.environ.get("MAX_LICENSES_PER_SCHOOL") or 2)
+    page = max(int(page or 1), 1)
+    page_size = min(max(int(page_size or OVERVIEW_PAGE_DEFAULT), 1), OVERVIEW_PAGE_MAX)
+
+    rows = _select_schools(dataset, filters)
+    overview = _overview_kpis(dataset, rows, limit)
+    selected = list(range(len(dataset.schools))) if rows is None else [int(row) for row in rows]
+
+    facets = {}
+    for param, facet in OVERVIEW_FACET_PARAMS.items():
+        facet_rows = _select_schools(dataset, filters, skip=facet)
+        facets[param] = dataset.facet_totals[facet] if facet_rows is None else dataset.facet_counts(facet, facet_rows)
+
+    usage = dataset.school_usage
+    selected.sort(key=lambda row: usage[row], reverse=True)
+    start = (page - 1) * page_size
+    schools = dataset.schools
+    items = [
+        {
+            "schoolId": schools.ids[row],
+            "name": schools.names[row],
+            "usedLicenses": int(usage[row]),
+            "limit": limit,
+            "status": _usage_status(int(usage[row]), limit),
+            "schoolStatus": schools.columns["status"][row],
+            "cluster": schools.columns["cluster"][row],
+            "state": schools.columns["state"][row],
+            "region": schools.columns["region"][row],
+            "carteiraSaf": schools.columns["carteira_saf"][row],
+        }
+        for row in selected[start:start + page_size]
+    ]
+
+    return {
+        "filters": {param: filters[facet] for param, facet in OVERVIEW_FACET_PARAMS.items() if facet in filters},
+        "overview": overview,
+        "facets": facets,
+        "schools": {"items": items, "total": len(selected), "page": page, "pageSize": page_size},
+    }
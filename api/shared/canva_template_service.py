@@ -0,0 +1,240 @@
+"""
+Índice de uso dos modelos (templates) do Canva a partir das exportações
+``template-activity_<time>_<inicio>_<fim>_pt-BR.csv`` de public/data.
+
+Os modelos de todas as exportações ficam em um único registro indexado pelo
+``ID do modelo``; cada período guarda os contadores (usadas, publicado,
+compartilhados) alinhados a esse registro e, já calculadas na carga, as ordens
+decrescentes de cada contador e do crescimento em relação à exportação
+anterior. Um top-N é só um recorte dessas ordens; os CSVs são lidos uma vez
+por versão dos arquivos. Exportações sem intervalo em epoch no nome
+(``template-novembro2025.csv``) não entram no índice.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .canva_activity_service import export_files, growth_percent, period_days, previous_export
+from .canva_integration import DATA_DIR, TEMPLATE_COUNTERS, TOP_KITS, export_period, iter_template_rows, period_from_filename
+from .columnar import CategoricalColumn, Rows, bool_array, descending_order, int_array, true_rows
+from .file_snapshot import SnapshotCache, file_stamp
+
+try:  # Aceleração opcional (mesmo backend de columnar.py)
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+TEMPLATE_GLOB = "template-activity_*.csv"
+TEMPLATE_COUNTER_KEYS = tuple(TEMPLATE_COUNTERS)
+TEMPLATE_SORT_KEYS = TEMPLATE_COUNTER_KEYS + ("crescimento",)
+TEMPLATE_TOP_DEFAULT = TOP_KITS
+TEMPLATE_TOP_MAX = 500
+
+
+def template_files(data_dir: Path = DATA_DIR) -> List[Path]:
+    return export_files(TEMPLATE_GLOB, data_dir)
+
+
+def _template_key(row: Dict) -> str:
+    return row["id"] or f"sem-id:{row['nome']}"
+
+
+class TemplatePeriod:
+    """Uma exportação: contadores por modelo alinhados ao registro e ordens pré-calculadas."""
+
+    def __init__(self, start: int, end: int, path: Path, size: int, rows: Dict[int, Dict]):
+        self.start = start
+        self.end = end
+        self.key = f"{start}_{end}"
+        self.label = period_from_filename(path)
+        self.source = path.name
+        self.days = period_days(start, end)
+
+        self.present = bool_array(index in rows for index in range(size))
+        self.rows = true_rows(self.present)
+        self.counters = {
+            counter: int_array(rows[index][counter] if index in rows else 0 for index in range(size))
+            for counter in TEMPLATE_COUNTER_KEYS
+        }
+        self.order = {counter: descending_order(self.counters[counter], self.rows) for counter in TEMPLATE_COUNTER_KEYS}
+
+        # Preenchidos por TemplateIndex quando há exportação anterior comparável
+        self.previous: Optional["TemplatePeriod"] = None
+        self.usage_delta = None
+        self.growth_order: Rows = []
+
+    def compare_with(self, previous: "TemplatePeriod") -> None:
+        """Variação diária de uso por modelo em relação a ``previous``, ordenada da maior para a menor."""
+        self.previous = previous
+        current, before = self.counters["usadas"], previous.counters["usadas"]
+        self.usage_delta = [
+            current[index] / self.days - before[index] / previous.days for index in range(len(current))
+        ]
+        if np is not None:
+            self.usage_delta = np.asarray(self.usage_delta)
+            rows = np.flatnonzero(self.present | previous.present)
+        else:
+            rows = [index for index in range(len(current)) if self.present[index] or previous.present[index]]
+        self.growth_order = descending_order(self.usage_delta, rows)
+
+    def meta(self) -> Dict:
+        return {
+            "periodo": self.key,
+            "inicio": self.start,
+            "fim": self.end,
+            "dias": self.days,
+            "rotulo": self.label,
+            "arquivo": self.source,
+            "modelos": len(self.rows),
+            "comparado_com": self.previous.key if self.previous else None,
+        }
+
+
+class TemplateIndex:
+    """Registro de modelos (por ID do modelo) com as séries de uso de todas as exportações."""
+
+    def __init__(self, exports: List[Tuple[Path, List[Dict]]]):
+        keys: Dict[str, int] = {}
+        self.ids: List[str] = []
+        names: List[str] = []
+        types: List[str] = []
+        owners: List[str] = []
+        parsed = []
+        # Exportações em ordem cronológica: nome/tipo/titular ficam com o valor mais recente
+        for (start, end), path, templates in sorted(
+            ((export_period(path), path, templates) for path, templates in exports if export_period(path)),
+            key=lambda item: (item[0][1], item[0][0]),
+        ):
+            rows: Dict[int, Dict] = {}
+            for template in templates:
+                key = _template_key(template)
+                index = keys.get(key)
+                if index is None:
+                    index = keys[key] = len(self.ids)
+                    self.ids.append(template["id"])
+                    names.append("")
+                    types.append("")
+                    owners.append("")
+                names[index] = template["nome"] or names[index]
+                types[index] = template["tipo"] or types[index]
+                owners[index] = template["titular"] or owners[index]
+
+                existing = rows.get(index)
+                if existing is None:
+                    rows[index] = dict(template)
+                else:  # ID repetido na exportação: soma os contadores
+                    for counter in TEMPLATE_COUNTER_KEYS:
+                        existing[counter] += template[counter]
+            parsed.append((start, end, path, rows))
+
+        self._index = keys
+        self.names = names
+        self.types = CategoricalColumn(types)
+        self.owners = CategoricalColumn(owners)
+
+        size = len(self.ids)
+        self.periods: List[TemplatePeriod] = sorted(
+            (TemplatePeriod(start, end, path, size, rows) for start, end, path, rows in parsed),
+            key=lambda period: (period.start, -period.end),
+        )
+        self._by_key = {period.key: period for period in self.periods}
+        for period in self.periods:
+            previous = previous_export(self.periods, period)
+            if previous is not None:
+                period.compare_with(previous)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def period(self, key: Optional[str] = None) -> TemplatePeriod:
+        """Período pela chave ``<inicio>_<fim>``; sem chave, a janela mais recente."""
+        if not self.periods:
+            raise LookupError("Nenhuma exportação template-activity encontrada")
+        if key is None:
+            return self.periods[-1]
+        try:
+            return self._by_key[key]
+        except KeyError:
+            raise LookupError(f"Período desconhecido: {key}") from None
+
+    def item(self, period: TemplatePeriod, index: int) -> Dict:
+        """Modelo no formato de ``canva_metrics.kits``, com o crescimento quando houver base."""
+        item = {
+            "nome": self.names[index],
+            "id": self.ids[index],
+            "tipo": self.types[index],
+            "titular": self.owners[index],
+        }
+        item.update((counter, int(period.counters[counter][index])) for counter in TEMPLATE_COUNTER_KEYS)
+        previous = period.previous
+        if previous is not None:
+            item["usadas_anterior"] = int(previous.counters["usadas"][index])
+            item["crescimento"] = growth_percent(
+                item["usadas"] / period.days, item["usadas_anterior"] / previous.days
+            )
+        return item
+
+    def top(self, period: TemplatePeriod, sort: str = "usadas", limit: int = TEMPLATE_TOP_DEFAULT) -> List[Dict]:
+        """Os ``limit`` primeiros modelos pela ordem pré-calculada de ``sort``."""
+        order = period.growth_order if sort == "crescimento" else period.order[sort]
+        return [self.item(period, int(index)) for index in order[:limit]]
+
+    def series(self, template_id: str) -> Dict:
+        """Um modelo e seus contadores em cada exportação em que aparece."""
+        index = self._index.get(template_id)
+        if index is None:
+            raise LookupError(f"Modelo não encontrado: {template_id}")
+        series = []
+        for period in self.periods:
+            if period.present[index]:
+                entry = {"periodo": period.key, "rotulo": period.label, "dias": period.days}
+                entry.update((counter, int(period.counters[counter][index])) for counter in TEMPLATE_COUNTER_KEYS)
+                series.append(entry)
+        return {
+            "nome": self.names[index],
+            "id": self.ids[index],
+            "tipo": self.types[index],
+            "titular": self.owners[index],
+            "periodos": series,
+        }
+
+
+_indexes = SnapshotCache()
+
+
+def load_template_index(data_dir: Path = DATA_DIR) -> TemplateIndex:
+    """TemplateIndex das exportações, montado uma vez por versão dos arquivos (caminho, mtime e tamanho)."""
+    paths = template_files(data_dir)
+    key = tuple(file_stamp(path) for path in paths)
+    return _indexes.get(key, lambda: TemplateIndex([(path, list(iter_template_rows(path))) for path in paths]))
+
+
+def query_templates(
+    period_key: Optional[str] = None,
+    sort: str = "usadas",
+    limit: int = TEMPLATE_TOP_DEFAULT,
+    template_id: Optional[str] = None,
+    index: Optional[TemplateIndex] = None,
+) -> Dict:
+    """
+    Top-N de modelos de um período por ``usadas``, ``publicado``,
+    ``compartilhados`` ou ``crescimento`` (variação diária de uso sobre a
+    exportação anterior), ou a série de um modelo quando ``template_id`` é
+    informado. Levanta LookupError para período/modelo desconhecido e
+    ValueError para ordenação inválida.
+    """
+    if sort not in TEMPLATE_SORT_KEYS:
+        raise ValueError(f"ordenar deve ser um de: {', '.join(TEMPLATE_SORT_KEYS)}")
+    if index is None:
+        index = load_template_index()
+    if template_id:
+        return {"modelo": index.series(template_id)}
+
+    period = index.period(period_key)
+    limit = max(0, min(limit, TEMPLATE_TOP_MAX))
+    return {
+        "periodo": period.meta(),
+        "periodos": [other.meta() for other in index.periods],
+        "total_modelos": len(period.rows),
+        "ordenacao": sort,
+        "modelos": index.top(period, sort, limit),
+    }
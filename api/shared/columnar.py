@@ -0,0 +1,134 @@
+"""Colunas compactas para os datasets em memória (escolas, usuários).
+
+Cada coluna categórica guarda os valores distintos uma única vez (internados) e
+um vetor de códigos inteiros por linha. Contagens e group-bys viram operações
+sobre esses códigos: ``numpy.bincount`` quando o NumPy está instalado e um laço
+sobre ``array('i')`` caso contrário. Seleções de linhas são sequências de
+índices (``None`` significa todas as linhas).
+"""
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:  # Aceleração opcional
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+Rows = Optional[Sequence[int]]
+
+
+def int_array(values: Iterable[int]):
+    """Vetor de inteiros no backend disponível."""
+    packed = array("i", values)
+    if np is not None:
+        return np.frombuffer(packed, dtype=np.int32) if len(packed) else np.zeros(0, dtype=np.int32)
+    return packed
+
+
+def bool_array(values: Iterable[bool]):
+    if np is not None:
+        return np.fromiter(values, dtype=bool)
+    return array("b", (1 if value else 0 for value in values))
+
+
+def true_rows(flags) -> List[int]:
+    """Índices das linhas marcadas em um vetor booleano."""
+    if np is not None:
+        return np.flatnonzero(flags)
+    return [index for index, flag in enumerate(flags) if flag]
+
+
+def select_in(values, wanted, rows: Rows = None):
+    """Linhas (dentro de ``rows``) de um vetor de inteiros cujo valor está em ``wanted``."""
+    if np is not None:
+        values = np.asarray(values)
+        candidates = values if rows is None else values[rows]
+        matches = np.flatnonzero(np.isin(candidates, list(wanted)))
+        return matches if rows is None else np.asarray(rows)[matches]
+    wanted = set(wanted)
+    candidates = range(len(values)) if rows is None else rows
+    return [row for row in candidates if values[row] in wanted]
+
+
+def take(values, rows: Rows) -> List[int]:
+    """Valores de um vetor nas linhas selecionadas, como lista Python."""
+    if rows is None:
+        return values.tolist()
+    if np is not None:
+        return np.asarray(values)[rows].tolist()
+    return [values[row] for row in rows]
+
+
+def descending_order(values, rows: Rows = None):
+    """Linhas (dentro de ``rows``) ordenadas do maior para o menor valor; empates mantêm a ordem."""
+    if np is not None:
+        values = np.asarray(values)
+        candidates = np.arange(len(values)) if rows is None else np.asarray(rows, dtype=np.int64)
+        return candidates[np.argsort(-values[candidates], kind="stable")]
+    candidates = range(len(values)) if rows is None else rows
+    return sorted(candidates, key=lambda row: -values[row])
+
+
+class CategoricalColumn:
+    """Coluna de strings codificada como (categorias, códigos por linha)."""
+
+    def __init__(self, values: Iterable[str]):
+        self.categories: List[str] = []
+        self._index: Dict[str, int] = {}
+        codes = array("i")
+        for value in values:
+            code = self._index.get(value)
+            if code is None:
+                code = len(self.categories)
+                value = sys.intern(value)
+                self._index[value] = code
+                self.categories.append(value)
+            codes.append(code)
+        self.codes = int_array(codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, row: int) -> str:
+        return self.categories[self.codes[row]]
+
+    def code_of(self, value: str) -> Optional[int]:
+        return self._index.get(value)
+
+    def counts(self, rows: Rows = None) -> List[int]:
+        """Quantidade de linhas por código de categoria (mesma ordem de ``categories``)."""
+        size = len(self.categories)
+        if np is not None:
+            codes = self.codes if rows is None else self.codes[rows]
+            return np.bincount(codes, minlength=size).tolist()
+        totals = [0] * size
+        codes = self.codes
+        for row in range(len(codes)) if rows is None else rows:
+            totals[codes[row]] += 1
+        return totals
+
+    def sums(self, weights, rows: Rows = None) -> List[int]:
+        """Soma de ``weights`` (alinhado às linhas) por código de categoria."""
+        size = len(self.categories)
+        if np is not None:
+            codes = self.codes if rows is None else self.codes[rows]
+            values = weights if rows is None else np.asarray(weights)[rows]
+            return np.bincount(codes, weights=values, minlength=size).astype(np.int64).tolist()
+        totals = [0] * size
+        codes = self.codes
+        for row in range(len(codes)) if rows is None else rows:
+            totals[codes[row]] += weights[row]
+        return totals
+
+    def value_counts(self, rows: Rows = None) -> Dict[str, int]:
+        """Contagem por valor, omitindo categorias sem linhas na seleção."""
+        return {
+            category: count for category, count in zip(self.categories, self.counts(rows)) if count
+        }
+
+    def select(self, values: Iterable[str], rows: Rows = None):
+        """Linhas (dentro de ``rows``) cujo valor está em ``values``."""
+        wanted = {code for code in (self._index.get(value) for value in values) if code is not None}
+        return select_in(self.codes, wanted, rows)
+
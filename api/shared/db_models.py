@@ -36,6 +36,11 @@ class School(Base):
     license_limit: Mapped[int] = mapped_column(
         Integer, default=0, nullable=False, server_default=text("0")
     )
+    # Contador mantido pelas ações de licença (assign/revoke/transfer) na mesma
+    # transação; divergências são corrigidas por reconcile_usage_counters.
+    used_licenses: Mapped[int] = mapped_column(
+        Integer, default=0, nullable=False, server_default=text("0")
+    )
     status: Mapped[Optional[str]] = mapped_column(String, default="")
     contact_email: Mapped[Optional[str]] = mapped_column(String, default="")
     contact_phone: Mapped[Optional[str]] = mapped_column(String, default="")
@@ -44,6 +49,7 @@ class School(Base):
 
     __table_args__ = (
         CheckConstraint("license_limit >= 0", name="ck_schools_license_limit_nonnegative"),
+        CheckConstraint("used_licenses >= 0", name="ck_schools_used_licenses_nonnegative"),
     )
 
     users: Mapped[List["User"]] = relationship(
@@ -114,8 +120,12 @@ class AuditLog(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
+    # O filtro por actor (ILIKE '%..%') usa idx_audit_logs_actor_trgm (GIN/pg_trgm),
+    # criado apenas via migração por depender da extensão.
     __table_args__ = (
         Index("idx_audit_logs_school_id_ts", "school_id", ts.desc()),
+        Index("idx_audit_logs_ts_id", ts.desc(), id.desc()),
+        Index("idx_audit_logs_action_ts", "action", ts.desc()),
     )
 
 
@@ -0,0 +1,69 @@
+"""Classificador único de conformidade de e-mail (mesmas regras do safDataService no front).
+
+Um e-mail é conforme quando:
+- o domínio contém uma das palavras-chave corporativas (maplebear, mbcentral, sebsa, seb);
+- o domínio começa com ``mb`` + identificador da escola (ex.: mbmogidascruzes.com.br);
+- o local part começa com ``mb`` + identificador da escola (ex.: mbmogidascruzes@gmail.com).
+
+As regras são compiladas em duas expressões regulares. O resultado das regras de
+domínio é memorizado por domínio (LRU), já que poucos domínios se repetem em
+milhares de usuários.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+DOMAIN_KEYWORDS = ("maplebear", "mbcentral", "sebsa", "seb")
+SCHOOL_PREFIX = "mb"
+DOMAIN_CACHE_SIZE = 4096
+
+
+class EmailClassifier:
+    """Regras de conformidade compiladas a partir de DOMAIN_KEYWORDS e SCHOOL_PREFIX."""
+
+    def __init__(self, keywords: Iterable[str] = DOMAIN_KEYWORDS, prefix: str = SCHOOL_PREFIX):
+        # Palavras mais longas primeiro para a alternância não parar em um prefixo
+        alternatives = "|".join(re.escape(kw) for kw in sorted(set(keywords), key=len, reverse=True))
+        prefix = re.escape(prefix)
+        self._domain_re = re.compile(rf"^{prefix}[a-z0-9.-]{{2,}}$|{alternatives}")
+        self._local_re = re.compile(rf"{prefix}[a-z0-9._-]{{2,}}$")
+        self.domain_compliant = lru_cache(maxsize=DOMAIN_CACHE_SIZE)(self._match_domain)
+
+    def _match_domain(self, domain: str) -> bool:
+        return self._domain_re.search(domain) is not None
+
+    def is_compliant(self, email: str) -> bool:
+        normalized = (email or "").strip().lower()
+        if "@" not in normalized:
+            return False
+        parts = normalized.split("@")
+        return self.domain_compliant(parts[1]) or self._local_re.match(parts[0]) is not None
+
+    def classify_many(self, emails: Iterable[str]) -> List[bool]:
+        """Classifica um lote, avaliando as regras de domínio uma vez por domínio distinto."""
+        by_domain: Dict[str, bool] = {}
+        local_match = self._local_re.match
+        results = []
+        for email in emails:
+            normalized = (email or "").strip().lower()
+            if "@" not in normalized:
+                results.append(False)
+                continue
+            parts = normalized.split("@")
+            domain = parts[1]
+            compliant = by_domain.get(domain)
+            if compliant is None:
+                compliant = by_domain[domain] = self.domain_compliant(domain)
+            results.append(compliant or local_match(parts[0]) is not None)
+        return results
+
+
+email_classifier = EmailClassifier()
+
+
+def is_email_compliant(email: str) -> bool:
+    return email_classifier.is_compliant(email)
+
+
+def classify_many(emails: Iterable[str]) -> List[bool]:
+    return email_classifier.classify_many(emails)
@@ -0,0 +1,62 @@
+"""Utilitários compartilhados pelos serviços que leem arquivos de dados locais.
+
+Overview, atividade, modelos e vouchers leem CSVs de ``public/data`` (ou
+``api/local_data``) e mantêm em memória as estruturas montadas a partir deles.
+``file_stamp`` identifica a versão de um arquivo (caminho, mtime e tamanho) e
+``SnapshotCache`` guarda o valor montado enquanto os stamps não mudam.
+``normalize`` e ``column_indexes`` resolvem colunas pelos rótulos do cabeçalho.
+"""
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def normalize(text: str) -> str:
+    """Remove acentos e normaliza para comparações simples."""
+    if not text:
+        return ""
+    nfkd = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in nfkd if not unicodedata.combining(c)).lower().strip()
+
+
+def column_indexes(normalized_header: List[str], *labels: str) -> List[int]:
+    """Índices das colunas candidatas, na ordem de preferência dos rótulos."""
+    indexes = []
+    for label in labels:
+        norm = normalize(label)
+        if norm in normalized_header:
+            indexes.append(normalized_header.index(norm))
+    return indexes
+
+
+def file_stamp(path: Path) -> Tuple[str, int, int]:
+    """Versão de um arquivo: caminho, mtime (ns) e tamanho."""
+    stat = path.stat()
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+class SnapshotCache:
+    """
+    Valores montados a partir de arquivos, um por ``slot``, reconstruídos só
+    quando a chave (tipicamente uma tupla de ``file_stamp``) muda. A montagem
+    roda fora do lock: leituras concorrentes de uma versão nova podem montar o
+    valor mais de uma vez, mas nunca bloqueiam quem já tem a versão em cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[Hashable, object]] = {}
+
+    def get(self, key: Hashable, build: Callable[[], T], slot: Hashable = None) -> T:
+        with self._lock:
+            cached = self._entries.get(slot)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+        value = build()
+        with self._lock:
+            self._entries[slot] = (key, value)
+        return value
@@ -0,0 +1,214 @@
+"""Contêiner de Blob Storage em disco para desenvolvimento e testes.
+
+Implementa o subconjunto da API de ``ContainerClient``/``BlobClient`` usado
+por ``blob.py`` (upload/download com intervalo, condicionais por ETag, append
+blobs e propriedades), com as mesmas exceções de ``azure.core`` e os mesmos
+``error_code`` do serviço. Cada blob é um arquivo sob a pasta do contêiner;
+append blobs são marcados por um arquivo irmão ``<nome>.appendblob``.
+O marcador guarda os metadados do append blob (JSON), como ``create_append_blob``
+faz no serviço. ``append_block`` faz uma única escrita em modo ``O_APPEND`` sob lock, então
+blocos de threads diferentes nunca se misturam. Para testar contra o Azurite
+de verdade basta usar ``BLOB_CONNECTION_STRING=UseDevelopmentStorage=true``.
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+)
+
+APPEND_MARKER = ".appendblob"
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _path_lock(path: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def _error(exc_type, code: str, message: str, status_code: Optional[int] = None):
+    # Mesmo formato da mensagem do SDK, que termina com o código do erro
+    exc = exc_type(f"{message}\nErrorCode:{code}")
+    exc.error_code = code
+    if status_code is not None:
+        exc.status_code = status_code
+    return exc
+
+
+@dataclass
+class LocalBlobProperties:
+    name: str
+    size: int
+    etag: str
+    blob_type: str
+    metadata: Dict[str, str] = field(default_factory=dict)
+
+
+class LocalDownload:
+    def __init__(self, data: bytes, properties: LocalBlobProperties):
+        self._data = data
+        self.properties = properties
+        self.size = len(data)
+
+    def readall(self) -> bytes:
+        return self._data
+
+
+class LocalBlobClient:
+    def __init__(self, root: str, blob_name: str):
+        self.blob_name = blob_name
+        self.container_name = os.path.basename(root)
+        self.path = os.path.join(root, *blob_name.split("/"))
+        self.url = "file://" + self.path
+
+    # -- estado -------------------------------------------------------------
+
+    def _stat(self) -> Optional[os.stat_result]:
+        try:
+            return os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+    def _etag(self, stat: os.stat_result) -> str:
+        return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    def _blob_type(self) -> str:
+        return "AppendBlob" if os.path.exists(self.path + APPEND_MARKER) else "BlockBlob"
+
+    def _metadata(self) -> Dict[str, str]:
+        try:
+            with open(self.path + APPEND_MARKER, "rb") as handle:
+                return json.loads(handle.read() or b"{}")
+        except FileNotFoundError:
+            return {}
+
+    def _not_found(self):
+        return _error(ResourceNotFoundError, "BlobNotFound", f"The specified blob does not exist: {self.blob_name}")
+
+    def _check_conditions(self, stat: Optional[os.stat_result], etag: Optional[str], match_condition) -> None:
+        if match_condition == MatchConditions.IfMissing and stat is not None:
+            raise _error(ResourceExistsError, "BlobAlreadyExists", f"The specified blob already exists: {self.blob_name}")
+        if match_condition == MatchConditions.IfNotModified:
+            if stat is None:
+                raise self._not_found()
+            if self._etag(stat) != etag:
+                raise _error(ResourceModifiedError, "ConditionNotMet", "The condition specified using HTTP conditional header(s) is not met.", 412)
+        if match_condition == MatchConditions.IfModified and stat is not None and self._etag(stat) == etag:
+            # O serviço responde 304 e o SDK 12.x levanta ResourceModifiedError (não ResourceNotModifiedError)
+            raise _error(ResourceModifiedError, "ConditionNotMet", "The condition specified using HTTP conditional header(s) is not met.", 304)
+
+    def _write(self, data: bytes, blob_type: str, metadata: Optional[Dict[str, str]] = None) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_path, self.path)
+        marker = self.path + APPEND_MARKER
+        if blob_type == "AppendBlob":
+            with open(marker, "wb") as handle:
+                handle.write(json.dumps(metadata or {}).encode("utf-8"))
+        elif os.path.exists(marker):
+            os.remove(marker)
+
+    # -- API do BlobClient --------------------------------------------------
+
+    def exists(self) -> bool:
+        return self._stat() is not None
+
+    def get_blob_properties(self) -> LocalBlobProperties:
+        stat = self._stat()
+        if stat is None:
+            raise self._not_found()
+        return LocalBlobProperties(self.blob_name, stat.st_size, self._etag(stat), self._blob_type(), self._metadata())
+
+    def download_blob(
+        self, offset: Optional[int] = None, length: Optional[int] = None, etag: Optional[str] = None, match_condition=None, **kwargs
+    ) -> LocalDownload:
+        with _path_lock(self.path):
+            properties = self.get_blob_properties()
+            self._check_conditions(self._stat(), etag, match_condition)
+            with open(self.path, "rb") as handle:
+                if offset:
+                    handle.seek(offset)
+                data = handle.read() if length is None else handle.read(length)
+        return LocalDownload(data, properties)
+
+    def upload_blob(self, data, overwrite: bool = False, **kwargs) -> Dict:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with _path_lock(self.path):
+            if not overwrite and self._stat() is not None:
+                raise _error(ResourceExistsError, "BlobAlreadyExists", f"The specified blob already exists: {self.blob_name}")
+            self._write(bytes(data), "BlockBlob")
+            return {"etag": self._etag(self._stat())}
+
+    def create_append_blob(
+        self, metadata: Optional[Dict[str, str]] = None, etag: Optional[str] = None, match_condition=None, **kwargs
+    ) -> Dict:
+        """Cria (ou zera) o append blob, respeitando ``IfMissing``/``IfNotModified``."""
+        with _path_lock(self.path):
+            self._check_conditions(self._stat(), etag, match_condition)
+            self._write(b"", "AppendBlob", metadata)
+            return {"etag": self._etag(self._stat())}
+
+    def append_block(self, data, length: Optional[int] = None, **kwargs) -> Dict:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with _path_lock(self.path):
+            stat = self._stat()
+            if stat is None:
+                raise self._not_found()
+            if self._blob_type() != "AppendBlob":
+                raise _error(ResourceExistsError, "InvalidBlobType", "The blob type is invalid for this operation.")
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, bytes(data))
+            finally:
+                os.close(fd)
+            stat = self._stat()
+            return {"etag": self._etag(stat), "blob_append_offset": str(stat.st_size - len(data))}
+
+    def delete_blob(self, etag: Optional[str] = None, match_condition=None, **kwargs) -> None:
+        with _path_lock(self.path):
+            stat = self._stat()
+            if stat is None:
+                raise self._not_found()
+            self._check_conditions(stat, etag, match_condition)
+            os.remove(self.path)
+            if os.path.exists(self.path + APPEND_MARKER):
+                os.remove(self.path + APPEND_MARKER)
+
+
+class LocalBlobContainer:
+    """Pasta local com a mesma interface de ``ContainerClient`` usada pelo serviço."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.container_name = os.path.basename(self.root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def get_blob_client(self, blob: str) -> LocalBlobClient:
+        return LocalBlobClient(self.root, blob)
+
+    def list_blobs(self, name_starts_with: Optional[str] = None, **kwargs) -> Iterator[LocalBlobProperties]:
+        names = []
+        for directory, _, files in os.walk(self.root):
+            for filename in files:
+                if filename.endswith(APPEND_MARKER) or filename.endswith(".tmp"):
+                    continue
+                name = os.path.relpath(os.path.join(directory, filename), self.root).replace(os.sep, "/")
+                if not name_starts_with or name.startswith(name_starts_with):
+                    names.append(name)
+        for name in sorted(names):
+            try:
+                yield self.get_blob_client(name).get_blob_properties()
+            except ResourceNotFoundError:
+                continue
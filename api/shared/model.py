@@ -1,7 +1,29 @@
 # Data models and schemas
-from dataclasses import dataclass, asdict
+import json
+import os
+from dataclasses import dataclass, fields, is_dataclass
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
+
+from .email_compliance import email_classifier
+
+try:  # Encoder acelerado opcional
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+def _field_names(cls) -> tuple:
+    names = cls.__dict__.get('_field_names')
+    if names is None:
+        names = tuple(f.name for f in fields(cls))
+        cls._field_names = names
+    return names
+
+
+def dataclass_to_dict(obj) -> Dict[str, Any]:
+    """Converte um dataclass em dict raso (sem a cópia recursiva de asdict)."""
+    return {name: getattr(obj, name) for name in _field_names(type(obj))}
 
 @dataclass
 class OfficialSchool:
@@ -25,7 +47,7 @@ class OfficialSchool:
     used_licenses: int = 0
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return dataclass_to_dict(self)
 
 @dataclass
 class OfficialUser:
@@ -40,7 +62,7 @@ class OfficialUser:
     is_compliant: bool = True  # Email domain check
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return dataclass_to_dict(self)
 
 @dataclass
 class SchoolOverview:
@@ -59,7 +81,7 @@ class SchoolOverview:
     contact: Dict[str, str]
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return dataclass_to_dict(self)
 
 @dataclass
 class LicenseAction:
@@ -73,7 +95,7 @@ class LicenseAction:
     new_limit: Optional[int] = None
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return dataclass_to_dict(self)
 
 @dataclass
 class AuditLogEntry:
@@ -86,7 +108,7 @@ class AuditLogEntry:
     ts: Optional[str] = None  # Will be set by blob service
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return dataclass_to_dict(self)
 
 class LicenseBadgeHelper:
     """Helper class for generating license badges"""
@@ -116,24 +138,12 @@ class LicenseBadgeHelper:
             }
 
 class EmailComplianceHelper:
-    """Helper for checking email domain compliance"""
-    
-    ALLOWED_DOMAINS = [
-        '@maplebear.com.br',
-        '@mbcentral.com.br',
-        '@seb.com.br',
-        '@sebsa.com.br'
-    ]
+    """Helper for checking email domain compliance (regras em email_compliance.py)"""
     
     @classmethod
     def is_email_compliant(cls, email: str) -> bool:
         """Check if email belongs to allowed domains"""
-        if not email:
-            return False
-        
-        email_lower = email.lower()
-        domain_part = email_lower.split('@')[-1]
-        return any(domain in email_lower for domain in cls.ALLOWED_DOMAINS) or ("maplebear" in domain_part)
+        return email_classifier.is_compliant(email)
 
 
 class StatusLicencaHelper:
@@ -170,4 +180,44 @@ class APIResponse:
             "success": False,
             "message": message,
             "code": code
-        }
\ No newline at end of file
+        }
+
+
+class JSONSerializer:
+    """Serializa respostas da API direto dos dataclasses, sem passar por asdict.
+
+    Usa orjson quando instalado e o json da stdlib caso contrário. Indentação só
+    é aplicada com ``pretty=True`` fora de produção.
+    """
+
+    def __init__(self, pretty: bool = False):
+        production = os.environ.get('ENVIRONMENT', 'development').lower() == 'production'
+        self.pretty = pretty and not production
+        self.accelerated = orjson is not None
+        if self.accelerated:
+            self._options = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if self.pretty else 0)
+        else:
+            self._encoder = json.JSONEncoder(
+                ensure_ascii=False,
+                indent=2 if self.pretty else None,
+                separators=None if self.pretty else (',', ':'),
+                default=self._default,
+            )
+
+    @staticmethod
+    def _default(obj):
+        if is_dataclass(obj):
+            return dataclass_to_dict(obj)
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def dumps(self, obj: Any) -> bytes:
+        """Retorna o JSON já codificado em UTF-8."""
+        if self.accelerated:
+            return orjson.dumps(obj, default=self._default, option=self._options)
+        return self._encoder.encode(obj).encode('utf-8')
+
+
+json_serializer = JSONSerializer()
+pretty_json_serializer = JSONSerializer(pretty=True)
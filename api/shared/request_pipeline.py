@@ -0,0 +1,180 @@
+"""Pipeline comum das HTTP functions: método/CORS, autenticação com cache e JSON.
+
+Uso típico em ``<function>/__init__.py``::
+
+    @http_endpoint(methods=("GET",), role="agente")
+    def main(req: func.HttpRequest, user: dict) -> func.HttpResponse:
+        return json_response(data_service.get_schools_overview())
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import azure.functions as func
+
+from .auth import verify_token, check_permission
+from .model import json_serializer
+
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+# Payloads de JWT já verificados ficam em cache por no máximo este tempo (e nunca
+# além do ``exp`` do token); limita a defasagem caso um usuário seja removido.
+TOKEN_CACHE_TTL_SECONDS = float(os.environ.get("TOKEN_CACHE_TTL_SECONDS", "60"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("TOKEN_CACHE_MAX_ENTRIES", "1024"))
+
+
+def dumps(payload: Any) -> bytes:
+    """Encoder JSON único das respostas (UTF-8 compacto; aceita dataclasses)."""
+    return json_serializer.dumps(payload)
+
+
+@lru_cache(maxsize=None)
+def cors_headers(methods: Tuple[str, ...]) -> Dict[str, str]:
+    """Cabeçalhos CORS pré-computados por conjunto de métodos (não modificar)."""
+    return {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": ", ".join(methods + ("OPTIONS",)),
+        "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    }
+
+
+def json_response(payload: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> func.HttpResponse:
+    response_headers = {"Content-Type": JSON_CONTENT_TYPE}
+    if headers:
+        response_headers.update(headers)
+    return func.HttpResponse(dumps(payload), status_code=status_code, headers=response_headers)
+
+
+def error_response(message: str, status_code: int = 400) -> func.HttpResponse:
+    return json_response({"success": False, "message": message}, status_code=status_code)
+
+
+def result_response(result: Dict[str, Any]) -> func.HttpResponse:
+    """Resposta para os dicts de APIResponse: 200 em sucesso, 400 em erro."""
+    return json_response(result, status_code=200 if result.get("success") else 400)
+
+
+class TokenCache:
+    """Cache LRU de payloads de JWT verificados, indexado pelo hash do token."""
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES, ttl: float = TOKEN_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, token: str, payload: Dict) -> None:
+        expires_at = time.time() + self.ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def verify_token_cached(token: str) -> Optional[Dict]:
+    """verify_token com cache; só payloads válidos são guardados."""
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = verify_token(token)
+        if payload and "error" not in payload:
+            token_cache.put(token, payload)
+    return payload
+
+
+def authenticate(
+    req: func.HttpRequest,
+    role: str,
+    forbidden_message: str = "Permissão insuficiente",
+) -> Tuple[Optional[Dict], Optional[func.HttpResponse]]:
+    """Valida o Bearer token e o perfil; retorna (payload, None) ou (None, resposta de erro)."""
+    auth_header = req.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return None, error_response("Token de autorização necessário", 401)
+
+    payload = verify_token_cached(auth_header[7:])
+    if not payload or "error" in payload:
+        message = payload.get("message") if payload else None
+        return None, error_response(message or "Token inválido ou expirado", 401)
+
+    if not check_permission(payload.get("role", ""), role):
+        return None, error_response(forbidden_message, 403)
+
+    return payload, None
+
+
+def http_endpoint(
+    methods: Tuple[str, ...] = ("GET",),
+    role: Optional[str] = "agente",
+    forbidden_message: str = "Permissão insuficiente",
+) -> Callable[[Callable[[func.HttpRequest, Optional[Dict]], func.HttpResponse]], Callable]:
+    """Envolve um handler ``(req, user) -> HttpResponse`` com o pipeline comum.
+
+    Responde OPTIONS, recusa métodos fora de ``methods`` (405), autentica quando
+    ``role`` é informado, converte exceções em 500 e aplica os cabeçalhos CORS.
+    """
+    allowed = tuple(method.upper() for method in methods)
+    headers = cors_headers(allowed)
+
+    def decorator(handler):
+        # Sem functools.wraps: o worker do Azure Functions inspeciona a assinatura
+        # de ``main`` (e seguiria __wrapped__ até o handler com ``user``).
+        def main(req: func.HttpRequest) -> func.HttpResponse:
+            if req.method == "OPTIONS":
+                response = func.HttpResponse("", status_code=200)
+            elif req.method not in allowed:
+                response = error_response("Method not allowed", 405)
+            else:
+                try:
+                    user = None
+                    response = None
+                    if role is not None:
+                        user, response = authenticate(req, role, forbidden_message)
+                    if response is None:
+                        response = handler(req, user)
+                except Exception as e:
+                    response = error_response(f"Erro interno: {str(e)}", 500)
+
+            for name, value in headers.items():
+                if name not in response.headers:
+                    response.headers[name] = value
+            return response
+
+        main.__name__ = handler.__name__
+        main.__doc__ = handler.__doc__
+        main.handler = handler
+        return main
+
+    return decorator
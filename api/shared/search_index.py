@@ -0,0 +1,148 @@
+"""Índice de busca em memória (typeahead) de escolas e usuários.
+
+Os textos são normalizados com ``normalize`` (sem acentos, minúsculas) e
+quebrados em tokens de letras ou de dígitos; ``ana.silva2@sinop.maplebear.com.br``
+vira ``ana``, ``silva``, ``2``, ``sinop``... Cada termo da consulta casa com o prefixo de
+algum token do documento e todos os termos precisam casar. O vocabulário fica
+ordenado, então um prefixo é um intervalo achado por ``bisect``.
+"""
+import bisect
+import heapq
+import re
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from .file_snapshot import normalize
+
+SEARCH_LIMIT_DEFAULT = 20
+SEARCH_LIMIT_MAX = 100
+
+_TOKEN_RE = re.compile(r"[a-z]+|[0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(normalize(text or ""))
+
+
+class PrefixIndex:
+    """Índice invertido token -> documentos, consultado por prefixo de token."""
+
+    def __init__(self, documents: Iterable[Tuple[Hashable, Iterable[str]]] = ()):
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._tokens: Dict[Hashable, Tuple[str, ...]] = {}
+        self._sort_keys: Dict[Hashable, str] = {}
+        for key, texts in documents:
+            self._index(key, list(texts))
+        self._vocabulary: List[str] = sorted(self._postings)
+        # (texto principal normalizado, chave) em ordem alfabética
+        self._ordered: List[Tuple[str, Hashable]] = sorted((sort_key, key) for key, sort_key in self._sort_keys.items())
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tokens
+
+    def _index(self, key: Hashable, texts: List[str]) -> None:
+        tokens = tuple(dict.fromkeys(token for text in texts for token in tokenize(text)))
+        self._tokens[key] = tokens
+        self._sort_keys[key] = " ".join(tokenize(texts[0])) if texts else ""
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(key)
+
+    def _prefix_postings(self, prefix: str) -> List[Set[Hashable]]:
+        vocabulary = self._vocabulary
+        position = bisect.bisect_left(vocabulary, prefix)
+        postings = []
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            postings.append(self._postings[vocabulary[position]])
+            position += 1
+        return postings
+
+    def _has_prefix(self, key: Hashable, prefix: str) -> bool:
+        return any(token.startswith(prefix) for token in self._tokens[key])
+
+    def _matches(self, terms: List[str]) -> Set[Hashable]:
+        """Documentos em que cada termo é prefixo de algum token."""
+        postings = {term: self._prefix_postings(term) for term in terms}
+        terms = sorted(terms, key=lambda term: sum(len(posting) for posting in postings[term]))
+
+        # O termo mais seletivo monta os candidatos; os demais só os filtram
+        candidates: Set[Hashable] = set().union(*postings[terms[0]])
+        for term in terms[1:]:
+            if not candidates:
+                break
+            if len(postings[term]) < len(candidates):
+                candidates = set().union(*(candidates & posting for posting in postings[term]))
+            else:
+                candidates = {key for key in candidates if self._has_prefix(key, term)}
+        return candidates
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT_DEFAULT) -> Tuple[List[Hashable], int]:
+        """(até ``limit`` chaves, total de documentos que casam com todos os termos).
+
+        Primeiro vêm os documentos cujo texto principal começa pela consulta,
+        depois os demais, ambos em ordem alfabética.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return [], 0
+        candidates = self._matches(list(dict.fromkeys(tokens)))
+
+        phrase = " ".join(tokens)
+        ordered = self._ordered
+        first: List[Hashable] = []
+        position = bisect.bisect_left(ordered, (phrase,))
+        while len(first) < limit and position < len(ordered) and ordered[position][0].startswith(phrase):
+            if ordered[position][1] in candidates:
+                first.append(ordered[position][1])
+            position += 1
+
+        remaining = limit - len(first)
+        if remaining <= 0:
+            return first, len(candidates)
+        if len(candidates) * 4 >= len(ordered):
+            # Resultado denso: percorrer a ordem alfabética acha os primeiros logo
+            chosen = set(first)
+            for _, key in ordered:
+                if key in candidates and key not in chosen:
+                    first.append(key)
+                    if len(first) == limit:
+                        break
+            return first, len(candidates)
+        rest = heapq.nsmallest(remaining, candidates.difference(first), key=self._sort_keys.__getitem__)
+        return first + rest, len(candidates)
+
+
+class DirectoryIndex:
+    """Escolas (nome, cidade) e usuários (e-mail, nome) prontos para o typeahead."""
+
+    def __init__(self, schools: Iterable[Dict], users: Iterable[Dict]):
+        self.schools: Dict[str, Dict] = {school["id"]: dict(school) for school in schools}
+        self.users: Dict[str, Dict] = {}
+        for user in users:
+            self.users[user["email"].lower()] = dict(user)
+        self.school_index = PrefixIndex(
+            (school_id, (school.get("name", ""), school.get("city", ""))) for school_id, school in self.schools.items()
+        )
+        self.user_index = PrefixIndex(
+            (email, (user["email"], user.get("name", ""))) for email, user in self.users.items()
+        )
+
+    def search_schools(self, query: str, limit: int = SEARCH_LIMIT_DEFAULT) -> Dict:
+        keys, total = self.school_index.search(query, limit)
+        return {"total": total, "items": [self.schools[key] for key in keys]}
+
+    def search_users(self, query: str, limit: int = SEARCH_LIMIT_DEFAULT) -> Dict:
+        keys, total = self.user_index.search(query, limit)
+        items = []
+        for key in keys:
+            user = self.users[key]
+            school = self.schools.get(user.get("school_id"), {})
+            items.append({**user, "school_name": school.get("name", "")})
+        return {"total": total, "items": items}
+
+    def set_license(self, email: Optional[str], has_canva: bool) -> None:
+        """Atualiza o status de licença exibido nos resultados (não mexe nos tokens)."""
+        user = self.users.get((email or "").lower())
+        if user is not None:
+            user["has_canva"] = has_canva
@@ -1,13 +1,22 @@
 """Business logic backed by Postgres (Neon) via SQLAlchemy."""
 from __future__ import annotations
 
+import base64
+import json
+import os
+import threading
+import time
 from collections import Counter
-from typing import Dict, List
+from dataclasses import replace
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-from sqlalchemy import func, select
+from sqlalchemy import func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import JSONB
 
 from .db import get_session
 from .db_models import AuditLog, School, User
+from .search_index import SEARCH_LIMIT_DEFAULT, SEARCH_LIMIT_MAX, DirectoryIndex
 from .model import (
     OfficialUser,
     SchoolOverview,
@@ -19,27 +28,213 @@ from .model import (
 # Limite padrão caso não haja valor salvo no banco
 DEFAULT_MAX_LICENSE_LIMIT = 2
 
+# Filtros aceitos por set_global_license_limit
+LIMIT_FILTER_COLUMNS = {
+    "cluster": School.cluster,
+    "region": School.region,
+    "status": School.status,
+}
+
+# Tamanho de página padrão/máximo de get_audit_log_page
+AUDIT_PAGE_DEFAULT = 100
+AUDIT_PAGE_MAX = 1000
+
+# Máximo de itens aceitos por chamada de bulk_license_actions
+BULK_MAX_ACTIONS = 500
+
+BULK_SUCCESS_MESSAGES = {
+    "assign": "Licença atribuída com sucesso",
+    "revoke": "Licença revogada com sucesso",
+    "transfer": "Licença transferida com sucesso",
+}
+
+# Tempo máximo (s) que o overview fica em cache no worker. Escritas feitas por
+# este worker atualizam o cache na hora; o TTL cobre escritas de outros workers.
+SCHOOLS_OVERVIEW_CACHE_TTL = float(os.environ.get("SCHOOLS_OVERVIEW_CACHE_TTL", "30"))
+
+# Idem para o índice de busca; ações de licença deste worker o atualizam na hora
+SEARCH_INDEX_CACHE_TTL = float(os.environ.get("SEARCH_INDEX_CACHE_TTL", "300"))
+
+SEARCH_KINDS = ("todos", "escolas", "usuarios")
+
+
+def _is_date_only(value: str) -> bool:
+    """True para datas sem hora ('YYYY-MM-DD'); o limite final então inclui o dia inteiro."""
+    try:
+        date.fromisoformat(value.strip())
+    except ValueError:
+        return False
+    return True
+
+
+def _parse_audit_bound(value: str) -> datetime:
+    """Converte 'YYYY-MM-DD' ou ISO 8601 em datetime com fuso (UTC se ausente)."""
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Data inválida: {value}") from None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _encode_audit_cursor(log: AuditLog) -> str:
+    raw = json.dumps([log.ts.isoformat(), log.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_audit_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        ts, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(ts), int(log_id)
+    except Exception:
+        raise ValueError("Cursor inválido") from None
+
+
+class SchoolsOverviewCache:
+    """Cache versionado do overview de escolas, compartilhado pelo worker.
+
+    Cada escrita incrementa ``version``; um carregamento iniciado antes de uma
+    escrita não é gravado no cache, evitando publicar dados já obsoletos.
+    """
+
+    def __init__(self, ttl: float = SCHOOLS_OVERVIEW_CACHE_TTL):
+        self.ttl = ttl
+        self.version = 0
+        self._lock = threading.Lock()
+        self._items: Optional[List[SchoolOverview]] = None
+        self._index: Dict[str, int] = {}
+        self._loaded_at = 0.0
+
+    def get(self) -> Optional[List[SchoolOverview]]:
+        with self._lock:
+            if self._items is None:
+                return None
+            if self.ttl >= 0 and time.monotonic() - self._loaded_at > self.ttl:
+                self._items = None
+                return None
+            return list(self._items)
+
+    def store(self, items: List[SchoolOverview], version: int) -> None:
+        with self._lock:
+            if version != self.version:
+                return
+            self._items = list(items)
+            self._index = {item.id: pos for pos, item in enumerate(self._items)}
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._items = None
+            self._index = {}
+
+    def patch_usage(self, school_id: str, delta: int) -> None:
+        """Ajusta ``used`` de uma escola sem recarregar a lista inteira."""
+        with self._lock:
+            self.version += 1
+            pos = self._index.get(school_id)
+            if self._items is None or pos is None:
+                return
+            item = self._items[pos]
+            used = max(item.used + delta, 0)
+            self._items[pos] = replace(
+                item, used=used, badge=LicenseBadgeHelper.generate_badge(used, item.limit)
+            )
+
+    def patch_limit(self, new_limit: int, school_ids: Optional[Iterable[str]] = None) -> None:
+        """Atualiza o limite das escolas informadas (ou de todas quando ``school_ids`` é None)."""
+        limit = new_limit or DEFAULT_MAX_LICENSE_LIMIT
+        with self._lock:
+            self.version += 1
+            if self._items is None:
+                return
+            if school_ids is None:
+                positions = range(len(self._items))
+            else:
+                positions = [self._index[sid] for sid in school_ids if sid in self._index]
+            for pos in positions:
+                item = self._items[pos]
+                self._items[pos] = replace(
+                    item, limit=limit, badge=LicenseBadgeHelper.generate_badge(item.used, limit)
+                )
+
+
+class SearchIndexCache:
+    """Índice de busca do worker, versionado como o SchoolsOverviewCache.
+
+    Ações de licença atualizam o status dos usuários no índice já carregado em
+    vez de reconstruí-lo; um carregamento iniciado antes de uma escrita é
+    descartado.
+    """
+
+    def __init__(self, ttl: float = SEARCH_INDEX_CACHE_TTL):
+        self.ttl = ttl
+        self.version = 0
+        self._lock = threading.Lock()
+        self._index: Optional[DirectoryIndex] = None
+        self._loaded_at = 0.0
+
+    def get(self) -> Optional[DirectoryIndex]:
+        with self._lock:
+            if self._index is None:
+                return None
+            if self.ttl >= 0 and time.monotonic() - self._loaded_at > self.ttl:
+                self._index = None
+                return None
+            return self._index
+
+    def store(self, index: DirectoryIndex, version: int) -> None:
+        with self._lock:
+            if version != self.version:
+                return
+            self._index = index
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._index = None
+
+    def set_licenses(self, changes: Iterable[Tuple[Optional[str], bool]]) -> None:
+        """Aplica ``(email, has_canva)`` ao índice carregado."""
+        with self._lock:
+            self.version += 1
+            if self._index is None:
+                return
+            for email, has_canva in changes:
+                self._index.set_license(email, has_canva)
+
 
 class DataProcessingService:
     """Service layer que lê/escreve no Postgres."""
 
+    def __init__(
+        self,
+        overview_cache: Optional[SchoolsOverviewCache] = None,
+        search_cache: Optional[SearchIndexCache] = None,
+    ):
+        self.overview_cache = overview_cache or SchoolsOverviewCache()
+        self.search_cache = search_cache or SearchIndexCache()
+
     # --- Consultas ---
     def get_schools_overview(self) -> List[SchoolOverview]:
-        """Lista escolas com uso de licenças calculado a partir do banco."""
+        """Lista escolas com uso de licenças (servido do cache do worker quando válido)."""
+        cached = self.overview_cache.get()
+        if cached is not None:
+            return cached
+
+        version = self.overview_cache.version
+        overviews = self._load_schools_overview()
+        self.overview_cache.store(overviews, version)
+        return overviews
+
+    def _load_schools_overview(self) -> List[SchoolOverview]:
+        """Lista escolas com uso de licenças lido do contador ``used_licenses``."""
         with get_session() as session:
-            usage_rows = (
-                session.execute(
-                    select(User.school_id, func.count())
-                    .where(User.has_canva.is_(True))
-                    .group_by(User.school_id)
-                ).all()
-            )
-            usage_map = {sid: cnt for sid, cnt in usage_rows}
             schools = session.execute(select(School)).scalars().all()
 
         overviews: List[SchoolOverview] = []
         for school in schools:
-            used = usage_map.get(school.id, 0)
+            used = school.used_licenses or 0
             limit = school.license_limit or DEFAULT_MAX_LICENSE_LIMIT
             overviews.append(
                 SchoolOverview(
@@ -90,58 +285,157 @@ class DataProcessingService:
             )
         return result
 
+    def search(self, query: str, kind: str = "todos", limit: int = SEARCH_LIMIT_DEFAULT) -> Dict[str, any]:
+        """Typeahead de escolas (nome, cidade) e usuários (e-mail, nome) por prefixo, sem acentos."""
+        if kind not in SEARCH_KINDS:
+            raise ValueError(f"tipo deve ser um de: {', '.join(SEARCH_KINDS)}")
+        limit = max(1, min(limit, SEARCH_LIMIT_MAX))
+        index = self._search_index()
+
+        result: Dict[str, any] = {"query": query}
+        if kind in ("todos", "escolas"):
+            result["schools"] = index.search_schools(query, limit)
+        if kind in ("todos", "usuarios"):
+            result["users"] = index.search_users(query, limit)
+        return result
+
+    def _search_index(self) -> DirectoryIndex:
+        cached = self.search_cache.get()
+        if cached is not None:
+            return cached
+
+        version = self.search_cache.version
+        with get_session() as session:
+            schools = session.execute(
+                select(School.id, School.name, School.city, School.state, School.cluster, School.status)
+            ).all()
+            users = session.execute(
+                select(User.email, User.name, User.school_id, User.has_canva, User.is_compliant)
+            ).all()
+
+        index = DirectoryIndex(
+            (
+                {
+                    "id": row.id,
+                    "name": row.name or "",
+                    "city": row.city or "",
+                    "state": row.state or "",
+                    "cluster": row.cluster or "",
+                    "status": row.status or "",
+                }
+                for row in schools
+            ),
+            (
+                {
+                    "email": row.email,
+                    "name": row.name or "",
+                    "school_id": row.school_id,
+                    "has_canva": bool(row.has_canva),
+                    "is_compliant": bool(row.is_compliant),
+                }
+                for row in users
+            ),
+        )
+        self.search_cache.store(index, version)
+        return index
+
     # --- Ações de licença ---
     def assign_license(self, action: LicenseAction, actor: str) -> Dict[str, any]:
-        """Concede licença a um usuário."""
+        """Concede licença a um usuário.
+
+        Reserva da vaga, concessão e auditoria vão num único statement: o UPDATE
+        condicional em ``schools`` trava a linha da escola, então workers
+        concorrentes são serializados e o limite é reavaliado após o lock.
+        """
         try:
             with get_session() as session:
-                school = session.get(School, action.school_id)
-                if not school:
-                    return APIResponse.error("Escola não encontrada")
-
-                user = (
-                    session.execute(
-                        select(User).where(
-                            User.school_id == action.school_id,
-                            User.email == action.user_email,
-                        )
-                    )
-                    .scalars()
-                    .first()
-                )
-                if not user:
-                    return APIResponse.error("Usuário não encontrado na escola")
-                if user.has_canva:
-                    return APIResponse.error("Usuário já possui licença Canva")
-                if not user.is_compliant:
-                    return APIResponse.error("Email do usuário não pertence a domínio autorizado")
+                granted = session.execute(self._assign_statement(action, actor)).scalar_one()
 
-                used = (
-                    session.execute(
-                        select(func.count())
-                        .select_from(User)
-                        .where(User.school_id == action.school_id, User.has_canva.is_(True))
-                    ).scalar_one()
-                )
-                limit = school.license_limit or DEFAULT_MAX_LICENSE_LIMIT
-                if used >= limit:
-                    return APIResponse.error("Limite de licenças atingido para a escola")
-
-                user.has_canva = True
-                session.add(
-                    self._build_audit(
-                        "assign",
-                        action,
-                        actor,
-                        {"user_email": action.user_email, "motivo": action.motivo, "ticket": action.ticket},
-                    )
-                )
+                if not granted:
+                    # Desfaz um eventual incremento do contador (vaga reservada
+                    # enquanto outra requisição concedia a mesma licença).
+                    session.rollback()
+                    return APIResponse.error(self._assign_failure_reason(session, action))
                 session.commit()
 
+            self.overview_cache.patch_usage(action.school_id, 1)
+            self.search_cache.set_licenses([(action.user_email, True)])
             return APIResponse.success(message="Licença atribuída com sucesso")
         except Exception as e:
             return APIResponse.error(f"Erro ao atribuir licença: {str(e)}")
 
+    def _assign_statement(self, action: LicenseAction, actor: str):
+        """WITH slot (UPDATE schools) -> granted (UPDATE users) -> audit (INSERT)."""
+        limit_expr = func.coalesce(func.nullif(School.license_limit, 0), DEFAULT_MAX_LICENSE_LIMIT)
+        eligible = (
+            select(User.id)
+            .where(
+                User.school_id == action.school_id,
+                User.email == action.user_email,
+                User.has_canva.isnot(True),
+                User.is_compliant.is_(True),
+            )
+            .exists()
+        )
+        slot = (
+            update(School)
+            .where(School.id == action.school_id, School.used_licenses < limit_expr, eligible)
+            .values(used_licenses=School.used_licenses + 1)
+            .returning(School.id)
+            .cte("slot")
+        )
+        granted = (
+            update(User)
+            .where(
+                User.school_id.in_(select(slot.c.id)),
+                User.email == action.user_email,
+                User.has_canva.isnot(True),
+            )
+            .values(has_canva=True)
+            .returning(User.id)
+            .cte("granted")
+        )
+        payload = {"user_email": action.user_email, "motivo": action.motivo, "ticket": action.ticket}
+        audit = (
+            insert(AuditLog)
+            .from_select(
+                ["action", "school_id", "actor", "payload"],
+                select(
+                    literal("assign"),
+                    literal(action.school_id),
+                    literal(actor),
+                    literal(payload, type_=JSONB),
+                ).select_from(granted),
+            )
+            .returning(AuditLog.id)
+            .cte("audit")
+        )
+        # audit -> granted -> slot: referenciar a última CTE traz as demais para o WITH
+        return select(func.count()).select_from(audit)
+
+    def _assign_failure_reason(self, session, action: LicenseAction) -> str:
+        """Explica por que a atribuição não ocorreu (só roda no caminho de erro)."""
+        school = session.get(School, action.school_id)
+        if not school:
+            return "Escola não encontrada"
+        user = (
+            session.execute(
+                select(User).where(
+                    User.school_id == action.school_id,
+                    User.email == action.user_email,
+                )
+            )
+            .scalars()
+            .first()
+        )
+        if not user:
+            return "Usuário não encontrado na escola"
+        if user.has_canva:
+            return "Usuário já possui licença Canva"
+        if not user.is_compliant:
+            return "Email do usuário não pertence a domínio autorizado"
+        return "Limite de licenças atingido para a escola"
+
     def revoke_license(self, action: LicenseAction, actor: str) -> Dict[str, any]:
         """Revoga licença de um usuário."""
         try:
@@ -161,7 +455,11 @@ class DataProcessingService:
                 if not user.has_canva:
                     return APIResponse.error("Usuário não possui licença Canva")
 
-                user.has_canva = False
+                # Condicional para que revogações concorrentes decrementem uma vez só
+                if not self._set_has_canva(session, user.id, False):
+                    session.rollback()
+                    return APIResponse.error("Usuário não possui licença Canva")
+                self._bump_usage(session, action.school_id, -1)
                 session.add(
                     self._build_audit(
                         "revoke",
@@ -172,10 +470,25 @@ class DataProcessingService:
                 )
                 session.commit()
 
+            self.overview_cache.patch_usage(action.school_id, -1)
+            self.search_cache.set_licenses([(action.user_email, False)])
             return APIResponse.success(message="Licença revogada com sucesso")
         except Exception as e:
             return APIResponse.error(f"Erro ao revogar licença: {str(e)}")
 
+    def _set_has_canva(self, session, user_id, has_canva: bool) -> int:
+        """UPDATE condicional de ``has_canva``; devolve 0 se o usuário já estava nesse estado."""
+        if has_canva:
+            conditions = [User.id == user_id, User.has_canva.isnot(True), User.is_compliant.is_(True)]
+        else:
+            conditions = [User.id == user_id, User.has_canva.is_(True)]
+        return session.execute(
+            update(User)
+            .where(*conditions)
+            .values(has_canva=has_canva)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
     def transfer_license(self, action: LicenseAction, actor: str) -> Dict[str, any]:
         """Transfere licença entre usuários da mesma escola."""
         try:
@@ -212,8 +525,19 @@ class DataProcessingService:
                 if not to_user.is_compliant:
                     return APIResponse.error("Email do usuário de destino não é de domínio autorizado")
 
-                from_user.has_canva = False
-                to_user.has_canva = True
+                # Condicionais, como na revogação: uma revogação ou transferência
+                # concorrente faz um dos UPDATEs não afetar linhas e a transferência
+                # é desfeita. A ordem por id evita deadlock entre transferências opostas.
+                targets = {from_user.id: False, to_user.id: True}
+                changed = {
+                    user_id: self._set_has_canva(session, user_id, has_canva)
+                    for user_id, has_canva in sorted(targets.items())
+                }
+                if not changed[from_user.id] or not changed[to_user.id]:
+                    session.rollback()
+                    if not changed[from_user.id]:
+                        return APIResponse.error("Usuário de origem não possui licença Canva")
+                    return APIResponse.error("Usuário de destino já possui licença Canva")
                 session.add(
                     self._build_audit(
                         "transfer",
@@ -229,10 +553,181 @@ class DataProcessingService:
                 )
                 session.commit()
 
+            # Origem e destino são da mesma escola: o uso não muda, só a versão.
+            self.overview_cache.patch_usage(action.school_id, 0)
+            self.search_cache.set_licenses([(action.from_email, False), (action.to_email, True)])
             return APIResponse.success(message="Licença transferida com sucesso")
         except Exception as e:
             return APIResponse.error(f"Erro ao transferir licença: {str(e)}")
 
+    def bulk_license_actions(self, actions: List[Tuple[str, LicenseAction]], actor: str) -> Dict[str, any]:
+        """Aplica atribuições, revogações e transferências em lote numa transação.
+
+        ``actions`` é uma lista de ``(tipo, LicenseAction)`` com tipo ``assign``,
+        ``revoke`` ou ``transfer``. Escolas e usuários envolvidos são lidos (e
+        travados) com um ``IN (...)`` cada; os limites são validados em memória na
+        ordem recebida, e itens inválidos são reportados sem impedir os demais.
+        """
+        if not actions:
+            return APIResponse.error("Nenhuma ação informada")
+        if len(actions) > BULK_MAX_ACTIONS:
+            return APIResponse.error(f"Máximo de {BULK_MAX_ACTIONS} ações por lote")
+
+        try:
+            school_ids = {action.school_id for _, action in actions}
+            emails = {
+                email
+                for _, action in actions
+                for email in (action.user_email, action.from_email, action.to_email)
+                if email
+            }
+
+            with get_session() as session:
+                # Mesma ordem de locks do assign_license: escolas antes de usuários
+                schools = {
+                    school.id: school
+                    for school in session.execute(
+                        select(School)
+                        .where(School.id.in_(school_ids))
+                        .order_by(School.id)
+                        .with_for_update()
+                    ).scalars()
+                }
+                users = {
+                    (user.school_id, user.email): user
+                    for user in session.execute(
+                        select(User)
+                        .where(User.school_id.in_(school_ids), User.email.in_(emails))
+                        .with_for_update()
+                    ).scalars()
+                }
+
+                has_canva = {key: bool(user.has_canva) for key, user in users.items()}
+                used = {sid: school.used_licenses or 0 for sid, school in schools.items()}
+                results: List[Dict] = []
+                audits: List[Dict] = []
+
+                for index, (kind, action) in enumerate(actions):
+                    error = self._apply_bulk_item(kind, action, schools, users, has_canva, used)
+                    results.append(
+                        {
+                            "index": index,
+                            "type": kind,
+                            "schoolId": action.school_id,
+                            "success": error is None,
+                            "message": error or BULK_SUCCESS_MESSAGES[kind],
+                        }
+                    )
+                    if error is None:
+                        audits.append(self._bulk_audit_row(kind, action, actor))
+
+                granted = [users[k].id for k, v in has_canva.items() if v and not users[k].has_canva]
+                revoked = [users[k].id for k, v in has_canva.items() if not v and users[k].has_canva]
+                license_changes = [(k[1], v) for k, v in has_canva.items() if v != bool(users[k].has_canva)]
+                deltas = {
+                    sid: count - (schools[sid].used_licenses or 0)
+                    for sid, count in used.items()
+                }
+                touched = {action.school_id for (_, action), r in zip(actions, results) if r["success"]}
+
+                for user_ids, value in ((granted, True), (revoked, False)):
+                    if user_ids:
+                        session.execute(
+                            update(User)
+                            .where(User.id.in_(user_ids))
+                            .values(has_canva=value)
+                            .execution_options(synchronize_session=False)
+                        )
+                changed_counters = [
+                    {"id": sid, "used_licenses": used[sid]} for sid, delta in deltas.items() if delta
+                ]
+                if changed_counters:
+                    session.execute(update(School), changed_counters)
+                if audits:
+                    session.execute(insert(AuditLog), audits)
+                session.commit()
+
+            for sid in touched:
+                self.overview_cache.patch_usage(sid, deltas.get(sid, 0))
+            self.search_cache.set_licenses(license_changes)
+
+            applied = sum(1 for r in results if r["success"])
+            return APIResponse.success(
+                data={"applied": applied, "failed": len(results) - applied, "results": results},
+                message=f"{applied} de {len(results)} ações aplicadas",
+            )
+        except Exception as e:
+            return APIResponse.error(f"Erro ao aplicar ações em lote: {str(e)}")
+
+    def _apply_bulk_item(
+        self,
+        kind: str,
+        action: LicenseAction,
+        schools: Dict[str, School],
+        users: Dict[Tuple[str, str], User],
+        has_canva: Dict[Tuple[str, str], bool],
+        used: Dict[str, int],
+    ) -> Optional[str]:
+        """Valida um item do lote contra o estado em memória e o aplica; retorna o erro, se houver."""
+        if kind not in BULK_SUCCESS_MESSAGES:
+            return "Tipo de ação inválido"
+        school = schools.get(action.school_id)
+        if not school:
+            return "Escola não encontrada"
+
+        if kind == "assign":
+            key = (action.school_id, action.user_email)
+            if key not in users:
+                return "Usuário não encontrado na escola"
+            if has_canva[key]:
+                return "Usuário já possui licença Canva"
+            if not users[key].is_compliant:
+                return "Email do usuário não pertence a domínio autorizado"
+            if used[action.school_id] >= (school.license_limit or DEFAULT_MAX_LICENSE_LIMIT):
+                return "Limite de licenças atingido para a escola"
+            has_canva[key] = True
+            used[action.school_id] += 1
+            return None
+
+        if kind == "revoke":
+            key = (action.school_id, action.user_email)
+            if key not in users:
+                return "Usuário não encontrado na escola"
+            if not has_canva[key]:
+                return "Usuário não possui licença Canva"
+            has_canva[key] = False
+            used[action.school_id] -= 1
+            return None
+
+        from_key = (action.school_id, action.from_email)
+        to_key = (action.school_id, action.to_email)
+        if from_key not in users:
+            return "Usuário de origem não encontrado na escola"
+        if to_key not in users:
+            return "Usuário de destino não encontrado na escola"
+        if not has_canva[from_key]:
+            return "Usuário de origem não possui licença Canva"
+        if has_canva[to_key]:
+            return "Usuário de destino já possui licença Canva"
+        if not users[to_key].is_compliant:
+            return "Email do usuário de destino não é de domínio autorizado"
+        has_canva[from_key] = False
+        has_canva[to_key] = True
+        return None
+
+    def _bulk_audit_row(self, kind: str, action: LicenseAction, actor: str) -> Dict:
+        if kind == "transfer":
+            payload = {
+                "from_email": action.from_email,
+                "to_email": action.to_email,
+                "motivo": action.motivo,
+                "ticket": action.ticket,
+            }
+        else:
+            payload = {"user_email": action.user_email, "motivo": action.motivo, "ticket": action.ticket}
+        payload["bulk"] = True
+        return {"action": kind, "school_id": action.school_id, "actor": actor, "payload": payload}
+
     def change_school_limit(self, school_id: str, new_limit: int, motivo: str, actor: str) -> Dict[str, any]:
         """Altera limite de licenças de uma escola."""
         try:
@@ -257,39 +752,76 @@ class DataProcessingService:
                 )
                 session.commit()
 
+            self.overview_cache.patch_limit(new_limit, [school_id])
             return APIResponse.success(message="Limite alterado com sucesso")
         except Exception as e:
             return APIResponse.error(f"Erro ao alterar limite: {str(e)}")
 
-    def set_global_license_limit(self, new_limit: int, motivo: str, actor: str) -> Dict[str, any]:
-        """Altera o limite de todas as escolas."""
+    def set_global_license_limit(
+        self,
+        new_limit: int,
+        motivo: str,
+        actor: str,
+        filters: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, any]:
+        """Altera o limite de todas as escolas (ou só das que casam com ``filters``).
+
+        ``filters`` aceita ``cluster``, ``region`` e ``status``. A alteração e a
+        auditoria rodam num único statement, independentemente do número de escolas.
+        """
         try:
             if new_limit < 0:
                 return APIResponse.error("Limite deve ser maior ou igual a zero")
 
+            filters = {k: v for k, v in (filters or {}).items() if v}
+            unknown = set(filters) - set(LIMIT_FILTER_COLUMNS)
+            if unknown:
+                return APIResponse.error(f"Filtro inválido: {', '.join(sorted(unknown))}")
+
             with get_session() as session:
-                schools = session.execute(select(School)).scalars().all()
-                old_limits = {s.id: s.license_limit or DEFAULT_MAX_LICENSE_LIMIT for s in schools}
-                for school in schools:
-                    school.license_limit = new_limit
-                    action = LicenseAction(school_id=school.id, new_limit=new_limit, motivo=motivo)
-                    session.add(
-                        self._build_audit(
-                            "alter_limit",
-                            action,
-                            actor,
-                            {"old_limit": old_limits.get(school.id), "new_limit": new_limit, "motivo": motivo},
-                        )
-                    )
+                school_ids = session.execute(
+                    self._global_limit_statement(new_limit, motivo, actor, filters)
+                ).scalars().all()
                 session.commit()
 
+            self.overview_cache.patch_limit(new_limit, school_ids if filters else None)
             return APIResponse.success(
-                data={"updated": len(old_limits), "limit": new_limit},
+                data={"updated": len(school_ids), "limit": new_limit, "filters": filters},
                 message="Limite global alterado com sucesso",
             )
         except Exception as e:
             return APIResponse.error(f"Erro ao alterar limite global: {str(e)}")
 
+    def _global_limit_statement(self, new_limit: int, motivo: str, actor: str, filters: Dict[str, str]):
+        """WITH old (SELECT ... FOR UPDATE) -> changed (UPDATE ... FROM old) -> audit (INSERT ... SELECT)."""
+        old = select(School.id, School.license_limit).with_for_update()
+        for key, value in filters.items():
+            old = old.where(LIMIT_FILTER_COLUMNS[key] == value)
+        old = old.cte("old")
+
+        changed = (
+            update(School)
+            .where(School.id == old.c.id)
+            .values(license_limit=new_limit)
+            .returning(School.id, old.c.license_limit.label("old_limit"))
+            .cte("changed")
+        )
+        payload = func.jsonb_build_object(
+            "old_limit", func.coalesce(func.nullif(changed.c.old_limit, 0), DEFAULT_MAX_LICENSE_LIMIT),
+            "new_limit", new_limit,
+            "motivo", motivo,
+        )
+        audit = (
+            insert(AuditLog)
+            .from_select(
+                ["action", "school_id", "actor", "payload"],
+                select(literal("alter_limit"), changed.c.id, literal(actor), payload),
+            )
+            .returning(AuditLog.school_id)
+            .cte("audit")
+        )
+        return select(audit.c.school_id)
+
     def get_global_license_limit(self) -> int:
         """Retorna o limite mais comum entre as escolas."""
         with get_session() as session:
@@ -310,37 +842,132 @@ class DataProcessingService:
                 action = LicenseAction(school_id="system")
                 session.add(self._build_audit("reload_data", action, actor, {}))
                 session.commit()
+            self.overview_cache.invalidate()
+            self.search_cache.invalidate()
             return APIResponse.success(message="Dados já são lidos do banco (nada a recarregar)")
         except Exception as e:
             return APIResponse.error(f"Erro ao registrar reload: {str(e)}")
 
-    def get_audit_logs(self, filters: Dict[str, str] = None) -> List[Dict]:
-        """Obtém logs de auditoria do Postgres."""
+    def iter_audit_logs(self, filters: Dict[str, str] = None, batch_size: int = 1000) -> Iterator[Dict]:
+        """Itera os logs com cursor no servidor (yield_per), sem materializar o resultado."""
+        stmt = self._audit_query(filters).execution_options(yield_per=batch_size)
         with get_session() as session:
-            stmt = select(AuditLog)
-            if filters:
-                if filters.get("schoolId"):
-                    stmt = stmt.where(AuditLog.school_id == filters["schoolId"])
-                if filters.get("action"):
-                    stmt = stmt.where(AuditLog.action == filters["action"])
-                if filters.get("actor"):
-                    stmt = stmt.where(AuditLog.actor.ilike(f"%{filters['actor']}%"))
-            stmt = stmt.order_by(AuditLog.ts.desc())
-            logs = session.execute(stmt).scalars().all()
-
-        return [
-            {
-                "id": log.id,
-                "action": log.action,
-                "school_id": log.school_id,
-                "actor": log.actor,
-                "payload": log.payload or {},
-                "ts": log.ts.isoformat() if log.ts else None,
-            }
-            for log in logs
-        ]
+            for log in session.execute(stmt).scalars():
+                yield self._audit_to_dict(log)
+
+    def get_audit_log_page(
+        self,
+        filters: Dict[str, str] = None,
+        limit: int = AUDIT_PAGE_DEFAULT,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, any]:
+        """Página de logs ordenada por (ts, id) desc com paginação por cursor (keyset).
+
+        ``nextCursor`` é None na última página. Levanta ValueError para cursor,
+        datas ou limite inválidos.
+        """
+        limit = max(1, min(int(limit), AUDIT_PAGE_MAX))
+        stmt = self._audit_query(filters)
+        if cursor:
+            cursor_ts, cursor_id = _decode_audit_cursor(cursor)
+            stmt = stmt.where(tuple_(AuditLog.ts, AuditLog.id) < tuple_(cursor_ts, cursor_id))
+
+        with get_session() as session:
+            logs = session.execute(stmt.limit(limit + 1)).scalars().all()
+
+        has_more = len(logs) > limit
+        logs = logs[:limit]
+        return {
+            "items": [self._audit_to_dict(log) for log in logs],
+            "nextCursor": _encode_audit_cursor(logs[-1]) if has_more else None,
+        }
+
+    def _audit_query(self, filters: Optional[Dict[str, str]]):
+        stmt = select(AuditLog)
+        if filters:
+            if filters.get("schoolId"):
+                stmt = stmt.where(AuditLog.school_id == filters["schoolId"])
+            if filters.get("action"):
+                stmt = stmt.where(AuditLog.action == filters["action"])
+            if filters.get("actor"):
+                # Acelerado pelo índice trigram idx_audit_logs_actor_trgm
+                stmt = stmt.where(AuditLog.actor.ilike(f"%{filters['actor']}%"))
+            if filters.get("start"):
+                stmt = stmt.where(AuditLog.ts >= _parse_audit_bound(filters["start"]))
+            if filters.get("end"):
+                end = _parse_audit_bound(filters["end"])
+                if _is_date_only(filters["end"]):
+                    # Data sem hora: inclui o dia inteiro
+                    stmt = stmt.where(AuditLog.ts < end + timedelta(days=1))
+                else:
+                    stmt = stmt.where(AuditLog.ts <= end)
+        return stmt.order_by(AuditLog.ts.desc(), AuditLog.id.desc())
+
+    @staticmethod
+    def _audit_to_dict(log: AuditLog) -> Dict:
+        return {
+            "id": log.id,
+            "action": log.action,
+            "school_id": log.school_id,
+            "actor": log.actor,
+            "payload": log.payload or {},
+            "ts": log.ts.isoformat() if log.ts else None,
+        }
+
+    def reconcile_usage_counters(self, actor: str = "system", fix: bool = True) -> Dict[str, any]:
+        """Compara ``schools.used_licenses`` com a contagem real em ``users``.
+
+        Retorna as escolas divergentes e, com ``fix=True``, corrige os contadores
+        e registra a correção na auditoria.
+        """
+        try:
+            with get_session() as session:
+                actual = (
+                    select(User.school_id.label("school_id"), func.count().label("used"))
+                    .where(User.has_canva.is_(True))
+                    .group_by(User.school_id)
+                    .subquery()
+                )
+                actual_used = func.coalesce(actual.c.used, 0)
+                rows = session.execute(
+                    select(School.id, School.used_licenses, actual_used)
+                    .outerjoin(actual, actual.c.school_id == School.id)
+                    .where(School.used_licenses != actual_used)
+                ).all()
+
+                drift = [
+                    {"school_id": sid, "counter": counter, "actual": int(used)}
+                    for sid, counter, used in rows
+                ]
+                if fix and drift:
+                    session.execute(
+                        update(School),
+                        [{"id": d["school_id"], "used_licenses": d["actual"]} for d in drift],
+                    )
+                    action = LicenseAction(school_id="system")
+                    session.add(
+                        self._build_audit("reconcile_usage", action, actor, {"schools": len(drift)})
+                    )
+                    session.commit()
+
+            if fix and drift:
+                self.overview_cache.invalidate()
+            return APIResponse.success(
+                data={"drift": drift, "fixed": bool(fix and drift)},
+                message=f"{len(drift)} escola(s) com contador divergente",
+            )
+        except Exception as e:
+            return APIResponse.error(f"Erro ao reconciliar contadores: {str(e)}")
 
     # --- Helpers ---
+    def _bump_usage(self, session, school_id: str, delta: int) -> None:
+        """Atualiza o contador de uso de forma atômica (UPDATE relativo, sem ler antes)."""
+        session.execute(
+            update(School)
+            .where(School.id == school_id)
+            .values(used_licenses=School.used_licenses + delta)
+        )
+
     def _build_audit(self, action: str, license_action: LicenseAction, actor: str, payload: Dict) -> AuditLog:
         return AuditLog(
             action=action,
@@ -0,0 +1,347 @@
+"""
+Consulta das planilhas de vouchers de campanha (escolas, exceções e
+parcelamento de funcionários) sem que o front precise baixar os CSVs inteiros.
+
+Cada campanha (``2026``, ``2025``) é lida uma vez por versão dos arquivos
+(caminho, mtime e tamanho) e mantida em tabelas com índices por ID da escola,
+código do voucher e nome da escola/unidade (sem acentos, via ``normalize``),
+além de cluster, status e flags usadas nos filtros. As colunas são resolvidas
+pelos rótulos do cabeçalho, o que cobre os layouts de 2025 e 2026. Os campos
+de saída seguem as interfaces do front (src/lib/voucherDataProcessor.ts).
+"""
+import csv
+import io
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .file_snapshot import SnapshotCache, column_indexes, file_stamp, normalize
+
+VOUCHER_KINDS = ("escolas", "excecoes", "parcelamentos")
+VOUCHER_PAGE_DEFAULT = 50
+VOUCHER_PAGE_MAX = 500
+DEFAULT_CAMPAIGN = "2026"
+
+# Campanha -> tipo -> nomes de arquivo aceitos (public/data e api/local_data)
+CAMPAIGN_FILES = {
+    "2026": {
+        "escolas": ("vouchers_2026.csv", "Voucher_de_Campanha2026(VOUCHERS 2026).csv"),
+        "excecoes": ("voucher_campanha2026_excecoes.csv", "Voucher_de_Campanha2026(Exceções).csv"),
+        "parcelamentos": (
+            "voucher_campanha2026_parcelamento_func.csv",
+            "Voucher_de_Campanha2026(Voucherdeparcelamentofunc.csv",
+        ),
+    },
+    "2025": {
+        "escolas": ("voucher_2025.csv", "vouchers_2025.csv"),
+        "excecoes": ("excecoes_2025.csv",),
+        "parcelamentos": ("parcelamento_2025.csv",),
+    },
+}
+
+# Campo de saída -> rótulos aceitos no cabeçalho, por tipo de planilha
+SCHOOL_VOUCHER_COLUMNS = {
+    "id": ("id_escola", "id da escola"),
+    "name": ("nome", "grupo economico", "nome da escola"),
+    "cluster": ("cluster", "cluster 2024"),
+    "status": ("status da escola", "status"),
+    "contractualCompliance": ("adimplencia contratual",),
+    "financialCompliance": ("adimplencia financeira",),
+    "lexUsage": ("utilizacao integral lex",),
+    "slmSales": ("vendas slm 2025", "vendas slm 24"),
+    "voucherEligible": ("direito a voucher", "direito a voucher?"),
+    "reason": ("motivo",),
+    "voucherEnabled": ("habilitacao voucher",),
+    "voucherQuantity": ("qtd. vouchers", "quantidade de vouchers"),
+    "voucherCode": ("codigo do voucher",),
+    "voucherSent": ("voucher enviado",),
+    "observations": ("observacao", "observacoes"),
+}
+EXCEPTION_VOUCHER_COLUMNS = {
+    "unit": ("unidade",),
+    "financialResponsible": ("responsavel financeiro",),
+    "course": ("curso",),
+    "voucherPercent": ("% voucher",),
+    "code": ("codigo",),
+    "cpf": ("cpf",),
+    "createdBy": ("quem confeccionou o voucher?",),
+    "emailTitle": ("titulo do e-mail", "observacao"),
+    "requestedBy": ("quem solicitou o voucher", "solicitado por:"),
+    "usageCount": ("qtd de utilizacoes", "quantidade utilizada"),
+}
+# No parcelamento de 2025 a coluna da escola não tem rótulo (segunda coluna)
+INSTALLMENT_COLUMNS = {
+    "employeeName": ("nome completo do colaborador", "nome pai"),
+    "employeeCpf": ("cpf do colaborador", "cpf"),
+    "school": ("nome da escola", ""),
+    "voucherCode": ("codigo voucher",),
+}
+
+INT_FIELDS = {"slmSales", "voucherQuantity", "usageCount"}
+BOOL_FIELDS = {"voucherEligible", "voucherSent"}
+FLOAT_FIELDS = {"voucherPercent"}
+
+# Filtros HTTP -> campo indexado, por tipo
+VOUCHER_FILTERS = {
+    "escolas": {"idEscola": "id", "codigo": "voucherCode", "cluster": "cluster", "status": "status",
+                "direito": "voucherEligible", "enviado": "voucherSent"},
+    "excecoes": {"codigo": "code"},
+    "parcelamentos": {"codigo": "voucherCode"},
+}
+# Campo com o nome da escola/unidade (busca ``escola``) e campo do código, por tipo
+NAME_FIELDS = {"escolas": "name", "excecoes": "unit", "parcelamentos": "school"}
+CODE_FIELDS = {"escolas": "voucherCode", "excecoes": "code", "parcelamentos": "voucherCode"}
+
+
+def _read_text(path: Path) -> str:
+    """Conteúdo do CSV; as planilhas chegam em UTF-8 (com ou sem BOM) ou Windows-1252."""
+    raw = path.read_bytes()
+    for encoding in ("utf-8-sig", "cp1252"):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode("latin-1")
+
+
+def _read_rows(path: Path) -> List[List[str]]:
+    return [row for row in csv.reader(io.StringIO(_read_text(path)), delimiter=";") if any(cell.strip() for cell in row)]
+
+
+def _to_int(value: str) -> int:
+    digits = value.replace(".", "").strip()
+    return int(digits) if digits.isdigit() else 0
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value.replace("%", "").replace(",", ".").strip())
+    except ValueError:
+        return 0.0
+
+
+def _convert(field: str, value: str):
+    if field in INT_FIELDS:
+        return _to_int(value)
+    if field in BOOL_FIELDS:
+        return normalize(value) == "sim"
+    if field in FLOAT_FIELDS:
+        return _to_float(value)
+    return value
+
+
+def normalize_code(code: str) -> str:
+    return "".join(code.split()).upper()
+
+
+def _parse(rows: List[List[str]], columns: Dict[str, Tuple[str, ...]]) -> Tuple[List[Dict], List[str]]:
+    """Linhas -> dicts com os campos de ``columns``; devolve também o cabeçalho normalizado."""
+    if not rows:
+        return [], []
+    header = [normalize(cell) for cell in rows[0]]
+    indexes = {field: column_indexes(header, *labels) for field, labels in columns.items()}
+
+    records = []
+    for cells in rows[1:]:
+        record = {}
+        for field, candidates in indexes.items():
+            value = ""
+            for index in candidates:
+                value = cells[index].strip() if index < len(cells) else ""
+                if value:
+                    break
+            record[field] = _convert(field, value)
+        records.append(record)
+    return records, header
+
+
+def parse_school_vouchers(rows: List[List[str]]) -> List[Dict]:
+    records, _ = _parse(rows, SCHOOL_VOUCHER_COLUMNS)
+    return [record for record in records if record["name"]]
+
+
+def parse_exception_vouchers(rows: List[List[str]]) -> List[Dict]:
+    records, _ = _parse(rows, EXCEPTION_VOUCHER_COLUMNS)
+    return [record for record in records if record["unit"]]
+
+
+def parse_voucher_installments(rows: List[List[str]]) -> List[Dict]:
+    """Uma linha por filho, como o front (colunas Filho/Aluno seguidas da Série)."""
+    records, header = _parse(rows, INSTALLMENT_COLUMNS)
+    child_columns = [
+        (index, index + 1 if index + 1 < len(header) and header[index + 1].startswith("serie") else None)
+        for index, label in enumerate(header)
+        if label.startswith("filho") or label.startswith("aluno")
+    ]
+
+    installments = []
+    for record, cells in zip(records, rows[1:]):
+        if not record["employeeName"]:
+            continue
+        for child_index, series_index in child_columns:
+            child = cells[child_index].strip() if child_index < len(cells) else ""
+            series = cells[series_index].strip() if series_index is not None and series_index < len(cells) else ""
+            if child or series:
+                installments.append({**record, "childName": child, "series": series})
+    return installments
+
+
+PARSERS = {
+    "escolas": parse_school_vouchers,
+    "excecoes": parse_exception_vouchers,
+    "parcelamentos": parse_voucher_installments,
+}
+
+
+class VoucherTable:
+    """Linhas de uma planilha com índices por campo (valores normalizados) e por nome."""
+
+    def __init__(self, kind: str, rows: List[Dict], source: str = ""):
+        self.kind = kind
+        self.rows = rows
+        self.source = source
+        self.name_field = NAME_FIELDS[kind]
+        self.indexes: Dict[str, Dict[object, List[int]]] = {}
+        for field in set(VOUCHER_FILTERS[kind].values()):
+            index: Dict[object, List[int]] = {}
+            for position, row in enumerate(rows):
+                index.setdefault(self._key(field, row[field]), []).append(position)
+            self.indexes[field] = index
+
+        self.by_name: Dict[str, List[int]] = {}
+        for position, row in enumerate(rows):
+            self.by_name.setdefault(normalize(row[self.name_field]), []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @staticmethod
+    def _key(field: str, value):
+        if field in BOOL_FIELDS:
+            return bool(value)
+        if field in ("voucherCode", "code"):
+            return normalize_code(value)
+        return normalize(str(value))
+
+    def lookup(self, field: str, value) -> List[int]:
+        return self.indexes[field].get(self._key(field, value), [])
+
+    def search_name(self, text: str) -> List[int]:
+        """Linhas cujo nome contém ``text`` (sem acentos nem caixa); percorre só os nomes distintos."""
+        term = normalize(text)
+        exact = self.by_name.get(term)
+        if exact is not None:
+            return exact
+        return sorted(position for name, rows in self.by_name.items() if term in name for position in rows)
+
+    def select(self, filters: Dict[str, object], name: Optional[str] = None) -> List[int]:
+        """Posições que atendem a todos os filtros (campo -> valor), na ordem da planilha."""
+        selected: Optional[set] = None
+        candidates: Iterable[Sequence[int]] = [self.lookup(field, value) for field, value in filters.items()]
+        if name:
+            candidates = [*candidates, self.search_name(name)]
+        for rows in sorted(candidates, key=len):
+            selected = set(rows) if selected is None else selected.intersection(rows)
+            if not selected:
+                return []
+        return list(range(len(self.rows))) if selected is None else sorted(selected)
+
+
+class VoucherCampaign:
+    """Tabelas de uma campanha (escolas, exceções, parcelamentos)."""
+
+    def __init__(self, campaign: str, tables: Dict[str, VoucherTable]):
+        self.campaign = campaign
+        self.tables = tables
+
+    def find_code(self, code: str) -> Dict[str, List[Dict]]:
+        """Registros de todas as planilhas com o código informado."""
+        return {
+            kind: [table.rows[position] for position in table.lookup(CODE_FIELDS[kind], code)]
+            for kind, table in self.tables.items()
+        }
+
+
+_campaigns = SnapshotCache()
+
+
+def _find_campaign_file(filenames: Sequence[str]) -> Optional[Path]:
+    base = Path(__file__).parent.parent.parent
+    for folder in (base / "public" / "data", base / "api" / "local_data"):
+        for filename in filenames:
+            candidate = folder / filename
+            if candidate.exists():
+                return candidate
+    return None
+
+
+def load_voucher_campaign(campaign: str = DEFAULT_CAMPAIGN) -> VoucherCampaign:
+    """
+    Tabelas da campanha, montadas uma vez por versão dos arquivos. Levanta
+    KeyError para campanha desconhecida; planilhas ausentes viram tabelas vazias.
+    """
+    files = {kind: _find_campaign_file(names) for kind, names in CAMPAIGN_FILES[campaign].items()}
+    key = tuple(file_stamp(path) if path else None for path in files.values())
+
+    def build() -> VoucherCampaign:
+        tables = {
+            kind: VoucherTable(kind, PARSERS[kind](_read_rows(path)) if path else [], path.name if path else "")
+            for kind, path in files.items()
+        }
+        return VoucherCampaign(campaign, tables)
+
+    return _campaigns.get(key, build, slot=campaign)
+
+
+def query_vouchers(
+    kind: str = "escolas",
+    params: Optional[Dict[str, str]] = None,
+    campaign: str = DEFAULT_CAMPAIGN,
+    page: int = 1,
+    page_size: int = VOUCHER_PAGE_DEFAULT,
+    loaded: Optional[VoucherCampaign] = None,
+) -> Dict:
+    """
+    Página de uma planilha filtrada pelos parâmetros de VOUCHER_FILTERS[kind]
+    e por ``escola`` (parte do nome, sem acentos). Levanta ValueError para
+    tipo ou campanha inválidos.
+    """
+    if kind not in VOUCHER_KINDS:
+        raise ValueError(f"tipo deve ser um de: {', '.join(VOUCHER_KINDS)}")
+    if campaign not in CAMPAIGN_FILES:
+        raise ValueError(f"campanha deve ser uma de: {', '.join(CAMPAIGN_FILES)}")
+    params = params or {}
+    table = (loaded or load_voucher_campaign(campaign)).tables[kind]
+
+    filters = {}
+    for param, field in VOUCHER_FILTERS[kind].items():
+        value = (params.get(param) or "").strip()
+        if value:
+            filters[field] = normalize(value) == "sim" if field in BOOL_FIELDS else value
+    positions = table.select(filters, (params.get("escola") or "").strip() or None)
+
+    page_size = max(1, min(page_size, VOUCHER_PAGE_MAX))
+    page = max(1, page)
+    start = (page - 1) * page_size
+    return {
+        "campanha": campaign,
+        "tipo": kind,
+        "fonte": table.source,
+        "total": len(positions),
+        "page": page,
+        "pageSize": page_size,
+        "items": [table.rows[position] for position in positions[start:start + page_size]],
+    }
+
+
+def find_voucher_code(code: str, campaign: Optional[str] = None) -> Dict:
+    """Busca um código em todas as planilhas (de uma campanha ou de todas)."""
+    campaigns = [campaign] if campaign else list(CAMPAIGN_FILES)
+    for name in campaigns:
+        if name not in CAMPAIGN_FILES:
+            raise ValueError(f"campanha deve ser uma de: {', '.join(CAMPAIGN_FILES)}")
+    results = {name: load_voucher_campaign(name).find_code(code) for name in campaigns}
+    return {
+        "codigo": normalize_code(code),
+        "encontrado": any(rows for found in results.values() for rows in found.values()),
+        "campanhas": results,
+    }
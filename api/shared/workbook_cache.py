@@ -0,0 +1,259 @@
+"""Cache colunar das planilhas Excel (Franchising_oficial.xlsx e afins).
+
+Ler um .xlsx com pandas/openpyxl significa descompactar e interpretar XML a
+cada carga. Aqui a planilha é convertida uma única vez por versão do conteúdo
+(SHA-256 dos bytes) e as leituras seguintes vêm do cache:
+
+* Parquet (lido com ``memory_map``) quando o ``pyarrow`` está instalado;
+* senão um ``.npz`` sem pickle: colunas numéricas, booleanas e de data vão
+  como arrays NumPy; colunas de texto como bytes UTF-8 + offsets + máscara de
+  nulos; colunas mistas com um código de tipo por célula.
+
+Ao lado dos dados fica um ``.json`` com os rótulos originais, os nomes
+normalizados (``normalize_column``) e o dtype de cada coluna; ele é gravado
+por último e marca o cache como completo. Colunas ficam posicionais no
+arquivo, então rótulos que colidem após a normalização não são um problema.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import unicodedata
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:  # Parquet é opcional; sem ele o cache usa .npz
+    import pyarrow  # noqa: F401
+except ImportError:  # pragma: no cover - depende do ambiente
+    pyarrow = None
+
+WORKBOOK_CACHE_DIR = os.environ.get(
+    'WORKBOOK_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'safmaplebear-workbooks')
+)
+CACHE_FORMAT_VERSION = 1
+
+# Códigos de tipo das células de colunas mistas
+_NULL, _STR, _INT, _FLOAT, _BOOL, _DATETIME = range(6)
+
+
+def normalize_column(name: str) -> str:
+    """Rótulo sem acentos, em minúsculas, com hífens virando espaço e espaços colapsados."""
+    normalized = (
+        unicodedata.normalize("NFKD", str(name))
+        .encode("ascii", "ignore")
+        .decode("ascii")
+    )
+    normalized = normalized.replace("-", " ")
+    return " ".join(normalized.lower().split())
+
+
+# -- codificação .npz ---------------------------------------------------------
+
+def _is_null(value) -> bool:
+    return value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and value != value)
+
+
+def _pack_strings(texts: List[str]) -> Dict[str, np.ndarray]:
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return {'data': np.frombuffer(b''.join(encoded), dtype=np.uint8), 'offsets': offsets}
+
+
+def _unpack_strings(arrays: Dict[str, np.ndarray]) -> List[str]:
+    data = arrays['data'].tobytes()
+    offsets = arrays['offsets'].tolist()
+    return [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+
+def _encode_column(series: pd.Series) -> Tuple[str, Dict[str, np.ndarray]]:
+    """(tipo de codificação, arrays) de uma coluna, sem nenhum objeto Python."""
+    if series.dtype.kind in 'biufcmM':
+        return 'native', {'values': series.to_numpy()}
+
+    values = series.tolist()
+    if all(isinstance(value, str) or _is_null(value) for value in values):
+        mask = [_is_null(value) for value in values]
+        arrays = _pack_strings(['' if null else value for value, null in zip(values, mask)])
+        arrays['mask'] = np.array(mask, dtype=bool)
+        return 'text', arrays
+
+    kinds = []
+    texts = []
+    for value in values:
+        if _is_null(value):
+            kinds.append(_NULL)
+            texts.append('')
+        elif isinstance(value, str):
+            kinds.append(_STR)
+            texts.append(value)
+        elif isinstance(value, (bool, np.bool_)):
+            kinds.append(_BOOL)
+            texts.append('1' if value else '')
+        elif isinstance(value, (int, np.integer)):
+            kinds.append(_INT)
+            texts.append(str(int(value)))
+        elif isinstance(value, (float, np.floating)):
+            kinds.append(_FLOAT)
+            texts.append(repr(float(value)))
+        elif isinstance(value, datetime):
+            kinds.append(_DATETIME)
+            texts.append(value.isoformat())
+        else:
+            kinds.append(_STR)
+            texts.append(str(value))
+    arrays = _pack_strings(texts)
+    arrays['kinds'] = np.array(kinds, dtype=np.int8)
+    return 'mixed', arrays
+
+
+def _decode_mixed(texts: List[str], kinds: np.ndarray) -> List:
+    decoded = []
+    for text, kind in zip(texts, kinds.tolist()):
+        if kind == _NULL:
+            decoded.append(float('nan'))  # célula vazia, como no read_excel
+        elif kind == _INT:
+            decoded.append(int(text))
+        elif kind == _FLOAT:
+            decoded.append(float(text))
+        elif kind == _BOOL:
+            decoded.append(bool(text))
+        elif kind == _DATETIME:
+            decoded.append(datetime.fromisoformat(text))
+        else:
+            decoded.append(text)
+    return decoded
+
+
+def _decode_column(encoding: str, arrays: Dict[str, np.ndarray], dtype: str) -> pd.Series:
+    if encoding == 'native':
+        return pd.Series(arrays['values'])
+    if encoding == 'text':
+        values = np.array(_unpack_strings(arrays), dtype=object)
+        values[arrays['mask']] = None
+        return pd.Series(values, dtype=object).astype(dtype)
+    return pd.Series(_decode_mixed(_unpack_strings(arrays), arrays['kinds']), dtype=object)
+
+
+# -- arquivos do cache --------------------------------------------------------
+
+def _atomic_write(path: Path, write) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            write(handle)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _cache_paths(cache_dir: Path, key: str) -> Tuple[Path, Path, Path]:
+    return cache_dir / f'{key}.json', cache_dir / f'{key}.parquet', cache_dir / f'{key}.npz'
+
+
+def _write_parquet(positional: pd.DataFrame, path: Path) -> bool:
+    """Grava o Parquet; False quando o Arrow não converte alguma coluna (ints e textos misturados, por exemplo)."""
+    try:
+        _atomic_write(path, lambda handle: positional.to_parquet(handle, index=False))
+    except (pyarrow.ArrowException, ValueError, TypeError) as e:
+        logging.info(f"Planilha sem Parquet, usando .npz: {str(e)}")
+        return False
+    return True
+
+
+def _write_cache(df: pd.DataFrame, cache_dir: Path, key: str) -> None:
+    meta_path, parquet_path, npz_path = _cache_paths(cache_dir, key)
+    positional = df.set_axis([f'c{index}' for index in range(df.shape[1])], axis=1)
+    meta = {
+        'version': CACHE_FORMAT_VERSION,
+        'rows': int(df.shape[0]),
+        'columns': [str(column) for column in df.columns],
+        'normalized': [normalize_column(column) for column in df.columns],
+        'dtypes': [str(dtype) for dtype in df.dtypes],
+    }
+    if pyarrow is not None and _write_parquet(positional, parquet_path):
+        meta['format'] = 'parquet'
+    else:
+        meta['format'] = 'npz'
+        arrays: Dict[str, np.ndarray] = {}
+        encodings = []
+        for index, column in enumerate(positional.columns):
+            encoding, column_arrays = _encode_column(positional[column])
+            encodings.append(encoding)
+            for name, values in column_arrays.items():
+                arrays[f'{column}_{name}'] = values
+        meta['encodings'] = encodings
+        _atomic_write(npz_path, lambda handle: np.savez(handle, **arrays))
+    _atomic_write(meta_path, lambda handle: handle.write(json.dumps(meta, ensure_ascii=False).encode('utf-8')))
+
+
+def _read_cache(cache_dir: Path, key: str) -> Optional[Tuple[pd.DataFrame, Dict]]:
+    meta_path, parquet_path, npz_path = _cache_paths(cache_dir, key)
+    try:
+        meta = json.loads(meta_path.read_bytes())
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta.get('version') != CACHE_FORMAT_VERSION:
+        return None
+
+    if meta['format'] == 'parquet':
+        if pyarrow is None:
+            return None
+        df = pd.read_parquet(parquet_path, memory_map=True)
+    else:
+        columns = {}
+        with np.load(npz_path, allow_pickle=False) as archive:
+            for index, (encoding, dtype) in enumerate(zip(meta['encodings'], meta['dtypes'])):
+                prefix = f'c{index}_'
+                arrays = {name[len(prefix):]: archive[name] for name in archive.files if name.startswith(prefix)}
+                columns[index] = _decode_column(encoding, arrays, dtype)
+        df = pd.DataFrame(columns) if columns else pd.DataFrame(index=range(meta['rows']))
+    return df, meta
+
+
+def workbook_key(data: bytes, sheet_name: Union[int, str] = 0) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:24]
+    return f'{digest}-{hashlib.sha1(str(sheet_name).encode("utf-8")).hexdigest()[:8]}'
+
+
+def read_workbook(
+    source: Union[str, Path, bytes],
+    sheet_name: Union[int, str] = 0,
+    normalize: bool = True,
+    cache_dir: Optional[Union[str, Path]] = WORKBOOK_CACHE_DIR,
+) -> pd.DataFrame:
+    """Planilha como DataFrame, convertida para o cache colunar na primeira leitura desta versão.
+
+    ``source`` é o caminho do .xlsx ou os seus bytes (vindos do Blob, por
+    exemplo). Com ``normalize`` as colunas vêm com os nomes de
+    ``normalize_column``; sem ele, com os rótulos originais da planilha. Sem
+    ``cache_dir`` (ou se a pasta não for gravável) a planilha é só lida.
+    """
+    data = source if isinstance(source, bytes) else Path(source).read_bytes()
+    key = workbook_key(data, sheet_name)
+    cache_path = Path(cache_dir) if cache_dir else None
+
+    cached = _read_cache(cache_path, key) if cache_path else None
+    if cached is None:
+        df = pd.read_excel(BytesIO(data), sheet_name=sheet_name, engine='openpyxl')
+        labels, normalized = [str(column) for column in df.columns], [normalize_column(column) for column in df.columns]
+        if cache_path:
+            try:
+                cache_path.mkdir(parents=True, exist_ok=True)
+                _write_cache(df, cache_path, key)
+            except (OSError, ValueError, TypeError) as e:
+                logging.warning(f"Não foi possível gravar o cache da planilha em {cache_path}: {str(e)}")
+    else:
+        df, meta = cached
+        labels, normalized = meta['columns'], meta['normalized']
+    return df.set_axis(normalized if normalize else labels, axis=1)
+
@@ -0,0 +1,131 @@
+"""Teste de estresse da atribuição de licenças contra um Postgres local.
+
+Requer um banco descartável:
+    TEST_DATABASE_URL=postgresql+psycopg://postgres@localhost/saf_test python -m pytest test_license_concurrency.py
+"""
+import os
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+    from sqlalchemy import delete, func, select
+
+    from shared.db import engine, get_session
+    from shared.db_models import AuditLog, Base, School, User
+    from shared.model import LicenseAction
+    from shared.service import DataProcessingService
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL não configurada")
+class TestAssignLicenseConcurrency(unittest.TestCase):
+
+    WORKERS = 12
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=engine)
+
+    def setUp(self):
+        self.service = DataProcessingService()
+        self.school_id = f"test-{uuid.uuid4().hex[:8]}"
+
+    def tearDown(self):
+        with get_session() as session:
+            session.execute(delete(AuditLog).where(AuditLog.school_id == self.school_id))
+            session.execute(delete(User).where(User.school_id == self.school_id))
+            session.execute(delete(School).where(School.id == self.school_id))
+            session.commit()
+
+    def _seed(self, limit: int, users: int):
+        with get_session() as session:
+            session.add(School(id=self.school_id, name="Escola Estresse", license_limit=limit))
+            session.flush()
+            for i in range(users):
+                session.add(
+                    User(
+                        school_id=self.school_id,
+                        email=f"user{i}.{self.school_id}@maplebear.com.br",
+                        has_canva=False,
+                        is_compliant=True,
+                    )
+                )
+            session.commit()
+
+    def _assign(self, email: str):
+        action = LicenseAction(school_id=self.school_id, user_email=email, motivo="teste", ticket="T-1")
+        return self.service.assign_license(action, "stress")
+
+    def _state(self):
+        with get_session() as session:
+            licensed = session.execute(
+                select(func.count())
+                .select_from(User)
+                .where(User.school_id == self.school_id, User.has_canva.is_(True))
+            ).scalar_one()
+            counter = session.get(School, self.school_id).used_licenses
+            audits = session.execute(
+                select(func.count())
+                .select_from(AuditLog)
+                .where(AuditLog.school_id == self.school_id, AuditLog.action == "assign")
+            ).scalar_one()
+        return licensed, counter, audits
+
+    def test_limit_is_never_exceeded(self):
+        """Muitos usuários disputando poucas vagas: exatamente `limit` concessões."""
+        self._seed(limit=3, users=40)
+        emails = [f"user{i}.{self.school_id}@maplebear.com.br" for i in range(40)]
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(self._assign, emails))
+
+        self.assertEqual(sum(1 for r in results if r["success"]), 3)
+        self.assertEqual(self._state(), (3, 3, 3))
+        failures = {r["message"] for r in results if not r["success"]}
+        self.assertEqual(failures, {"Limite de licenças atingido para a escola"})
+
+    def test_same_user_is_granted_once(self):
+        """Requisições duplicadas para o mesmo usuário não inflam o contador."""
+        self._seed(limit=10, users=1)
+        email = f"user0.{self.school_id}@maplebear.com.br"
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(self._assign, [email] * 50))
+
+        self.assertEqual(sum(1 for r in results if r["success"]), 1)
+        self.assertEqual(self._state(), (1, 1, 1))
+
+    def test_bulk_actions_share_the_limit(self):
+        """Lote com mais atribuições que vagas: excedentes falham, o resto é aplicado."""
+        self._seed(limit=2, users=4)
+
+        def email(i):
+            return f"user{i}.{self.school_id}@maplebear.com.br"
+
+        def action(**fields):
+            return LicenseAction(school_id=self.school_id, motivo="lote", ticket="T-2", **fields)
+
+        result = self.service.bulk_license_actions(
+            [
+                ("assign", action(user_email=email(0))),
+                ("assign", action(user_email=email(1))),
+                ("assign", action(user_email=email(2))),
+                ("transfer", action(from_email=email(1), to_email=email(3))),
+                ("revoke", action(user_email=email(0))),
+                ("assign", action(user_email=email(2))),
+            ],
+            "bulk",
+        )
+
+        self.assertTrue(result["success"])
+        outcome = [r["success"] for r in result["data"]["results"]]
+        self.assertEqual(outcome, [True, True, False, True, True, True])
+        licensed, counter, _ = self._state()
+        self.assertEqual((licensed, counter), (2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import azure.functions as func
+from ..shared.request_pipeline import http_endpoint, json_response, error_response
+from ..shared.voucher_service import (
+    DEFAULT_CAMPAIGN,
+    VOUCHER_PAGE_DEFAULT,
+    find_voucher_code,
+    query_vouchers,
+)
+
+@http_endpoint(methods=("GET",), role="agente")
+def main(req: func.HttpRequest, user: dict) -> func.HttpResponse:
+    """Voucher lookup endpoint - GET /api/vouchers/{tipo?}
+
+    tipo: escolas (padrão) | excecoes | parcelamentos. Sem tipo e com ``codigo``,
+    procura o código em todas as planilhas.
+    Filtros: campanha, escola (parte do nome), codigo; em escolas também
+    idEscola, cluster, status, direito e enviado (sim/nao).
+    Paginação: page, pageSize.
+    """
+    tipo = req.route_params.get('tipo')
+    campaign = req.params.get('campanha') or None
+
+    if not tipo and req.params.get('codigo'):
+        try:
+            return json_response({"success": True, **find_voucher_code(req.params['codigo'], campaign)})
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+    try:
+        page = int(req.params.get('page') or 1)
+        page_size = int(req.params.get('pageSize') or VOUCHER_PAGE_DEFAULT)
+    except ValueError:
+        return error_response("page e pageSize devem ser números inteiros", 400)
+
+    try:
+        result = query_vouchers(
+            tipo or "escolas",
+            req.params,
+            campaign=campaign or DEFAULT_CAMPAIGN,
+            page=page,
+            page_size=page_size,
+        )
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    return json_response({"success": True, **result})
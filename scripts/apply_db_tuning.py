@@ -18,6 +18,10 @@ INDEX_STATEMENTS = [
     "CREATE INDEX IF NOT EXISTS idx_users_has_canva ON users (has_canva);",
     "CREATE INDEX IF NOT EXISTS idx_school_limits_school_id ON school_limits (school_id);",
     "CREATE INDEX IF NOT EXISTS idx_audit_logs_school_id_ts ON audit_logs (school_id, ts DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_ts_id ON audit_logs (ts DESC, id DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_action_ts ON audit_logs (action, ts DESC);",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_actor_trgm ON audit_logs USING gin (actor gin_trgm_ops);",
 ]
 
 
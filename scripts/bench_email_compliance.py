@@ -0,0 +1,88 @@
+"""Compara o classificador de e-mail compartilhado com as implementações antigas.
+
+Lê os e-mails do licencas_canva.csv, mede o custo por usuário e lista os e-mails
+em que alguma regra antiga discorda do classificador atual.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from api.shared.email_compliance import EmailClassifier  # noqa: E402
+
+DEFAULT_FILE = PROJECT_ROOT / "public" / "data" / "licencas_canva.csv"
+
+LEGACY_ALLOWED_DOMAINS = ["@maplebear.com.br", "@mbcentral.com.br", "@seb.com.br", "@sebsa.com.br"]
+
+
+def legacy_model_rule(email: str) -> bool:
+    """Antigo EmailComplianceHelper.is_email_compliant (model.py)."""
+    if not email:
+        return False
+    email_lower = email.lower()
+    domain_part = email_lower.split("@")[-1]
+    return any(domain in email_lower for domain in LEGACY_ALLOWED_DOMAINS) or ("maplebear" in domain_part)
+
+
+def legacy_keyword_rule(email: str) -> bool:
+    """Antiga cópia usada no overview e no api/scripts/load_initial_data.py."""
+    normalized = (email or "").strip().lower()
+    if "@" not in normalized:
+        return False
+    local_part, _, domain = normalized.partition("@")
+    if any(kw in domain for kw in ["maplebear", "mbcentral", "sebsa", "seb"]):
+        return True
+    if domain.startswith("mb") and len(domain) > 2:
+        return True
+    if local_part.startswith("mb") and len(local_part) > 2:
+        return True
+    return False
+
+
+def read_emails(path: Path) -> list:
+    lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
+    emails = []
+    for line in lines[1:]:
+        cells = [cell.strip() for cell in line.replace('"', "").split(";")]
+        if len(cells) > 1 and cells[1]:
+            emails.append(cells[1])
+    return emails
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--file", type=Path, default=DEFAULT_FILE, help="CSV de licenças (coluna 2 = e-mail)")
+    parser.add_argument("--copies", type=int, default=20, help="réplicas da lista para simular bases maiores")
+    parser.add_argument("--repeat", type=int, default=5, help="execuções por medição")
+    args = parser.parse_args()
+
+    base = read_emails(args.file)
+    emails = base * args.copies
+    classifier = EmailClassifier()
+
+    current = dict(zip(base, classifier.classify_many(base)))
+    for label, rule in (("model.py", legacy_model_rule), ("keywords", legacy_keyword_rule)):
+        diverging = [email for email in base if rule(email) != current[email]]
+        print(f"{label}: {len(diverging)} e-mails com resultado diferente")
+        for email in diverging[:10]:
+            print(f"    {email}: antigo={rule(email)} atual={current[email]}")
+
+    print(f"\n{len(emails)} e-mails ({len(base)} x {args.copies})")
+    timings = (
+        ("model.py (antigo)", lambda: [legacy_model_rule(email) for email in emails]),
+        ("keywords (antigo)", lambda: [legacy_keyword_rule(email) for email in emails]),
+        ("is_compliant", lambda: [classifier.is_compliant(email) for email in emails]),
+        ("classify_many", lambda: classifier.classify_many(emails)),
+    )
+    for label, fn in timings:
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{label:>18}: {best * 1e9 / len(emails):8.0f} ns/usuário")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compara a serialização antiga (asdict + json.dumps) com o JSONSerializer das respostas."""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from dataclasses import asdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from api.shared.canva_overview_service import load_franchising_schools  # noqa: E402
+from api.shared.model import JSONSerializer, LicenseBadgeHelper, SchoolOverview  # noqa: E402
+
+
+def build_overview(copies: int):
+    schools = load_franchising_schools()
+    overview = []
+    for copy in range(copies):
+        for index, school in enumerate(schools):
+            used = index % 3
+            overview.append(
+                SchoolOverview(
+                    id=f"{school['id']}-{copy}" if copy else school["id"],
+                    name=school["name"],
+                    status=school["status"],
+                    cluster=school["cluster"],
+                    city=school["city"],
+                    state=school["state"],
+                    region="",
+                    carteira_saf="",
+                    used=used,
+                    limit=2,
+                    badge=LicenseBadgeHelper.generate_badge(used, 2),
+                    contact={"email": f"escola{school['id']}@maplebear.com.br", "phone": ""},
+                )
+            )
+    return overview
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=10, help="réplicas do Franchising.csv no payload")
+    parser.add_argument("--repeat", type=int, default=20, help="execuções por medição")
+    args = parser.parse_args()
+
+    overview = build_overview(args.copies)
+    serializer = JSONSerializer()
+
+    def legacy():
+        return json.dumps([asdict(item) for item in overview], ensure_ascii=False)
+
+    def current():
+        return serializer.dumps(overview)
+
+    assert json.loads(legacy()) == json.loads(current())
+
+    engine = "orjson" if serializer.accelerated else "json (stdlib)"
+    print(f"{len(overview)} escolas, encoder: {engine}, payload: {len(current())} bytes")
+    for label, fn in (("asdict + json.dumps", legacy), ("JSONSerializer", current)):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{label:>22}: {best * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
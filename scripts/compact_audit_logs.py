@@ -0,0 +1,33 @@
+"""Compacta os meses de auditoria já fechados (audits/audit-YYYY-MM.jsonl -> .colz) no Blob Storage."""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from api.shared.blob import BLOB_CONNECTION_STRING, BLOB_LOCAL_DIR, BlobStorageService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connection-string", default=BLOB_CONNECTION_STRING, help="padrão: BLOB_CONNECTION_STRING")
+    parser.add_argument("--local-dir", default=BLOB_LOCAL_DIR, help="pasta local no lugar do Blob (padrão: BLOB_LOCAL_DIR)")
+    parser.add_argument("--now", type=datetime.fromisoformat, help="data de referência (UTC) para decidir os meses fechados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    service = BlobStorageService(connection_string=args.connection_string, local_dir=args.local_dir)
+    results = service.compact_audit_logs(now=args.now)
+    for blob_name, count in sorted(results.items()):
+        print(f"{blob_name}: {count} entradas" if count else f"{blob_name}: mantido (mudou durante a compactação)")
+    if not results:
+        print("Nenhum mês fechado pendente de compactação")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Converte planilhas .xlsx para o cache colunar (Parquet ou .npz) usado pelas cargas."""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from api.shared.workbook_cache import WORKBOOK_CACHE_DIR, read_workbook, workbook_key  # noqa: E402
+
+DEFAULT_WORKBOOKS = [PROJECT_ROOT / "api" / "local_data" / "Franchising_oficial.xlsx"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("workbooks", nargs="*", type=Path, default=DEFAULT_WORKBOOKS, help="planilhas a converter")
+    parser.add_argument("--cache-dir", type=Path, default=Path(WORKBOOK_CACHE_DIR), help="padrão: WORKBOOK_CACHE_DIR")
+    args = parser.parse_args()
+
+    for path in args.workbooks:
+        df = read_workbook(path, cache_dir=args.cache_dir)
+        key = workbook_key(path.read_bytes())
+        print(f"{path.name}: {df.shape[0]} linhas x {df.shape[1]} colunas -> {args.cache_dir / key}.*")
+
+
+if __name__ == "__main__":
+    main()
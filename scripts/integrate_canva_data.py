@@ -0,0 +1,55 @@
+"""Gera o canva_data_integrated_latest.json a partir das exportações do Canva (modo incremental)."""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from api.shared.canva_data_processor import generate_markdown_report  # noqa: E402
+from api.shared.canva_integration import (  # noqa: E402
+    DATA_DIR,
+    DEFAULT_OUTPUT,
+    DEFAULT_STATE,
+    PUBLISHED_OUTPUT,
+    CanvaIntegrationPipeline,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--members", type=Path, help="member-*.csv (padrão: o de período mais recente em public/data)")
+    parser.add_argument("--templates", type=Path, help="template-*.csv (padrão: o do mesmo período dos membros)")
+    parser.add_argument("--schools", type=Path, default=DATA_DIR / "Franchising.csv", help="base de escolas")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="documento integrado gerado")
+    output.add_argument("--publish", action="store_true", help="substitui o documento publicado em public/data")
+    parser.add_argument("--state", type=Path, default=DEFAULT_STATE, help="estado da execução anterior")
+    parser.add_argument("--force", action="store_true", help="ignora o estado e reconstrói tudo")
+    parser.add_argument("--report", type=Path, help="também grava o relatório Markdown neste caminho")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    pipeline = CanvaIntegrationPipeline(
+        members_path=args.members,
+        templates_path=args.templates,
+        schools_path=args.schools,
+        output_path=PUBLISHED_OUTPUT if args.publish else args.output,
+        state_path=args.state,
+    )
+    summary = pipeline.run(force=args.force)
+    print(f"{summary['mode']}: {summary['changed_schools']} escolas remontadas -> {summary['output']}")
+
+    if args.report:
+        import json
+
+        with open(summary["output"], "r", encoding="utf-8") as handle:
+            document = json.load(handle)
+        args.report.write_text(generate_markdown_report(document), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
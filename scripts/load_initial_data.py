@@ -9,7 +9,6 @@ The script expects DATABASE_URL to point to a PostgreSQL instance.
 from __future__ import annotations
 
 import sys
-import unicodedata
 from pathlib import Path
 from typing import Dict
 
@@ -25,22 +24,14 @@ from api.shared.model import (  # noqa: E402
     EmailComplianceHelper,
     StatusLicencaHelper,
 )
+from api.shared.service import data_service  # noqa: E402
+from api.shared.workbook_cache import normalize_column, read_workbook  # noqa: E402
 
 SCHOOLS_FILE = PROJECT_ROOT / "api" / "local_data" / "Franchising_oficial.xlsx"
 USERS_FILE = PROJECT_ROOT / "api" / "local_data" / "usuarios_public.csv"
 DEFAULT_LICENSE_LIMIT = 2
 
 
-def normalize_column(name: str) -> str:
-    normalized = (
-        unicodedata.normalize("NFKD", str(name))
-        .encode("ascii", "ignore")
-        .decode("ascii")
-    )
-    normalized = normalized.replace("-", " ")
-    return " ".join(normalized.lower().split())
-
-
 def to_str(value) -> str:
     if value is None:
         return ""
@@ -59,8 +50,8 @@ def load_schools(session) -> int:
         print(f"Schools file not found: {SCHOOLS_FILE}")
         return 0
 
-    df = pd.read_excel(SCHOOLS_FILE)
-    df = df.rename(columns={col: normalize_column(col) for col in df.columns})
+    # Colunas já normalizadas; o .xlsx só é interpretado quando muda
+    df = read_workbook(SCHOOLS_FILE)
 
     column_map: Dict[str, str] = {
         "id da escola": "id",
@@ -150,6 +141,9 @@ def main():
         schools_count = load_schools(session)
         users_count = load_users(session)
 
+    # Recalcula schools.used_licenses a partir dos usuários recém-carregados
+    data_service.reconcile_usage_counters(actor="load_initial_data")
+
     print(
         f"Finished loading data: {schools_count} schools, {users_count} users into PostgreSQL."
     )
@@ -0,0 +1,38 @@
+"""Detect (and optionally fix) drift between schools.used_licenses and users.has_canva."""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from api.shared.service import data_service  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="apenas relata divergências, sem corrigir os contadores",
+    )
+    args = parser.parse_args()
+
+    result = data_service.reconcile_usage_counters(actor="reconcile_job", fix=not args.check)
+    if not result.get("success"):
+        print(result.get("message"))
+        sys.exit(1)
+
+    drift = result["data"]["drift"]
+    for item in drift:
+        print(f"{item['school_id']}: contador={item['counter']} real={item['actual']}")
+    print(result["message"] + (" (corrigido)" if result["data"]["fixed"] else ""))
+
+    if args.check and drift:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import json
+import os
+import random
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.audit_archive import AuditArchive, encode_archive  # noqa: E402
+from api.shared.audit_log import (  # noqa: E402
+    append_lines,
+    audit_archive_name,
+    compact_audit_month,
+    compact_closed_months,
+    read_audit_range,
+)
+from api.shared.local_blob import LocalBlobContainer  # noqa: E402
+
+ACTIONS = ["ASSIGN_LICENSE", "REVOKE_LICENSE", "TRANSFER_LICENSE", "UPDATE_SCHOOL"]
+
+
+def _entries(month, count, seed=7):
+    rng = random.Random(seed)
+    entries = []
+    for n in range(count):
+        school = rng.randrange(1, 120)
+        entries.append(
+            {
+                "action": rng.choice(ACTIONS),
+                "school_id": school,
+                "school_name": f"Maple Bear Escola {school}",
+                "actor": f"agente{rng.randrange(6)}@maplebear.com.br",
+                "payload": {"email": f"usuario{rng.randrange(5000)}@escola{school}.com.br", "role": "Professor"},
+                "ts": f"{month}-{1 + n % 28:02d}T{n % 24:02d}:{n % 60:02d}:{n % 60:02d}.{n:06d}",
+            }
+        )
+    return entries
+
+
+def _write_jsonl(container, month, entries):
+    lines = [(json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8") for entry in entries]
+    append_lines(container.get_blob_client, f"audits/audit-{month}.jsonl", lines)
+    return sum(len(line) for line in lines)
+
+
+def test_archive_round_trip_is_lossless():
+    entries = _entries("2026-01", 300) + [
+        {"action": "ASSIGN_LICENSE", "school_id": "12", "ts": "2026-01-05T10:00:00"},
+        {"action": "ASSIGN_LICENSE", "school_id": 12, "ts": "2026-01-05T10:00:00Z"},
+        {"action": "SEM_DATA", "actor": None},
+        {"school_id": None, "ts": "2026-01-31T23:59:59.999999", "payload": {"obs": "linha\nquebrada ✓"}},
+    ]
+    archive = AuditArchive(encode_archive(entries, "2026-01", source_etag='"abc"'))
+
+    assert len(archive) == len(entries) and archive.source_etag == '"abc"'
+    key = lambda entry: json.dumps(entry, sort_keys=True)  # noqa: E731
+    assert sorted(map(key, archive.entries())) == sorted(map(key, entries))
+
+    day = archive.entries("2026-01-05", "2026-01-05")
+    expected = [entry for entry in entries if str(entry.get("ts", ""))[:10] == "2026-01-05"]
+    assert sorted(map(key, day)) == sorted(map(key, expected))
+    assert [entry["ts"] for entry in archive.entries("2026-01-31", "2026-01-31")][-1] == "2026-01-31T23:59:59.999999"
+
+
+def test_non_string_ts_round_trips():
+    entries = [
+        {"action": "NULO", "ts": None},
+        {"action": "NUMERO", "ts": 1767225600},
+        {"action": "AUSENTE"},
+        {"action": "TEXTO", "ts": "ontem"},
+        {"action": "OK", "ts": "2026-01-02T08:00:00"},
+    ]
+    archive = AuditArchive(encode_archive(entries, "2026-01"))
+
+    key = lambda entry: json.dumps(entry, sort_keys=True)  # noqa: E731
+    assert sorted(map(key, archive.entries())) == sorted(map(key, entries))
+    assert archive.entries("2026-01-01", "2026-01-31") == [{"action": "OK", "ts": "2026-01-02T08:00:00"}]
+
+
+def test_compaction_shrinks_closed_month_and_reads_transparently(tmp_path):
+    container = LocalBlobContainer(str(tmp_path))
+    entries = _entries("2026-01", 5000)
+    size = _write_jsonl(container, "2026-01", entries)
+    _write_jsonl(container, "2026-02", _entries("2026-02", 10))
+    before = list(read_audit_range(container.get_blob_client, "2026-01-01", "2026-02-28"))
+
+    results = compact_closed_months(container.list_blobs, container.get_blob_client, now=datetime(2026, 2, 15))
+    assert results == {"audits/audit-2026-01.jsonl": 5000}
+    names = {blob.name for blob in container.list_blobs("audits/")}
+    assert "audits/audit-2026-01.jsonl" not in names and "audits/audit-2026-02.jsonl" in names
+    archived = container.get_blob_client(audit_archive_name("audits/audit-2026-01.jsonl")).get_blob_properties()
+    assert archived.size * 10 < size
+
+    after = list(read_audit_range(container.get_blob_client, "2026-01-01", "2026-02-28"))
+    assert after == before
+    assert [entry["ts"] for entry in after] == sorted((entry["ts"] for entry in after), reverse=True)
+    assert list(read_audit_range(container.get_blob_client, "2026-01-03", "2026-01-03")) == [
+        entry for entry in before if entry["ts"][:10] == "2026-01-03"
+    ]
+
+
+def test_straggler_lines_after_compaction_are_read_and_merged(tmp_path):
+    container = LocalBlobContainer(str(tmp_path))
+    _write_jsonl(container, "2026-01", _entries("2026-01", 20))
+    blob_name = "audits/audit-2026-01.jsonl"
+    assert compact_audit_month(container.get_blob_client, blob_name) == 20
+
+    late = {"action": "LATE", "ts": "2026-01-31T23:59:59.900000"}
+    _write_jsonl(container, "2026-01", [late])
+    logs = list(read_audit_range(container.get_blob_client, "2026-01-01", "2026-01-31"))
+    assert len(logs) == 21 and logs[0] == late
+
+    assert compact_audit_month(container.get_blob_client, blob_name) == 21
+    assert list(read_audit_range(container.get_blob_client, "2026-01-01", "2026-01-31")) == logs
+
+
+def test_month_changed_during_compaction_is_kept_as_jsonl(tmp_path):
+    container = LocalBlobContainer(str(tmp_path))
+    _write_jsonl(container, "2026-01", _entries("2026-01", 20))
+    blob_name = "audits/audit-2026-01.jsonl"
+
+    def racing_client(name):
+        client = container.get_blob_client(name)
+        if name == blob_name:
+            delete_blob = client.delete_blob
+
+            def delete_after_append(**kwargs):
+                _write_jsonl(container, "2026-01", [{"action": "RACE", "ts": "2026-01-31T10:00:00"}])
+                return delete_blob(**kwargs)
+
+            client.delete_blob = delete_after_append
+        return client
+
+    assert compact_audit_month(racing_client, blob_name) == 0
+    assert not container.get_blob_client(audit_archive_name(blob_name)).exists()
+    assert len(list(read_audit_range(container.get_blob_client, "2026-01-01", "2026-01-31"))) == 21
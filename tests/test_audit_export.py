@@ -0,0 +1,87 @@
+import csv
+import gzip
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared import audit_export  # noqa: E402
+from api.shared.audit_export import (  # noqa: E402
+    CSV_HEADERS,
+    AuditExport,
+    AuditExportTooLarge,
+    build_audit_export,
+    gzip_chunks,
+    iter_audit_csv,
+)
+
+
+def _logs(count):
+    for index in range(count):
+        yield {
+            "ts": f"2025-11-{index % 28 + 1:02d}T10:00:00",
+            "action": "ASSIGN_LICENSE",
+            "school_id": index,
+            "school_name": "Maple Bear São Paulo, Centro",
+            "actor": "coordenadora@maplebear.com.br",
+            "payload": {"linha": index, "obs": 'aspas "duplas"'},
+        }
+
+
+def test_iter_audit_csv_emits_bounded_chunks_of_valid_csv():
+    chunks = list(iter_audit_csv(_logs(500), chunk_size=4096))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) < 4096 + 512 for chunk in chunks[:-1])
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows[0] == CSV_HEADERS and len(rows) == 501
+    assert rows[1][3] == "Maple Bear São Paulo, Centro"
+    assert rows[500][5] == '{"linha": 499, "obs": "aspas \\"duplas\\""}'
+
+
+def test_gzip_chunks_round_trip():
+    chunks = list(iter_audit_csv(_logs(300), chunk_size=1024))
+    compressed = list(gzip_chunks(iter(chunks)))
+
+    assert gzip.decompress(b"".join(compressed)) == b"".join(chunks)
+    assert gzip.decompress(b"".join(gzip_chunks(iter([])))) == b""
+
+
+def test_small_export_is_returned_inline():
+    export = build_audit_export(_logs(10), inline_limit=1024 * 1024)
+    assert export.download_url is None
+    assert export.body.decode("utf-8").count("\n") == 11
+
+    compressed = build_audit_export(_logs(10), compress=True, inline_limit=1024 * 1024)
+    assert gzip.decompress(compressed.body) == export.body
+
+
+def test_large_export_is_staged_with_every_chunk(monkeypatch):
+    staged = {}
+
+    def stage(chunks, compress):
+        staged["body"] = b"".join(chunks)
+        return AuditExport(download_url="https://conta/exports/auditoria.csv", blob_name="exports/auditoria.csv")
+
+    monkeypatch.setattr(audit_export, "_stage_to_blob", stage)
+    export = build_audit_export(_logs(2000), inline_limit=16 * 1024)
+
+    assert export.body is None and export.download_url.endswith("auditoria.csv")
+    assert staged["body"] == b"".join(iter_audit_csv(_logs(2000)))
+
+
+def test_large_export_without_blob_storage_is_refused(monkeypatch):
+    consumed = []
+
+    def logs():
+        for log in _logs(100_000):
+            consumed.append(log)
+            yield log
+
+    monkeypatch.setattr(audit_export, "_stage_to_blob", lambda chunks, compress: None)
+    with pytest.raises(AuditExportTooLarge):
+        build_audit_export(logs(), inline_limit=16 * 1024)
+    assert len(consumed) < 1000
@@ -0,0 +1,284 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.audit_log import (  # noqa: E402
+    AuditLogWriter,
+    AuditMonthIndex,
+    append_lines,
+    audit_blob_name,
+    audit_index_name,
+    audit_legacy_name,
+    compact_audit_month,
+    read_audit_month,
+    read_audit_range,
+)
+from api.shared.blob import BlobStorageService  # noqa: E402
+from api.shared.local_blob import LocalBlobContainer  # noqa: E402
+
+
+class CountingContainer(LocalBlobContainer):
+    def __init__(self, root):
+        super().__init__(root)
+        self.appends = 0
+        self.downloaded = 0
+
+    def get_blob_client(self, blob):
+        client = super().get_blob_client(blob)
+        append_block = client.append_block
+        download_blob = client.download_blob
+
+        def counted(data, *args, **kwargs):
+            result = append_block(data, *args, **kwargs)
+            self.appends += 1
+            return result
+
+        def counted_download(*args, **kwargs):
+            result = download_blob(*args, **kwargs)
+            if blob.endswith(".jsonl"):
+                self.downloaded += result.size
+            return result
+
+        client.append_block = counted
+        client.download_blob = counted_download
+        return client
+
+
+def _write_days(container, month, days, per_day=50):
+    lines = [
+        (json.dumps({"action": "ASSIGN_LICENSE", "n": n, "ts": f"{month}-{day:02d}T{n // 60:02d}:{n % 60:02d}:00"}) + "\n").encode()
+        for day in days
+        for n in range(per_day)
+    ]
+    append_lines(container.get_blob_client, f"audits/audit-{month}.jsonl", lines)
+    return sum(len(line) for line in lines)
+
+
+def _lines(container, blob_name):
+    content = container.get_blob_client(blob_name).download_blob().readall().decode("utf-8")
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def test_batches_by_count_and_by_interval(tmp_path):
+    container = CountingContainer(str(tmp_path))
+    writer = AuditLogWriter(container.get_blob_client, batch_size=3, flush_interval_ms=50)
+
+    for index in range(3):
+        writer.append({"action": "ASSIGN_LICENSE", "n": index})
+    assert container.appends == 1 and len(writer) == 0
+
+    writer.append({"action": "REVOKE_LICENSE", "n": 3})
+    assert container.appends == 1 and len(writer) == 1
+    deadline = time.monotonic() + 2
+    while len(writer) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    entries = _lines(container, audit_blob_name(datetime.utcnow()))
+    assert [entry["n"] for entry in entries] == [0, 1, 2, 3]
+    assert container.appends == 2 and all(entry["ts"] for entry in entries)
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    container = LocalBlobContainer(str(tmp_path))
+    writers = [AuditLogWriter(container.get_blob_client, batch_size=5, flush_interval_ms=10_000) for _ in range(4)]
+
+    def work(writer, worker):
+        for index in range(50):
+            writer.append({"worker": worker, "n": index})
+        writer.flush()
+
+    threads = [threading.Thread(target=work, args=(writer, worker)) for worker, writer in enumerate(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    blob_name = next(container.list_blobs("audits/")).name
+    entries = _lines(container, blob_name)
+    assert sorted((entry["worker"], entry["n"]) for entry in entries) == [(w, n) for w in range(4) for n in range(50)]
+
+
+def test_legacy_block_blob_is_copied_before_conversion(tmp_path):
+    container = LocalBlobContainer(str(tmp_path))
+    blob_name = audit_blob_name(datetime.utcnow())
+    old = container.get_blob_client(blob_name)
+    old.upload_blob(b'{"action": "OLD", "ts": "2020-01-01T00:00:00"}\n', overwrite=True)
+    legacy_name = audit_legacy_name(blob_name, old.get_blob_properties().etag)
+
+    writer = AuditLogWriter(container.get_blob_client, batch_size=1)
+    writer.append({"action": "NEW"})
+
+    properties = container.get_blob_client(blob_name).get_blob_properties()
+    assert properties.blob_type == "AppendBlob" and properties.metadata == {"legacyblob": legacy_name}
+    assert [entry["action"] for entry in _lines(container, legacy_name)] == ["OLD"]
+    assert [entry["action"] for entry in _lines(container, blob_name)] == ["NEW"]
+    entries = read_audit_month(container.get_blob_client, blob_name, "2020-01-01", "2999-12-31")
+    assert [entry["action"] for entry in entries] == ["NEW", "OLD"]
+
+
+def test_interleaved_batches_are_read_newest_first_before_and_after_compaction(tmp_path):
+    container = LocalBlobContainer(str(tmp_path))
+    first = AuditLogWriter(container.get_blob_client, batch_size=100, flush_interval_ms=60000)
+    second = AuditLogWriter(container.get_blob_client, batch_size=100, flush_interval_ms=60000)
+    for n in range(6):
+        (first if n % 2 == 0 else second).append({"action": f"A{n}"})
+        time.sleep(0.001)
+    # O lote do segundo worker chega ao blob antes das entradas mais antigas do primeiro
+    second.flush()
+    first.flush()
+
+    blob_name = audit_blob_name(datetime.utcnow())
+    assert [entry["action"] for entry in _lines(container, blob_name)] == ["A1", "A3", "A5", "A0", "A2", "A4"]
+    before = read_audit_month(container.get_blob_client, blob_name, "2000-01-01", "2999-12-31")
+    assert [entry["action"] for entry in before] == ["A5", "A4", "A3", "A2", "A1", "A0"]
+
+    assert compact_audit_month(container.get_blob_client, blob_name) == 6
+    after = read_audit_month(container.get_blob_client, blob_name, "2000-01-01", "2999-12-31", now=datetime(2999, 1, 1))
+    assert after == before
+
+
+def test_interrupted_conversion_loses_nothing(tmp_path):
+    container = LocalBlobContainer(str(tmp_path))
+    blob_name = "audits/audit-2025-10.jsonl"
+    old = container.get_blob_client(blob_name)
+    old.upload_blob(b'{"action": "OLD", "ts": "2025-10-01T00:00:00"}\n', overwrite=True)
+
+    class Crash(Exception):
+        pass
+
+    def crashing(name):
+        client = container.get_blob_client(name)
+        if name == blob_name:
+            def create_append_blob(*args, **kwargs):
+                raise Crash()
+            client.create_append_blob = create_append_blob
+        return client
+
+    with pytest.raises(Crash):
+        append_lines(crashing, blob_name, [b'{"action": "NEW", "ts": "2025-10-02T00:00:00"}\n'])
+    # A cópia sem referência não duplica nada; o block blob continua intacto
+    assert [entry["action"] for entry in read_audit_month(container.get_blob_client, blob_name, "2025-10-01", "2025-10-31")] == ["OLD"]
+
+    append_lines(container.get_blob_client, blob_name, [b'{"action": "NEW", "ts": "2025-10-02T00:00:00"}\n'])
+    assert [entry["action"] for entry in read_audit_month(container.get_blob_client, blob_name, "2025-10-01", "2025-10-31")] == [
+        "NEW",
+        "OLD",
+    ]
+
+    assert compact_audit_month(container.get_blob_client, blob_name) == 2
+    assert [blob.name for blob in container.list_blobs("audits/")] == ["audits/audit-2025-10.colz"]
+    assert [entry["action"] for entry in read_audit_month(container.get_blob_client, blob_name, "2025-10-01", "2025-10-31")] == [
+        "NEW",
+        "OLD",
+    ]
+
+
+def test_losing_converter_drops_its_unreferenced_copy(tmp_path):
+    container = LocalBlobContainer(str(tmp_path))
+    blob_name = "audits/audit-2025-10.jsonl"
+    old = container.get_blob_client(blob_name)
+    old.upload_blob(b'{"action": "OLD", "ts": "2025-10-01T00:00:00"}\n', overwrite=True)
+
+    raced = []
+
+    def racing(name):
+        client = container.get_blob_client(name)
+        if name == blob_name and not raced:
+            download_blob = client.download_blob
+
+            def download_then_change(*args, **kwargs):
+                # Um escritor do formato antigo regrava o mês logo depois deste download
+                result = download_blob(*args, **kwargs)
+                raced.append(True)
+                old.upload_blob(b'{"action": "OLD", "ts": "2025-10-01T00:00:00"}\n{"action": "OLD2", "ts": "2025-10-01T00:00:01"}\n', overwrite=True)
+                return result
+
+            client.download_blob = download_then_change
+        return client
+
+    append_lines(racing, blob_name, [b'{"action": "NEW", "ts": "2025-10-02T00:00:00"}\n'])
+    names = [blob.name for blob in container.list_blobs("audits/")]
+    legacy = [name for name in names if ".legacy-" in name]
+    assert len(legacy) == 1 and container.get_blob_client(blob_name).get_blob_properties().metadata == {"legacyblob": legacy[0]}
+    assert [entry["action"] for entry in read_audit_month(container.get_blob_client, blob_name, "2025-10-01", "2025-10-31")] == [
+        "NEW",
+        "OLD2",
+        "OLD",
+    ]
+
+
+def test_failed_flush_is_retried(tmp_path):
+    container = LocalBlobContainer(str(tmp_path))
+    calls = {"n": 0}
+
+    def flaky(blob_name):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise ConnectionError("blob indisponível")
+        return container.get_blob_client(blob_name)
+
+    writer = AuditLogWriter(flaky, batch_size=1, flush_interval_ms=0)
+    writer.append({"action": "A"})
+    assert len(writer) == 1
+    writer.append({"action": "B"})
+    assert len(writer) == 0
+    blob_name = next(container.list_blobs("audits/")).name
+    assert [entry["action"] for entry in _lines(container, blob_name)] == ["A", "B"]
+
+
+def test_blob_service_reads_queued_entries(tmp_path):
+    service = BlobStorageService(connection_string="", local_dir=str(tmp_path))
+    service.audit_writer.flush_interval = 60
+    service.append_audit_log({"action": "ASSIGN_LICENSE", "actor": "agente@maplebear.com.br"})
+    assert len(service.audit_writer) == 1
+
+    logs = service.read_audit_logs()
+    assert [log["action"] for log in logs] == ["ASSIGN_LICENSE"]
+    assert (tmp_path / "data" / "audits").is_dir()
+
+
+def test_day_range_reads_only_indexed_slices(tmp_path):
+    container = CountingContainer(str(tmp_path))
+    size = _write_days(container, "2026-03", range(1, 31))
+
+    # Primeira leitura baixa o mês inteiro uma vez e grava o índice
+    logs = list(read_audit_range(container.get_blob_client, "2026-03-10", "2026-03-11"))
+    assert len(logs) == 100 and container.downloaded == size
+    assert [log["ts"] for log in logs] == sorted((log["ts"] for log in logs), reverse=True)
+    index = AuditMonthIndex.from_json(
+        container.get_blob_client(audit_index_name("audits/audit-2026-03.jsonl")).download_blob().readall()
+    )
+    assert index.size == size and index.count("2026-03-01", "2026-03-31") == 1500
+
+    container.downloaded = 0
+    logs = list(read_audit_range(container.get_blob_client, "2026-03-15", "2026-03-15"))
+    assert {log["ts"][:10] for log in logs} == {"2026-03-15"} and len(logs) == 50
+    assert container.downloaded < size / 20
+
+    # Linhas novas: só o trecho acrescentado é baixado para estender o índice
+    container.downloaded = 0
+    added = _write_days(container, "2026-03", [31], per_day=5)
+    logs = list(read_audit_range(container.get_blob_client, "2026-03-31", "2026-03-31"))
+    assert len(logs) == 5 and container.downloaded == added
+
+
+def test_months_are_merged_newest_first(tmp_path):
+    container = LocalBlobContainer(str(tmp_path))
+    _write_days(container, "2025-12", [30, 31], per_day=3)
+    _write_days(container, "2026-01", [1, 2], per_day=3)
+    _write_days(container, "2026-02", [1], per_day=3)
+    # Mês legado em block blob também é lido (e indexado)
+    container.get_blob_client("audits/audit-2025-11.jsonl").upload_blob(
+        b'{"action": "OLD", "payload": {"ts": "2020-01-01"}, "ts": "2025-11-20T10:00:00"}\n', overwrite=True
+    )
+
+    logs = list(read_audit_range(container.get_blob_client, "2025-11-01", "2026-01-01"))
+    assert [log["ts"][:10] for log in logs] == ["2026-01-01"] * 3 + ["2025-12-31"] * 3 + ["2025-12-30"] * 3 + ["2025-11-20"]
+    assert [log["ts"] for log in logs] == sorted((log["ts"] for log in logs), reverse=True)
@@ -0,0 +1,158 @@
+import os
+import sys
+
+import pandas as pd
+from azure.core.pipeline.transport import HttpResponse, HttpTransport
+from azure.storage.blob import BlobClient
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.blob import BlobStorageService  # noqa: E402
+from api.shared.blob_cache import BlobReadCache  # noqa: E402
+from api.shared.local_blob import LocalBlobContainer  # noqa: E402
+
+
+class FakeResponse(HttpResponse):
+    def __init__(self, request, status, headers, body=b""):
+        super().__init__(request, None)
+        self.status_code = status
+        self.headers = headers
+        self.reason = "OK" if status == 200 else "Not Modified"
+        self.content_type = headers.get("Content-Type")
+        self._body = body
+
+    def body(self):
+        return self._body
+
+    def text(self, encoding=None):
+        return self._body.decode(encoding or "utf-8")
+
+    def stream_download(self, pipeline, **kwargs):
+        return Chunks([self._body])
+
+
+class Chunks(list):
+    """Corpo da resposta; o SDK pendura as propriedades do blob nele."""
+
+
+class ConditionalTransport(HttpTransport):
+    """Responde como o Blob Storage: 200 com o conteúdo ou 304 quando o If-None-Match bate."""
+
+    def __init__(self, body, etag):
+        self.body, self.etag = body, etag
+        self.statuses = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send(self, request, **kwargs):
+        if request.headers.get("If-None-Match") == self.etag:
+            self.statuses.append(304)
+            headers = {"ETag": self.etag, "x-ms-error-code": "ConditionNotMet"}
+            return FakeResponse(request, 304, headers)
+        self.statuses.append(200)
+        headers = {
+            "ETag": self.etag,
+            "Content-Type": "application/json",
+            "Content-Length": str(len(self.body)),
+            "Content-Range": f"bytes 0-{len(self.body) - 1}/{len(self.body)}",
+            "x-ms-blob-type": "BlockBlob",
+        }
+        return FakeResponse(request, 200, headers, self.body)
+
+
+class CountingParser:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, data):
+        self.calls += 1
+        return data.decode("utf-8")
+
+
+def test_unchanged_blob_is_neither_downloaded_nor_parsed_again(tmp_path):
+    container = LocalBlobContainer(str(tmp_path / "data"))
+    client = container.get_blob_client("config.json")
+    client.upload_blob(b'{"v": 1}', overwrite=True)
+    cache = BlobReadCache()
+    parse = CountingParser()
+
+    assert cache.read(client, parse) == '{"v": 1}'
+    assert cache.read(client, parse) == '{"v": 1}'
+    assert parse.calls == 1 and cache.stats == {"hits": 1, "disk_hits": 0, "misses": 1}
+
+    client.upload_blob(b'{"v": 22}', overwrite=True)
+    assert cache.read(client, parse) == '{"v": 22}' and parse.calls == 2
+
+
+def test_sdk_304_on_conditional_get_is_a_cache_hit():
+    transport = ConditionalTransport(b'{"v": 1}', '"0x8DC1"')
+    client = BlobClient("https://conta.blob.core.windows.net", "data", "config.json", transport=transport)
+    cache = BlobReadCache()
+    parse = CountingParser()
+
+    assert cache.read(client, parse) == '{"v": 1}'
+    assert cache.read(client, parse) == '{"v": 1}'
+    assert transport.statuses == [200, 304]
+    assert parse.calls == 1 and cache.stats == {"hits": 1, "disk_hits": 0, "misses": 1}
+
+
+def test_memory_cap_evicts_least_recently_used(tmp_path):
+    container = LocalBlobContainer(str(tmp_path / "data"))
+    clients = []
+    for name in ("a", "b", "c"):
+        clients.append(container.get_blob_client(name))
+        clients[-1].upload_blob(name.encode() * 400, overwrite=True)
+    cache = BlobReadCache(max_bytes=1000)
+
+    for client in clients:
+        cache.read(client, bytes)
+    assert len(cache) == 2 and cache.size <= 1000
+    cache.read(clients[1], bytes)
+    assert cache.stats["hits"] == 1
+    cache.read(clients[0], bytes)
+    assert cache.stats["misses"] == 4
+
+
+def test_disk_copy_saves_the_download_for_a_new_worker(tmp_path):
+    container = LocalBlobContainer(str(tmp_path / "data"))
+    client = container.get_blob_client("base.csv")
+    client.upload_blob("id;nome\n1;Escola\n".encode("latin-1"), overwrite=True)
+
+    BlobReadCache(disk_dir=str(tmp_path / "cache")).read(client, bytes)
+    fresh = BlobReadCache(disk_dir=str(tmp_path / "cache"))
+    assert fresh.read(client, bytes) == b"id;nome\n1;Escola\n"
+    assert fresh.stats == {"hits": 0, "disk_hits": 1, "misses": 0}
+
+
+def test_blob_service_reads_through_cache(tmp_path):
+    service = BlobStorageService(connection_string="", local_dir=str(tmp_path))
+    service.write_json_file("dados/config.json", {"limite": 10})
+    assert service.read_json_file("dados/config.json") == {"limite": 10}
+    service.write_json_file("dados/config.json", {"limite": 20})
+    assert service.read_json_file("dados/config.json") == {"limite": 20}
+    assert service.read_json_file("dados/inexistente.json") == {}
+
+    service._get_blob_client("Franchising.csv").upload_blob("ID;Nome\n1;São Paulo\n".encode("latin-1"), overwrite=True)
+    first = service.read_csv_file("Franchising.csv")
+    first.loc[0, "Nome"] = "alterado"
+    second = service.read_csv_file("Franchising.csv")
+    assert second.loc[0, "Nome"] == "São Paulo"
+    assert service.read_cache.stats["hits"] == 1
+
+    frame = pd.DataFrame({"ID": [1, 2], "Nome": ["A", "B"]})
+    path = tmp_path / "Franchising.xlsx"
+    frame.to_excel(path, index=False)
+    service._get_blob_client("Franchising.xlsx").upload_blob(path.read_bytes(), overwrite=True)
+    for _ in range(2):
+        assert service.read_excel_file("Franchising.xlsx").equals(frame)
+    assert service.read_cache.stats["hits"] == 2
@@ -0,0 +1,103 @@
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.canva_activity_service import ActivityStore, query_activity  # noqa: E402
+
+SCHOOLS = pd.DataFrame({"school_id": [1], "school_name": ["Maple Bear Santa Maria"]})
+DOMAINS = pd.DataFrame(
+    {"school_id": [1], "school_name": ["Maple Bear Santa Maria"], "school_domain": ["santamaria.maplebear.com.br"]}
+)
+
+
+def _member(email, role, created, published=0, shared=0, viewed=0):
+    return {
+        "nome": email.split("@")[0],
+        "email": email,
+        "funcao": role,
+        "ultima_atividade": "nov. 2025",
+        "designs_criados": created,
+        "designs_publicados": published,
+        "links_compartilhados": shared,
+        "designs_visualizados": viewed,
+    }
+
+
+def _export(start, end):
+    return Path(f"member-activity_TEAM_{start}_{end}_pt-BR.csv")
+
+
+# Dois períodos de 10 dias sem sobreposição
+STORE = ActivityStore(
+    [
+        (
+            _export(1000000000, 1000863999),
+            [_member("ana@santamaria.maplebear.com.br", "Professor", 10), _member("bia@gmail.com", "Estudante", 10)],
+        ),
+        (
+            _export(1000864000, 1001727999),
+            [
+                _member("ana@santamaria.maplebear.com.br", "Professor", 30, 4),
+                _member("bia@gmail.com", "Estudante", 0),
+                _member("caio@santamaria.maplebear.com.br", "Estudante", 0, viewed=2),
+            ],
+        ),
+    ],
+    SCHOOLS,
+    DOMAINS,
+)
+
+
+def test_latest_period_rollups_growth_and_inactive_licenses():
+    result = query_activity(store=STORE)
+
+    assert result["periodo"]["periodo"] == "1000864000_1001727999"
+    assert result["totais"] == {
+        "membros": 3,
+        "ativos": 2,
+        "inativos": 1,
+        "designs_criados": 30,
+        "designs_publicados": 4,
+        "links_compartilhados": 0,
+        "designs_visualizados": 2,
+    }
+    assert result["crescimento"]["comparado_com"] == "1000000000_1000863999"
+    assert result["crescimento"]["designs_criados_crescimento"] == 50.0
+    assert result["crescimento"]["alunos_crescimento"] == 0.0
+    assert [item["email"] for item in result["inativos"]["items"]] == ["bia@gmail.com"]
+    assert [(group["escola_id"], group["membros"], group["ativos"]) for group in result["grupos"]] == [(1, 2, 2), (0, 1, 0)]
+
+    by_role = query_activity(group_by="funcao", school_id="1", store=STORE)
+    assert by_role["totais"]["membros"] == 2
+    assert {group["funcao"]: group["designs_criados"] for group in by_role["grupos"]} == {"Professor": 30, "Estudante": 0}
+
+
+def test_first_period_has_no_growth_baseline():
+    result = query_activity("1000000000_1000863999", store=STORE)
+
+    assert result["crescimento"]["comparado_com"] is None
+    assert result["crescimento"]["designs_criados_crescimento"] is None
+    assert result["inativos"]["total"] == 0
+
+
+def test_role_growth_only_compares_windows_of_the_same_length():
+    store = ActivityStore(
+        [
+            # 20 dias, depois 10 dias: contadores por dia, funções sem comparação
+            (_export(1000000000, 1001727999), [_member("bia@gmail.com", "Estudante", 20)]),
+            (_export(1001728000, 1002591999), [_member("bia@gmail.com", "Estudante", 20)]),
+        ],
+        SCHOOLS,
+        DOMAINS,
+    )
+    growth = query_activity(store=store)["crescimento"]
+    assert growth["comparado_com"] == "1000000000_1001727999"
+    assert growth["designs_criados_crescimento"] == 100.0
+    assert growth["funcoes_comparado_com"] is None
+    assert growth["alunos_crescimento"] is None and growth["professores_crescimento"] is None
+
+    assert query_activity(store=STORE)["crescimento"]["funcoes_comparado_com"] == "1000000000_1000863999"
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest  # noqa: E402
+
+from api.shared import canva_data_cache  # noqa: E402
+from api.shared.canva_data_cache import CanvaDataLoader  # noqa: E402
+from mock_utils import create_mock_http_request  # noqa: E402
+
+DOCUMENT = {
+    "periodo_filtro": "Último mês",
+    "data_atualizacao": "2025-11-28",
+    "canva_metrics": {"total_pessoas": 10, "alunos": 7, "total_kits": 1, "kits": ["Kit"]},
+    "schools_allocation": [
+        {"school_id": 0, "school_name": "Usuários Sem Escola", "users": [{"nome": "X", "email": "x@x.com"}]},
+        {"school_id": 12, "school_name": "Escola A", "total_users": 1, "users": [{"nome": "Ana"}]},
+    ],
+    "unallocated_users_count": 1,
+    "unallocated_users_list": [{"email": "x@x.com"}],
+}
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    path = tmp_path / "canva.json"
+    path.write_text(json.dumps(DOCUMENT), encoding="utf-8")
+    monkeypatch.setenv(canva_data_cache.DATA_FILE_ENV, str(path))
+    return path
+
+
+def test_snapshot_is_reused_until_the_file_changes(data_file):
+    loader = CanvaDataLoader(check_interval=0)
+    first = loader.load()
+    assert loader.load() is first
+    assert first.metrics["escolas"]["total_escolas"] == 1
+    assert first.metrics["membros"]["total_membros"] == 2
+    assert "users" not in first.dashboard["schools_allocation"][1]
+    assert "users" in first.data["schools_allocation"][1]
+
+    data_file.write_text(json.dumps({**DOCUMENT, "periodo_filtro": "Hoje"}), encoding="utf-8")
+    second = loader.load()
+    assert second is not first
+    assert second.metrics["pessoas"]["periodo_filtro"] == "Hoje"
+    assert second.etag("pessoas") != first.etag("pessoas")
+
+
+def test_metricas_endpoint_answers_304_for_current_etag(data_file, monkeypatch):
+    from api.canva_metricas import main
+
+    monkeypatch.setattr("api.canva_metricas.canva_data", CanvaDataLoader(check_interval=0))
+
+    req = create_mock_http_request(route_params={"tipo": "pessoas"})
+    req.headers = {}
+    response = main(req)
+    assert response.status_code == 200
+    assert json.loads(response.get_body())["alunos"] == 7
+
+    req.headers = {"If-None-Match": response.headers["ETag"]}
+    assert main(req).status_code == 304
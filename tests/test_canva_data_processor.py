@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.canva_data_processor import (  # noqa: E402
+    DomainSuffixIndex,
+    email_domain,
+    load_schools_data,
+    school_domain_from_email,
+)
+
+
+def test_school_domain_from_shared_maplebear_address_uses_local_part():
+    assert school_domain_from_email("goiania@maplebear.com.br") == "goiania.maplebear.com.br"
+    assert school_domain_from_email(" Batel@Maplebear.com.br ") == "batel.maplebear.com.br"
+    assert school_domain_from_email("bogota@co.maplebear.com.br") == "bogota.co.maplebear.com.br"
+    # Local parts que não são um rótulo de domínio válido não identificam a unidade
+    assert school_domain_from_email("coordenacao.batel@maplebear.com.br") is None
+
+
+def test_school_domain_ignores_generic_providers():
+    assert school_domain_from_email("MAPLEBEAR.ARCOVERDE@GMAIL.COM") is None
+    assert school_domain_from_email("escola@hotmail.com.br") is None
+    assert school_domain_from_email("") is None
+    assert school_domain_from_email("secretaria@maplebeartaubate.com.br") == "maplebeartaubate.com.br"
+    assert school_domain_from_email("arcoverde.maplebear.com.br") == "arcoverde.maplebear.com.br"
+
+
+def test_suffix_index_resolves_subdomains_and_memoizes():
+    index = DomainSuffixIndex({"santamaria.maplebear.com.br": 1, "maplebeartaubate.com.br": 2})
+    assert index.lookup(email_domain("ana@santamaria.maplebear.com.br")) == 1
+    assert index.lookup("alunos.santamaria.maplebear.com.br") == 1
+    assert index.lookup(email_domain("Bia@MapleBearTaubate.com.br")) == 2
+    assert index.lookup("maplebear.com.br") is None
+    assert index.lookup("gmail.com") is None
+    assert index.lookup("") is None
+    assert len(index) == 2 and index._memo["alunos.santamaria.maplebear.com.br"] == 1
+
+    # Uma escola cadastrada com o domínio compartilhado só recebe quem não tem unidade mais específica
+    catch_all = DomainSuffixIndex({"santamaria.maplebear.com.br": 1, "maplebear.com.br": 999})
+    assert catch_all.lookup("santamaria.maplebear.com.br") == 1
+    assert catch_all.lookup("araruama.maplebear.com.br") == 999
+
+
+def test_shared_and_ambiguous_domains_are_left_out_of_the_map():
+    csv_content = "\n".join(
+        [
+            "﻿ID da Escola;Nome da Escola;E-mail da Escola",
+            "1;Maple Bear Goiânia;goiania@maplebear.com.br",
+            "2;Maple Bear Taubaté I;secretaria@maplebeartaubate.com.br",
+            "3;Maple Bear Taubaté II;contato@maplebeartaubate.com.br",
+            "4;Maple Bear Arcoverde;MAPLEBEAR.ARCOVERDE@GMAIL.COM",
+            "5;Maple Bear Goiânia II;goiania@maplebear.com.br",
+            "x;Linha inválida;invalida@maplebear.com.br",
+        ]
+    )
+    schools_df, domain_map_df = load_schools_data(csv_content)
+
+    assert schools_df["school_id"].tolist() == [1, 2, 3, 4, 5]
+    assert domain_map_df.empty
+
+    schools_df, domain_map_df = load_schools_data(csv_content.replace("5;Maple Bear Goiânia II;goiania", "5;Maple Bear Gama;gama"))
+    assert dict(zip(domain_map_df["school_domain"], domain_map_df["school_id"])) == {
+        "goiania.maplebear.com.br": 1,
+        "gama.maplebear.com.br": 5,
+    }
+    index = DomainSuffixIndex.from_domain_map(domain_map_df)
+    assert index.lookup("secretaria.goiania.maplebear.com.br") == 1
+    assert index.lookup("maplebeartaubate.com.br") is None
+    assert index.lookup("araruama.maplebear.com.br") is None
+
+
+def test_missing_columns_fall_back_to_simulated_schools():
+    schools_df, domain_map_df = load_schools_data("Nome;Cidade\nEscola;Recife\n")
+    assert isinstance(schools_df, pd.DataFrame) and len(schools_df) == len(domain_map_df) == 3
@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.canva_integration import CanvaIntegrationPipeline, latest_export  # noqa: E402
+
+HEADER = '"Membro","E-mail","Função","Última atividade","Designs criados","Designs publicados","Links compartilhados","Designs visualizados"'
+SCHOOLS = "ID da Escola;Nome da Escola;E-mail da Escola\n1;Maple Bear Santa Maria;santamaria@maplebear.com.br\n2;Maple Bear Arcoverde;arcoverde.maplebear.com.br\n"
+
+
+def _members(*rows):
+    return "\n".join([HEADER, *rows]) + "\n"
+
+
+def _pipeline(tmp_path):
+    return CanvaIntegrationPipeline(
+        members_path=tmp_path / "member-semana.csv",
+        templates_path=tmp_path / "template-semana.csv",
+        schools_path=tmp_path / "schools.csv",
+        output_path=tmp_path / "out.json",
+        state_path=tmp_path / "state.json",
+    )
+
+
+def test_incremental_run_matches_full_rebuild(tmp_path):
+    (tmp_path / "schools.csv").write_text(SCHOOLS, encoding="utf-8")
+    (tmp_path / "template-semana.csv").write_text('"Modelo","ID do modelo","Usadas"\n"Post","A1",3\n', encoding="utf-8")
+    members = tmp_path / "member-semana.csv"
+    members.write_text(
+        _members(
+            '"Ana","ana@santamaria.maplebear.com.br","Professor","nov. 2025",3,1,0,4',
+            '"Bia","bia@arcoverde.maplebear.com.br","Estudante","nov. 2025",1,0,0,1',
+            '"Caio","caio@gmail.com","Estudante","nov. 2025",2,2,2,2',
+        ),
+        encoding="utf-8",
+    )
+
+    pipeline = _pipeline(tmp_path)
+    assert pipeline.run()["mode"] == "full"
+    assert pipeline.run()["mode"] == "unchanged"
+
+    members.write_text(
+        _members(
+            '"Ana","ana@santamaria.maplebear.com.br","Professor","nov. 2025",3,1,0,4',
+            '"Bia","bia@arcoverde.maplebear.com.br","Estudante","dez. 2025",9,0,0,1',
+            '"Caio","caio@gmail.com","Estudante","nov. 2025",2,2,2,2',
+        ),
+        encoding="utf-8",
+    )
+    summary = pipeline.run()
+    assert (summary["mode"], summary["changed_schools"]) == ("incremental", 1)
+    incremental = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+
+    pipeline.run(force=True)
+    full = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+
+    assert incremental == full
+    allocation = {school["school_id"]: school for school in full["schools_allocation"]}
+    assert allocation[2]["users"][0]["designs_criados"] == 9
+    assert allocation[1]["total_users"] == 1
+    assert full["unallocated_users_count"] == 1
+    assert full["canva_metrics"]["designs_criados"] == 14
+    assert full["periodo_filtro"] == "semana"
+
+
+def test_latest_export_is_chosen_by_period_not_mtime(tmp_path):
+    for name in (
+        "member-activity_X_1732762800_1764385199_pt-BR.csv",
+        "member-activity_X_1761620400_1764298799_pt-BR.csv",
+        "template-activity_X_1761620400_1764298799_pt-BR.csv",
+        "template-activity_X_1732762800_1764385199_pt-BR.csv",
+        "template-janeiro_setembro2025.csv",
+        "member-novembro2025.csv",
+    ):
+        (tmp_path / name).write_text(HEADER + "\n", encoding="utf-8")
+    os.utime(tmp_path / "member-activity_X_1761620400_1764298799_pt-BR.csv", (4_000_000_000, 4_000_000_000))
+
+    members = latest_export("member", tmp_path)
+    assert members.name == "member-activity_X_1732762800_1764385199_pt-BR.csv"
+    assert latest_export("template", tmp_path, period=(1761620400, 1764298799)).name == (
+        "template-activity_X_1761620400_1764298799_pt-BR.csv"
+    )
+    assert latest_export("template", tmp_path, period=(1, 2)) is None
+
+
+def test_member_and_template_periods_must_match(tmp_path):
+    members = tmp_path / "member-activity_X_1732762800_1764385199_pt-BR.csv"
+    members.write_text(HEADER + "\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        CanvaIntegrationPipeline(
+            members_path=members,
+            templates_path=tmp_path / "template-activity_X_1755054000_1757732399_pt-BR.csv",
+            output_path=tmp_path / "out.json",
+            state_path=tmp_path / "state.json",
+        )
@@ -0,0 +1,57 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.canva_template_service import TemplateIndex, query_templates  # noqa: E402
+
+
+def _template(template_id, used, published=0, shared=0, name=None):
+    return {
+        "nome": name or f"Modelo {template_id}",
+        "id": template_id,
+        "tipo": "Apresentação",
+        "titular": "Maple Bear | Comunicação",
+        "usadas": used,
+        "publicado": published,
+        "compartilhados": shared,
+    }
+
+
+def _export(start, end):
+    return Path(f"template-activity_TEAM_{start}_{end}_pt-BR.csv")
+
+
+# Dois períodos de 10 dias sem sobreposição (o mais recente primeiro, de propósito)
+INDEX = TemplateIndex(
+    [
+        (_export(1000864000, 1001727999), [_template("A", 5, 9), _template("B", 30, name="B novo"), _template("C", 8)]),
+        (_export(1000000000, 1000863999), [_template("A", 20, 1), _template("B", 10)]),
+    ]
+)
+
+
+def test_top_n_by_usage_and_growth_in_latest_period():
+    by_usage = query_templates(limit=2, index=INDEX)
+    assert by_usage["periodo"]["comparado_com"] == "1000000000_1000863999"
+    assert by_usage["total_modelos"] == 3
+    assert [(item["id"], item["usadas"], item["crescimento"]) for item in by_usage["modelos"]] == [
+        ("B", 30, 200.0),
+        ("C", 8, None),
+    ]
+
+    by_growth = query_templates(sort="crescimento", index=INDEX)
+    assert [item["id"] for item in by_growth["modelos"]] == ["B", "C", "A"]
+
+    assert query_templates(sort="publicado", limit=1, index=INDEX)["modelos"][0]["id"] == "A"
+
+
+def test_template_series_merges_all_exports():
+    series = query_templates(template_id="B", index=INDEX)["modelo"]
+
+    assert series["nome"] == "B novo"
+    assert [(entry["periodo"], entry["usadas"]) for entry in series["periodos"]] == [
+        ("1000000000_1000863999", 10),
+        ("1000864000_1001727999", 30),
+    ]
@@ -0,0 +1,21 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.columnar import CategoricalColumn, true_rows, bool_array  # noqa: E402
+
+
+def test_categorical_column_counts_and_selects():
+    column = CategoricalColumn(["SP", "RJ", "SP", "", "SP"])
+
+    assert column.categories == ["SP", "RJ", ""]
+    assert column[1] == "RJ"
+    assert column.counts() == [3, 1, 1]
+    assert column.value_counts(rows=[0, 1]) == {"SP": 1, "RJ": 1}
+    assert list(column.select(["SP", "MG"])) == [0, 2, 4]
+    assert list(column.select(["SP"], rows=[1, 2, 3])) == [2]
+
+
+def test_true_rows_from_flags():
+    assert list(true_rows(bool_array([False, True, True, False]))) == [1, 2]
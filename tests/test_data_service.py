@@ -0,0 +1,338 @@
+"""Testes do DataProcessingService que não precisam de Postgres (statements, caches e validações)."""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared import service  # noqa: E402
+from api.shared.db_models import AuditLog  # noqa: E402
+from api.shared.model import LicenseAction, LicenseBadgeHelper, SchoolOverview  # noqa: E402
+from api.shared.service import (  # noqa: E402
+    AUDIT_PAGE_MAX,
+    BULK_MAX_ACTIONS,
+    DataProcessingService,
+    SchoolsOverviewCache,
+    _decode_audit_cursor,
+    _encode_audit_cursor,
+    _is_date_only,
+    _parse_audit_bound,
+)
+
+
+def _sql(stmt) -> str:
+    return " ".join(str(stmt.compile(dialect=postgresql.dialect())).split())
+
+
+def _overview(school_id, used=0, limit=2):
+    return SchoolOverview(
+        id=school_id,
+        name=f"Escola {school_id}",
+        status="Operando",
+        cluster="A",
+        city="",
+        state="",
+        region="",
+        carteira_saf="",
+        used=used,
+        limit=limit,
+        badge=LicenseBadgeHelper.generate_badge(used, limit),
+        contact={},
+    )
+
+
+@pytest.fixture
+def no_database(monkeypatch):
+    def get_session():
+        raise AssertionError("não deveria acessar o banco")
+
+    monkeypatch.setattr(service, "get_session", get_session)
+
+
+# --- Datas e cursor da auditoria ---
+
+def test_is_date_only_requires_a_real_date():
+    assert _is_date_only("2025-11-30")
+    assert _is_date_only(" 2025-11-30 ")
+    assert not _is_date_only("2025-11-31")
+    assert not _is_date_only("30/11/2025")
+    assert not _is_date_only("2025-11-30T10:00")
+    assert not _is_date_only("abcdefghij")
+
+
+def test_audit_bounds_default_to_utc():
+    assert _parse_audit_bound("2025-11-30") == datetime(2025, 11, 30, tzinfo=timezone.utc)
+    assert _parse_audit_bound("2025-11-30T10:00:00Z") == datetime(2025, 11, 30, 10, tzinfo=timezone.utc)
+    offset = _parse_audit_bound("2025-11-30T10:00:00-03:00")
+    assert offset == datetime(2025, 11, 30, 13, tzinfo=timezone.utc)
+    with pytest.raises(ValueError):
+        _parse_audit_bound("30/11/2025")
+
+
+def test_audit_cursor_round_trip():
+    log = AuditLog(id=42, ts=datetime(2025, 11, 30, 10, 0, 0, 123456, tzinfo=timezone.utc))
+    assert _decode_audit_cursor(_encode_audit_cursor(log)) == (log.ts, 42)
+    for cursor in ("", "não-é-base64", "WzEsMiwzXQ=="):
+        with pytest.raises(ValueError):
+            _decode_audit_cursor(cursor)
+
+
+def test_date_only_end_includes_the_whole_day():
+    data_service = DataProcessingService()
+    whole_day = data_service._audit_query({"end": "2025-11-30"}).compile(dialect=postgresql.dialect())
+    assert "audit_logs.ts < %(ts_1)s" in str(whole_day)
+    assert whole_day.params["ts_1"] == datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+    exact = data_service._audit_query({"end": "2025-11-30T10:00:00"}).compile(dialect=postgresql.dialect())
+    assert "audit_logs.ts <= %(ts_1)s" in str(exact)
+    assert exact.params["ts_1"] == datetime(2025, 11, 30, 10, tzinfo=timezone.utc)
+    assert _sql(data_service._audit_query({})).endswith("ORDER BY audit_logs.ts DESC, audit_logs.id DESC")
+
+
+def test_audit_page_is_clamped_and_returns_a_cursor(monkeypatch):
+    base = datetime(2025, 11, 30, tzinfo=timezone.utc)
+    logs = [AuditLog(id=n, action="assign", actor="a", payload={}, ts=base - timedelta(minutes=n)) for n in range(3)]
+    executed = []
+
+    class Session:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def execute(self, stmt):
+            executed.append(stmt)
+            params = stmt.compile(dialect=postgresql.dialect()).params
+            rows = logs
+            if "param_2" in params:  # cursor (ts, id) da página anterior
+                rows = [log for log in logs if (log.ts, log.id) < (params["param_1"], params["param_2"])]
+            limit = stmt._limit
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: rows[:limit]))
+
+    monkeypatch.setattr(service, "get_session", Session)
+    data_service = DataProcessingService()
+
+    page = data_service.get_audit_log_page(limit=2)
+    assert [item["id"] for item in page["items"]] == [0, 1]
+    assert _decode_audit_cursor(page["nextCursor"]) == (logs[1].ts, 1)
+
+    next_page = data_service.get_audit_log_page(limit=2, cursor=page["nextCursor"])
+    assert "(audit_logs.ts, audit_logs.id) < (%(param_1)s, %(param_2)s)" in _sql(executed[-1])
+    assert next_page["nextCursor"] is None
+
+    data_service.get_audit_log_page(limit=10 ** 6)
+    assert executed[-1]._limit == AUDIT_PAGE_MAX + 1
+    data_service.get_audit_log_page(limit=0)
+    assert executed[-1]._limit == 2
+
+
+# --- Statements de licença ---
+
+class _TransferSession:
+    """Sessão falsa: SELECTs devolvem os usuários; UPDATEs, o rowcount configurado."""
+
+    def __init__(self, users, rowcounts):
+        self.users = users
+        self.rowcounts = rowcounts
+        self.updates = []
+        self.statements = []
+        self.added = []
+        self.committed = self.rolled_back = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, stmt):
+        if stmt.is_select:
+            email = stmt.compile().params["email_1"]
+            user = self.users.get(email)
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(first=lambda: user))
+        user_id = stmt.compile().params["id_1"]
+        self.updates.append(user_id)
+        self.statements.append(_sql(stmt))
+        return SimpleNamespace(rowcount=self.rowcounts[user_id])
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def _transfer(monkeypatch, rowcounts):
+    users = {
+        "a@escola.com.br": SimpleNamespace(id=2, has_canva=True, is_compliant=True),
+        "b@escola.com.br": SimpleNamespace(id=1, has_canva=False, is_compliant=True),
+    }
+    session = _TransferSession(users, rowcounts)
+    monkeypatch.setattr(service, "get_session", lambda: session)
+    action = LicenseAction(school_id="1", from_email="a@escola.com.br", to_email="b@escola.com.br")
+    return DataProcessingService().transfer_license(action, "admin"), session
+
+
+def test_transfer_updates_both_users_conditionally_in_id_order(monkeypatch):
+    result, session = _transfer(monkeypatch, {1: 1, 2: 1})
+    assert result["success"] is True
+    assert session.updates == [1, 2] and session.committed and len(session.added) == 1
+    grant, revoke = session.statements
+    assert "users.has_canva IS NOT true AND users.is_compliant IS true" in grant
+    assert revoke.endswith("WHERE users.id = %(id_1)s AND users.has_canva IS true")
+
+
+def test_transfer_rolls_back_when_the_source_was_revoked_concurrently(monkeypatch):
+    result, session = _transfer(monkeypatch, {1: 1, 2: 0})
+    assert result["success"] is False and result["message"] == "Usuário de origem não possui licença Canva"
+    assert session.rolled_back and not session.committed and not session.added
+
+    result, session = _transfer(monkeypatch, {1: 0, 2: 1})
+    assert result["message"] == "Usuário de destino já possui licença Canva"
+    assert session.rolled_back and not session.committed
+
+
+def test_assign_statement_is_a_single_conditional_cte_chain():
+    action = LicenseAction(school_id="10", user_email="ana@escola.com.br", motivo="novo", ticket="T-1")
+    sql = _sql(DataProcessingService()._assign_statement(action, "agente@maplebear.com.br"))
+
+    assert sql.startswith("WITH slot AS (UPDATE schools SET used_licenses=(schools.used_licenses + %(used_licenses_1)s)")
+    assert "schools.used_licenses < coalesce(nullif(schools.license_limit, %(nullif_1)s), %(coalesce_1)s)" in sql
+    assert "EXISTS (SELECT users.id FROM users WHERE users.school_id = %(school_id_1)s" in sql
+    assert "granted AS (UPDATE users SET has_canva=" in sql
+    assert "WHERE users.school_id IN (SELECT slot.id FROM slot) AND users.email = " in sql
+    assert "audit AS (INSERT INTO audit_logs (action, school_id, actor, payload) SELECT" in sql
+    assert sql.endswith("SELECT count(*) AS count_1 FROM audit")
+
+
+def test_global_limit_statement_locks_filtered_schools():
+    sql = _sql(
+        DataProcessingService()._global_limit_statement(3, "campanha", "admin", {"cluster": "A", "region": "Sul"})
+    )
+    assert sql.startswith('WITH "old" AS (SELECT schools.id AS id, schools.license_limit AS license_limit FROM schools')
+    assert "WHERE schools.cluster = %(cluster_1)s AND schools.region = %(region_1)s FOR UPDATE" in sql
+    assert 'changed AS (UPDATE schools SET license_limit=' in sql
+    assert 'FROM "old" WHERE schools.id = "old".id RETURNING schools.id, "old".license_limit AS old_limit' in sql
+    assert "jsonb_build_object" in sql and sql.endswith("SELECT audit.school_id FROM audit")
+
+    unfiltered = _sql(DataProcessingService()._global_limit_statement(3, "", "admin", {}))
+    assert "FROM schools FOR UPDATE" in unfiltered
+
+
+def test_global_limit_rejects_unknown_filters(no_database):
+    result = DataProcessingService().set_global_license_limit(3, "", "admin", {"cidade": "Recife"})
+    assert result["success"] is False and "cidade" in result["message"]
+    assert DataProcessingService().set_global_license_limit(-1, "", "admin")["success"] is False
+
+
+# --- Cache do overview ---
+
+def test_overview_cache_drops_loads_started_before_a_write():
+    cache = SchoolsOverviewCache(ttl=60)
+    version = cache.version
+    cache.patch_usage("1", 1)
+    cache.store([_overview("1")], version)
+    assert cache.get() is None
+
+    cache.store([_overview("1")], cache.version)
+    assert [item.id for item in cache.get()] == ["1"]
+    cache.invalidate()
+    assert cache.get() is None
+
+
+def test_overview_cache_patches_usage_and_limits_in_place():
+    cache = SchoolsOverviewCache(ttl=60)
+    cache.store([_overview("1", used=1), _overview("2", used=2), _overview("3")], cache.version)
+
+    cache.patch_usage("1", 1)
+    cache.patch_usage("3", -1)
+    cache.patch_usage("desconhecida", 1)
+    items = {item.id: item for item in cache.get()}
+    assert items["1"].used == 2 and items["1"].badge == LicenseBadgeHelper.generate_badge(2, 2)
+    assert items["3"].used == 0
+
+    cache.patch_limit(5, ["2"])
+    items = {item.id: item for item in cache.get()}
+    assert (items["1"].limit, items["2"].limit) == (2, 5)
+    assert items["2"].badge == LicenseBadgeHelper.generate_badge(2, 5)
+
+    cache.patch_limit(0)
+    assert {item.limit for item in cache.get()} == {service.DEFAULT_MAX_LICENSE_LIMIT}
+
+
+def test_overview_cache_expires_after_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(service.time, "monotonic", lambda: clock[0])
+    cache = SchoolsOverviewCache(ttl=30)
+    cache.store([_overview("1")], cache.version)
+    clock[0] += 29
+    assert cache.get() is not None
+    clock[0] += 2
+    assert cache.get() is None
+
+
+# --- Lote de ações ---
+
+def test_bulk_rejects_empty_and_oversized_batches(no_database):
+    data_service = DataProcessingService()
+    assert data_service.bulk_license_actions([], "admin")["message"] == "Nenhuma ação informada"
+
+    actions = [("assign", LicenseAction(school_id="1", user_email=f"u{n}@escola.com.br")) for n in range(BULK_MAX_ACTIONS + 1)]
+    result = data_service.bulk_license_actions(actions, "admin")
+    assert result["success"] is False and str(BULK_MAX_ACTIONS) in result["message"]
+
+
+def test_bulk_items_are_validated_in_order_against_memory_state():
+    schools = {"1": SimpleNamespace(license_limit=2), "2": SimpleNamespace(license_limit=None)}
+    users = {
+        ("1", "a@escola.com.br"): SimpleNamespace(is_compliant=True),
+        ("1", "b@escola.com.br"): SimpleNamespace(is_compliant=True),
+        ("1", "c@escola.com.br"): SimpleNamespace(is_compliant=True),
+        ("1", "d@gmail.com"): SimpleNamespace(is_compliant=False),
+    }
+    has_canva = {key: False for key in users}
+    has_canva[("1", "a@escola.com.br")] = True
+    used = {"1": 1, "2": 0}
+    apply = DataProcessingService()._apply_bulk_item
+
+    def item(kind, **fields):
+        return apply(kind, LicenseAction(school_id=fields.pop("school_id", "1"), **fields), schools, users, has_canva, used)
+
+    assert item("assign", user_email="b@escola.com.br") is None
+    assert item("assign", user_email="c@escola.com.br") == "Limite de licenças atingido para a escola"
+    assert item("assign", user_email="d@gmail.com") == "Email do usuário não pertence a domínio autorizado"
+    assert item("assign", user_email="b@escola.com.br") == "Usuário já possui licença Canva"
+    assert item("revoke", user_email="a@escola.com.br") is None
+    assert item("assign", user_email="c@escola.com.br") is None
+    assert item("transfer", from_email="c@escola.com.br", to_email="a@escola.com.br") is None
+    assert item("transfer", from_email="c@escola.com.br", to_email="a@escola.com.br") == (
+        "Usuário de origem não possui licença Canva"
+    )
+    assert item("transfer", from_email="a@escola.com.br", to_email="d@gmail.com") == (
+        "Email do usuário de destino não é de domínio autorizado"
+    )
+    assert item("revoke", user_email="x@escola.com.br") == "Usuário não encontrado na escola"
+    assert item("assign", school_id="9", user_email="a@escola.com.br") == "Escola não encontrada"
+    assert item("delete", user_email="a@escola.com.br") == "Tipo de ação inválido"
+
+    assert used == {"1": 2, "2": 0}
+    assert [email for (_, email), value in has_canva.items() if value] == ["a@escola.com.br", "b@escola.com.br"]
+
+
+def test_bulk_audit_rows_are_marked():
+    apply = DataProcessingService()._bulk_audit_row
+    row = apply("transfer", LicenseAction(school_id="1", from_email="a@x", to_email="b@x", motivo="m"), "admin")
+    assert row == {
+        "action": "transfer",
+        "school_id": "1",
+        "actor": "admin",
+        "payload": {"from_email": "a@x", "to_email": "b@x", "motivo": "m", "ticket": "", "bulk": True},
+    }
@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.email_compliance import classify_many, is_email_compliant  # noqa: E402
+from api.shared.model import EmailComplianceHelper  # noqa: E402
+
+CASES = {
+    "ana@maplebear.com.br": True,
+    "ANA@CO.MAPLEBEAR.COM.BR ": True,
+    "joao@mbcentral.com.br": True,
+    "rh@sebsa.com.br": True,
+    "comercial@mbguarulhos.com.br": True,
+    "mbgsmedia@gmail.com": True,
+    "mb@gmail.com": False,
+    "mbx@gmail.com": False,
+    "fulano@gmail.com": False,
+    "sem-arroba": False,
+    "": False,
+}
+
+
+def test_single_rule_set_for_every_entry_point():
+    emails = list(CASES)
+    expected = list(CASES.values())
+
+    assert [is_email_compliant(email) for email in emails] == expected
+    assert [EmailComplianceHelper.is_email_compliant(email) for email in emails] == expected
+    assert classify_many(emails) == expected
@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.file_snapshot import SnapshotCache, column_indexes, file_stamp, normalize  # noqa: E402
+
+
+def test_normalize_and_column_indexes():
+    assert normalize("  Região da Escola ") == "regiao da escola"
+    header = [normalize(label) for label in ("ID", "Nome da Escola", "Região")]
+    assert column_indexes(header, "nome da escola", "nome", "regiao") == [1, 2]
+
+
+def test_snapshot_is_rebuilt_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "dados.csv"
+    path.write_text("a;b\n")
+    cache = SnapshotCache()
+    builds = []
+
+    def build():
+        builds.append(path.read_text())
+        return len(builds)
+
+    assert cache.get((file_stamp(path),), build) == 1
+    assert cache.get((file_stamp(path),), build) == 1
+    path.write_text("a;b\n1;2\n")
+    assert cache.get((file_stamp(path),), build) == 2
+    # Slots independentes (uma campanha de vouchers por slot, por exemplo)
+    assert cache.get((file_stamp(path),), build, slot="2025") == 3
+    assert cache.get((file_stamp(path),), build) == 2
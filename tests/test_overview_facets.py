@@ -0,0 +1,127 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.canva_overview_service import (  # noqa: E402
+    OverviewDataset,
+    compute_overview,
+    parse_overview_filters,
+    query_overview,
+)
+
+
+def _school(school_id, cluster, state, status="Operando"):
+    return {
+        "id": school_id,
+        "name": f"Escola {school_id}",
+        "status": status,
+        "cluster": cluster,
+        "city": "",
+        "state": state,
+        "region": "Sudeste" if state in ("SP", "RJ") else "Sul",
+        "carteira_saf": "Ana",
+    }
+
+
+def _user(email, school_id):
+    return {"name": "", "email": email, "role": "Professor", "school_name": "", "school_id": school_id, "status": ""}
+
+
+DATASET = OverviewDataset(
+    [_school("1", "Potente", "SP"), _school("2", "Alerta", "SP"), _school("3", "Potente", "PR", "Implantando")],
+    [
+        _user("a@maplebear.com.br", "1"),
+        _user("b@gmail.com", "1"),
+        _user("c@gmail.com", "1"),
+        _user("d@hotmail.com", "3"),
+        _user("e@gmail.com", ""),
+    ],
+)
+
+
+def test_unfiltered_query_matches_compute_overview():
+    result = query_overview(dataset=DATASET)
+    expected = compute_overview(dataset=DATASET)
+    expected.pop("fonte")
+
+    assert result["overview"] == expected
+    assert result["schools"]["total"] == 3
+    assert [item["schoolId"] for item in result["schools"]["items"]] == ["1", "3", "2"]
+
+
+def test_filters_slice_kpis_and_facets_ignore_their_own_filter():
+    result = query_overview({"cluster": ["Potente"], "state": ["SP"]}, license_limit=2, dataset=DATASET)
+
+    overview = result["overview"]
+    assert overview["totalEscolas"] == 1
+    assert overview["licencasUtilizadas"] == 3
+    assert overview["escolasEmExcesso"] == 1
+    assert overview["usuariosNaoConformes"] == 2
+    assert overview["dominiosNaoMapleBearTop"] == [{"domain": "gmail.com", "count": 2}]
+
+    # A faceta de cluster considera só o filtro de estado (SP)
+    assert {item["value"]: item["schools"] for item in result["facets"]["cluster"]} == {"Potente": 1, "Alerta": 1}
+    assert result["facets"]["state"] == [
+        {"value": "SP", "schools": 1, "usedLicenses": 3},
+        {"value": "PR", "schools": 1, "usedLicenses": 1},
+    ]
+
+
+def test_pagination_and_param_parsing():
+    filters = parse_overview_filters({"cluster": "Potente, Alerta", "carteiraSaf": "", "page": "2"})
+    assert filters == {"cluster": ["Potente", "Alerta"]}
+
+    page = query_overview(filters, page=2, page_size=2, dataset=DATASET)["schools"]
+    assert page["total"] == 3
+    assert [item["schoolId"] for item in page["items"]] == ["2"]
+
+
+def _named_user(email, school_name):
+    return {"name": "", "email": email, "role": "", "school_name": school_name, "school_id": "", "status": ""}
+
+
+def test_school_kpis_come_from_the_same_per_school_usage():
+    dataset = OverviewDataset(
+        [_school("1", "Potente", "SP"), _school("2", "Alerta", "SP")],
+        [
+            _user("a@gmail.com", "1"),
+            _user("b@gmail.com", "1"),
+            _user("c@gmail.com", "1"),
+            _named_user("d@gmail.com", "Escola Fora"),
+        ],
+    )
+    unfiltered = compute_overview(license_limit=2, dataset=dataset)
+    every_cluster = query_overview({"cluster": ["Potente", "Alerta"]}, license_limit=2, dataset=dataset)["overview"]
+
+    # "Escola Fora" nao esta no Franchising.csv: nao conta como escola com licenca
+    assert unfiltered["escolasComLicenca"] == every_cluster["escolasComLicenca"] == 1
+    assert unfiltered["escolasEmExcesso"] == every_cluster["escolasEmExcesso"] == 1
+    # Sem filtro, usuarios sem escola reconhecida continuam nos totais de usuarios
+    assert (unfiltered["usuariosNaoConformes"], every_cluster["usuariosNaoConformes"]) == (4, 3)
+    assert every_cluster["dominiosNaoMapleBear"] == every_cluster["usuariosNaoConformes"]
+
+
+def test_users_without_school_id_are_matched_by_school_name():
+    # Como no usuarios_public.csv, em que a coluna "Escola ID" vem vazia
+    dataset = OverviewDataset(
+        [_school("1", "Potente", "SP"), _school("2", "Alerta", "SP"), _school("3", "Potente", "PR")],
+        [
+            _named_user("a@maplebear.com.br", "Escola 1"),
+            _named_user("b@maplebear.com.br", "ESCOLA 1"),
+            _named_user("c@maplebear.com.br", "Escola 1"),
+            _named_user("d@maplebear.com.br", "Escola 2 - Centro I"),
+            _user("e@maplebear.com.br", "2"),
+            _named_user("f@maplebear.com.br", "Escola Fora"),
+            _named_user("g@maplebear.com.br", ""),
+        ],
+    )
+    overview = compute_overview(license_limit=2, dataset=dataset)
+    assert (overview["escolasComLicenca"], overview["escolasEmExcesso"], overview["licencasUtilizadas"]) == (2, 1, 7)
+
+    # ID e nome da mesma escola somam na mesma linha; a unidade cai na escola pelo nome
+    by_school = {item["schoolId"]: item["usedLicenses"] for item in query_overview(dataset=dataset)["schools"]["items"]}
+    assert by_school == {"1": 3, "2": 2, "3": 0}
+    result = query_overview({"cluster": ["Potente"]}, license_limit=2, dataset=dataset)
+    assert result["overview"]["licencasUtilizadas"] == 3
+    assert result["facets"]["state"] == [{"value": "SP", "schools": 1, "usedLicenses": 3}, {"value": "PR", "schools": 1, "usedLicenses": 0}]
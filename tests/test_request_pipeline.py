@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import azure.functions as func  # noqa: E402
+
+from api.shared import request_pipeline  # noqa: E402
+from api.shared.request_pipeline import TokenCache, http_endpoint, json_response  # noqa: E402
+from mock_utils import assert_http_response, create_mock_http_request  # noqa: E402
+
+
+def _request(method="GET", token=None):
+    req = create_mock_http_request(method=method)
+    req.headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return req
+
+
+@http_endpoint(methods=("GET",), role="agente")
+def echo(req: func.HttpRequest, user: dict) -> func.HttpResponse:
+    return json_response({"sub": user["sub"]})
+
+
+def setup_function():
+    request_pipeline.token_cache.clear()
+
+
+def test_verified_tokens_are_cached():
+    payload = {"sub": "ana", "role": "Agent", "exp": time.time() + 3600}
+    with patch.object(request_pipeline, "verify_token", return_value=payload) as verify:
+        for _ in range(3):
+            response = echo(_request(token="tok"))
+            assert_http_response(response, 200, {"sub": "ana"})
+
+    assert verify.call_count == 1
+    assert response.headers["Access-Control-Allow-Methods"] == "GET, OPTIONS"
+
+
+def test_invalid_tokens_are_rejected_and_not_cached():
+    error = {"error": "token_expired", "message": "Token expirado"}
+    with patch.object(request_pipeline, "verify_token", return_value=error) as verify:
+        for _ in range(2):
+            assert_http_response(echo(_request(token="old")), 401, {"success": False, "message": "Token expirado"})
+
+    assert verify.call_count == 2
+
+
+def test_missing_token_method_and_role_checks():
+    assert_http_response(echo(_request()), 401)
+    assert_http_response(echo(_request(method="POST", token="tok")), 405)
+    assert echo(_request(method="OPTIONS")).status_code == 200
+
+    coordinator_only = http_endpoint(methods=("GET",), role="coordenadora")(echo.handler)
+    payload = {"sub": "ana", "role": "Agent"}
+    with patch.object(request_pipeline, "verify_token", return_value=payload):
+        response = coordinator_only(_request(token="tok"))
+    assert_http_response(response, 403, {"success": False, "message": "Permissão insuficiente"})
+
+
+def test_handler_errors_become_500():
+    @http_endpoint(methods=("GET",), role=None)
+    def broken(req, user):
+        raise RuntimeError("boom")
+
+    response = broken(_request())
+    assert response.status_code == 500
+    assert json.loads(response.get_body())["message"] == "Erro interno: boom"
+
+
+def test_token_cache_honours_exp_and_capacity():
+    cache = TokenCache(max_entries=2, ttl=60)
+    cache.put("expired", {"sub": "a", "exp": time.time() - 1})
+    assert cache.get("expired") is None
+
+    cache.put("a", {"sub": "a"})
+    cache.put("b", {"sub": "b"})
+    cache.get("a")
+    cache.put("c", {"sub": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"sub": "a"}
+    assert cache.get("c") == {"sub": "c"}
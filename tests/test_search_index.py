@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.search_index import DirectoryIndex  # noqa: E402
+
+SCHOOLS = [
+    {"id": "1", "name": "Maple Bear Sinop - Recanto Suíço I", "city": "Sinop"},
+    {"id": "2", "name": "Maple Bear São Paulo - Pinheiros", "city": "São Paulo"},
+    {"id": "3", "name": "Colégio Parceiro", "city": "Sinop"},
+]
+USERS = [
+    {"email": "Ana.Silva2@sinop.maplebear.com.br", "name": "Ana Silva", "school_id": "1", "has_canva": False},
+    {"email": "joao@saopaulo.maplebear.com.br", "name": "João", "school_id": "2", "has_canva": True},
+]
+
+
+def test_prefix_accent_insensitive_search_and_ranking():
+    index = DirectoryIndex(SCHOOLS, USERS)
+
+    schools = index.search_schools("maple bear sin")
+    assert [school["id"] for school in schools["items"]] == ["1"]
+
+    # Nome começando pela consulta vem antes de quem só casa pela cidade
+    by_city = index.search_schools("sinop")
+    assert [school["id"] for school in by_city["items"]] == ["3", "1"]
+    assert index.search_schools("SAO paul")["items"][0]["id"] == "2"
+
+    users = index.search_users("ana.silva2@sin")
+    assert users["total"] == 1
+    assert users["items"][0]["school_name"] == "Maple Bear Sinop - Recanto Suíço I"
+    assert index.search_users("joão")["items"][0]["email"] == "joao@saopaulo.maplebear.com.br"
+
+
+def test_license_status_updates_in_place():
+    index = DirectoryIndex(SCHOOLS, USERS)
+
+    index.set_license("ana.silva2@SINOP.maplebear.com.br", True)
+    assert index.search_users("ana")["items"][0]["has_canva"] is True
+    index.set_license("desconhecido@sinop.maplebear.com.br", True)
+    index.set_license(None, True)
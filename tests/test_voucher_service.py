@@ -0,0 +1,64 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared.voucher_service import (  # noqa: E402
+    VoucherCampaign,
+    VoucherTable,
+    parse_exception_vouchers,
+    parse_school_vouchers,
+    parse_voucher_installments,
+    query_vouchers,
+)
+
+SCHOOLS_2026 = [
+    ["id_escola", "Nome", "Cluster", "Status da Escola", "Direito a voucher", "Qtd. Vouchers", "Código do voucher", "Voucher enviado "],
+    ["10", "Maple Bear Camaçari - Busca Vida I", "Desenvolvimento", "Ativa", "Sim", "8", "MBBA2026204", "SIM"],
+    ["845", "Maple Bear São Vicente", "Implantação", "Ativa", "Não", "1", "MBSP2026400", "NÃO"],
+    ["100", "Maple Bear Paulínia - Morumbi I", "Potente", "Ativa", "Sim", "11", "MBSP2026181", "SIM"],
+]
+# Layout de 2025: sem id_escola, nome em "Grupo economico"
+SCHOOLS_2025 = [
+    ["Grupo economico", "Cluster 2024", "Direito a voucher?", "Quantidade de vouchers", "Código do voucher "],
+    ["MAPLE BEAR CAMPINAS - HÍPICA", "Potente", "Sim", "13", "MBSP2025302"],
+]
+EXCEPTIONS = [
+    ["Unidade", "Responsável Financeiro ", "Curso ", "% Voucher ", "Código ", "Qtd de utilizações"],
+    ["SÃO VICENTE", "", "", "50", " SAOVICENTE50", "10"],
+]
+INSTALLMENTS = [
+    ["Nome completo do colaborador", "CPF do colaborador", "Nome da escola", "Filho", "Série", "Filho", "Série"],
+    ["Ana", "1", "Bauru", "Valentina", "Toddler", "Walter", "Year 4"],
+    ["", "", "", "", "", "", ""],
+]
+
+CAMPAIGN = VoucherCampaign(
+    "2026",
+    {
+        "escolas": VoucherTable("escolas", parse_school_vouchers(SCHOOLS_2026)),
+        "excecoes": VoucherTable("excecoes", parse_exception_vouchers(EXCEPTIONS)),
+        "parcelamentos": VoucherTable("parcelamentos", parse_voucher_installments(INSTALLMENTS)),
+    },
+)
+
+
+def test_school_filters_use_indexes_and_accent_insensitive_names():
+    by_name = query_vouchers("escolas", {"escola": "sao vicente"}, loaded=CAMPAIGN)
+    assert [item["id"] for item in by_name["items"]] == ["845"]
+    assert by_name["items"][0]["voucherEligible"] is False
+
+    eligible = query_vouchers("escolas", {"direito": "sim", "cluster": "potente"}, loaded=CAMPAIGN)
+    assert [item["voucherCode"] for item in eligible["items"]] == ["MBSP2026181"]
+
+    paged = query_vouchers("escolas", {"escola": "maple"}, page=2, page_size=2, loaded=CAMPAIGN)
+    assert (paged["total"], [item["id"] for item in paged["items"]]) == (3, ["100"])
+
+
+def test_code_lookup_across_sheets_and_layouts():
+    assert CAMPAIGN.find_code("saovicente50 ")["excecoes"][0]["usageCount"] == 10
+    assert CAMPAIGN.find_code("MBBA2026204")["escolas"][0]["voucherQuantity"] == 8
+    assert [row["childName"] for row in CAMPAIGN.tables["parcelamentos"].rows] == ["Valentina", "Walter"]
+
+    legacy = parse_school_vouchers(SCHOOLS_2025)[0]
+    assert (legacy["name"], legacy["cluster"], legacy["voucherQuantity"]) == ("MAPLE BEAR CAMPINAS - HÍPICA", "Potente", 13)
@@ -0,0 +1,75 @@
+import io
+import os
+import sys
+import warnings
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.shared import workbook_cache  # noqa: E402
+from api.shared.workbook_cache import normalize_column, read_workbook  # noqa: E402
+
+FRANCHISING = Path(__file__).resolve().parents[1] / "api" / "local_data" / "Franchising_oficial.xlsx"
+
+
+@pytest.fixture(autouse=True)
+def _quiet_openpyxl():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        yield
+
+
+def test_normalize_column():
+    assert normalize_column("  E-mail da  Escola ") == "e mail da escola"
+    assert normalize_column("Região da Escola") == "regiao da escola"
+
+
+def test_franchising_is_parsed_once_and_read_back_identically(tmp_path, monkeypatch):
+    expected = pd.read_excel(FRANCHISING)
+    first = read_workbook(FRANCHISING, normalize=False, cache_dir=tmp_path)
+    pd.testing.assert_frame_equal(first, expected)
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("planilha interpretada de novo")
+
+    monkeypatch.setattr(workbook_cache.pd, "read_excel", no_parse)
+    pd.testing.assert_frame_equal(read_workbook(FRANCHISING, normalize=False, cache_dir=tmp_path), expected)
+
+    normalized = read_workbook(FRANCHISING, cache_dir=tmp_path)
+    assert "e mail da escola" in normalized.columns and "id da escola" in normalized.columns
+    assert normalized["nome da escola"].tolist() == expected["Nome da Escola"].tolist()
+
+
+def test_mixed_and_colliding_columns_round_trip(tmp_path):
+    frame = pd.DataFrame(
+        {
+            "Código": [1, "A-2", None, 2.5, pd.Timestamp("2026-01-01 10:00:00.5")],
+            "Codigo": ["x", None, "ç", "", "y"],
+            "Valor": [1.0, 2.0, None, 4.0, 5.0],
+        }
+    )
+    buffer = io.BytesIO()
+    frame.to_excel(buffer, index=False)
+    data = buffer.getvalue()
+
+    parsed = read_workbook(data, normalize=False, cache_dir=tmp_path)
+    cached = read_workbook(data, normalize=False, cache_dir=tmp_path)
+    pd.testing.assert_frame_equal(cached, parsed)
+    assert list(read_workbook(data, cache_dir=tmp_path).columns) == ["codigo", "codigo", "valor"]
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+def test_mixed_column_falls_back_to_npz_with_pyarrow(tmp_path):
+    pytest.importorskip("pyarrow")
+    frame = pd.DataFrame({"Código": [101, "A-2", 303], "Nome": ["a", "b", "c"]})
+    buffer = io.BytesIO()
+    frame.to_excel(buffer, index=False)
+    data = buffer.getvalue()
+
+    parsed = read_workbook(data, normalize=False, cache_dir=tmp_path)
+    assert parsed["Código"].tolist() == [101, "A-2", 303]
+    assert len(list(tmp_path.glob("*.npz"))) == 1 and not list(tmp_path.glob("*.parquet"))
+    pd.testing.assert_frame_equal(read_workbook(data, normalize=False, cache_dir=tmp_path), parsed)